@@ -1,12 +1,20 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import time
-from datetime import datetime, timedelta
-import json
+from datetime import datetime
+from itertools import zip_longest
+
+from ingestion.minio_upload import UPLOAD_PREFIX, ensure_bucket, make_s3_client, upload_files, upload_key, upload_stream
+from ingestion.preference_producer import PREFERENCE_TOPIC, iter_shard_events, make_producer
+from ingestion.upload_ingest import UPLOAD_DIR, UploadSchemaError, check_schema, ingest_csv, read_preview, shard_dir_name
+from processing.jobs import ACTIVE_STATUSES, JobRunner
+from web.utils import (
+    get_catalog, get_preference_recommendations, get_rollup, get_stream_metrics, get_user_recommendations
+)
 
 # Page configuration
 st.set_page_config(
@@ -47,13 +55,28 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+SPARK_SUBMIT = os.environ.get("SPARK_SUBMIT", "spark-submit")
+# How often the Model Training page polls the job registry
+JOB_POLL_S = 2.0
+job_runner = JobRunner()
+
+# Dashboard rollups change at most once per streaming trigger
+ROLLUP_TTL_S = int(os.environ.get("ROLLUP_TTL_S", 60))
+
+
+@st.cache_data(ttl=ROLLUP_TTL_S, show_spinner=False)
+def load_rollup(name):
+    return get_rollup(name)
+
+
 # Initialize session state
 if 'kafka_status' not in st.session_state:
     st.session_state.kafka_status = 'Running'
 if 'spark_status' not in st.session_state:
     st.session_state.spark_status = 'Running'
-if 'model_status' not in st.session_state:
-    st.session_state.model_status = 'Ready'
+# Shared by every session: a training job started by one user is visible to all
+st.session_state.model_status = 'Training' if job_runner.active("als_train") else 'Ready'
 if 'recommendations' not in st.session_state:
     st.session_state.recommendations = []
 
@@ -90,35 +113,58 @@ if page == "Dashboard":
     st.markdown("<h1 class='main-header'>🎵 Music Recommendation System</h1>", unsafe_allow_html=True)
     st.markdown("<p style='text-align: center; font-size: 1.2rem; color: #666;'>Kafka + Spark + MinIO Integration</p>", unsafe_allow_html=True)
     
+    # Rollups maintained by the streaming job (processing/rollups.py); a few small tables
+    # regardless of how much event history exists, cached for ROLLUP_TTL_S
+    events_day = load_rollup("events_day")
+    events_hour = load_rollup("events_hour")
+    served_hour = load_rollup("served_hour")
+    
+    now = pd.Timestamp.now("UTC").tz_localize(None)
+    today = now.normalize()
+    yesterday = today - pd.Timedelta(days=1)
+    daily_totals = events_day[events_day["genre"] == "*"].set_index("period_start") if not events_day.empty else None
+    served_daily = served_hour.groupby(served_hour["period_start"].dt.floor("D"))["recommendations"].sum() \
+        if not served_hour.empty else pd.Series(dtype="int64")
+    
+    def day_value(series, day):
+        return int(series.get(day, 0)) if series is not None else 0
+    
+    active_today = day_value(daily_totals["active_users"] if daily_totals is not None else None, today)
+    active_yesterday = day_value(daily_totals["active_users"] if daily_totals is not None else None, yesterday)
+    served_today = day_value(served_daily, today)
+    served_yesterday = day_value(served_daily, yesterday)
+    
     # Metrics row
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.metric(
             label="Total Songs",
-            value="125,340",
-            delta="1,234 new"
+            value=f"{len(get_catalog()):,}"
         )
     
     with col2:
         st.metric(
-            label="Active Users",
-            value="8,721",
-            delta="156 online"
+            label="Active Users Today",
+            value=f"{active_today:,}",
+            delta=f"{active_today - active_yesterday:+,} vs yesterday"
         )
     
     with col3:
         st.metric(
             label="Recommendations Today",
-            value="45,123",
-            delta="12.5%"
+            value=f"{served_today:,}",
+            delta=f"{(served_today - served_yesterday) / served_yesterday:+.1%}" if served_yesterday else None
         )
     
     with col4:
+        hourly_totals = events_hour[events_hour["genre"] == "*"] if not events_hour.empty else events_hour
+        # Only the current hour counts; the latest rollup row may be hours old when traffic stops
+        events_this_hour = hourly_totals.loc[hourly_totals["period_start"] == now.floor("h"), "events"].sum() \
+            if len(hourly_totals) else 0
         st.metric(
-            label="Model Accuracy",
-            value="92.3%",
-            delta="1.2%"
+            label="Events Last Hour",
+            value=f"{int(events_this_hour):,}"
         )
     
     st.markdown("---")
@@ -129,44 +175,49 @@ if page == "Dashboard":
     with col1:
         st.subheader("📊 Usage Analytics")
         
-        # Generate sample data
-        dates = pd.date_range(start='2024-01-01', end='2024-01-30', freq='D')
-        usage_data = pd.DataFrame({
-            'Date': dates,
-            'Recommendations': np.random.randint(1000, 5000, len(dates)),
-            'Active Users': np.random.randint(500, 2000, len(dates))
-        })
-        
-        fig = px.line(usage_data, x='Date', y=['Recommendations', 'Active Users'],
-                     title="Daily System Usage")
-        st.plotly_chart(fig, use_container_width=True)
+        month_start = today - pd.Timedelta(days=29)
+        if daily_totals is None and served_daily.empty:
+            st.info("No usage rollups recorded yet.")
+        else:
+            dates = pd.date_range(start=month_start, end=today, freq='D')
+            usage_data = pd.DataFrame({
+                'Date': dates,
+                'Recommendations': served_daily.reindex(dates, fill_value=0).to_numpy(),
+                'Active Users': (daily_totals["active_users"].reindex(dates, fill_value=0).to_numpy()
+                                 if daily_totals is not None else 0)
+            })
+            
+            fig = px.line(usage_data, x='Date', y=['Recommendations', 'Active Users'],
+                         title="Daily System Usage")
+            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("🎭 Genre Distribution")
         
-        # Sample genre data
-        genres = ['Pop', 'Rock', 'Jazz', 'Classical', 'Electronic', 'Hip-Hop', 'Country', 'R&B']
-        counts = np.random.randint(5000, 25000, len(genres))
-        
-        fig = px.pie(values=counts, names=genres, title="Music Genre Distribution")
-        st.plotly_chart(fig, use_container_width=True)
+        # Events per genre over the last 30 days
+        if events_day.empty:
+            st.info("No genre rollups recorded yet.")
+        else:
+            recent = events_day[(events_day["genre"] != "*") & (events_day["period_start"] >= month_start)]
+            genre_counts = recent.groupby("genre")["events"].sum().sort_values(ascending=False)
+            
+            fig = px.pie(values=genre_counts.to_numpy(), names=genre_counts.index, title="Music Genre Distribution")
+            st.plotly_chart(fig, use_container_width=True)
     
-    # Real-time data stream simulation
     st.subheader("🔄 Real-time Data Stream")
     
-    # Create placeholder for real-time updates
-    placeholder = st.empty()
-    
-    # Sample streaming data
-    streaming_data = pd.DataFrame({
-        'Timestamp': [datetime.now() - timedelta(minutes=i) for i in range(10, 0, -1)],
-        'Messages/sec': np.random.randint(100, 1000, 10),
-        'Errors': np.random.randint(0, 5, 10)
-    })
-    
-    fig = px.line(streaming_data, x='Timestamp', y='Messages/sec', 
-                 title="Kafka Message Throughput")
-    st.plotly_chart(fig, use_container_width=True)
+    # Average message rate per hour since the start of yesterday
+    if events_hour.empty:
+        st.info("No streaming rollups recorded yet.")
+    else:
+        throughput = hourly_totals[hourly_totals["period_start"] >= today - pd.Timedelta(days=1)]
+        streaming_data = pd.DataFrame({
+            'Timestamp': throughput["period_start"],
+            'Messages/sec': throughput["events"] / 3600,
+        })
+        fig = px.line(streaming_data, x='Timestamp', y='Messages/sec',
+                     title="Kafka Message Throughput")
+        st.plotly_chart(fig, use_container_width=True)
 
 elif page == "Recommendations":
     st.header("🎯 Music Recommendations")
@@ -198,28 +249,55 @@ elif page == "Recommendations":
         
         if st.button("🎵 Get Recommendations", type="primary"):
             with st.spinner("Generating recommendations..."):
-                # Simulate API call delay
-                time.sleep(2)
-                
-                # Generate mock recommendations
-                artists = ['Taylor Swift', 'Ed Sheeran', 'Adele', 'Bruno Mars', 'Billie Eilish', 
-                          'The Weeknd', 'Ariana Grande', 'Drake', 'Dua Lipa', 'Post Malone']
-                songs = ['Song A', 'Song B', 'Song C', 'Song D', 'Song E', 
-                        'Song F', 'Song G', 'Song H', 'Song I', 'Song J']
-                
+                # Latest streaming results for this user (processing/recommendation_sink.py)
+                per_genre = []
+                if user_id:
+                    user_recs = get_user_recommendations(user_id, num_recommendations)
+                    if not user_recs.empty:
+                        per_genre = [user_recs]
+
+                # Otherwise key lookups against the precomputed preference index (processing/build_index.py)
+                if not per_genre:
+                    try:
+                        per_genre = [
+                            get_preference_recommendations(genre=genre, num_recs=num_recommendations)
+                            for genre in (preferred_genres or [None])
+                        ]
+                    except Exception as e:
+                        st.warning(f"Preference index unavailable ({e}), showing demo data.")
+                        per_genre = []
+
+                # Interleave genres so every selected genre is represented
                 recommendations = []
-                for i in range(num_recommendations):
-                    recommendations.append({
-                        'Rank': i + 1,
-                        'Song': np.random.choice(songs) + f' {i+1}',
-                        'Artist': np.random.choice(artists),
-                        'Genre': np.random.choice(preferred_genres if preferred_genres else ['Pop']),
-                        'Confidence': round(np.random.uniform(0.7, 0.99), 3),
-                        'Duration': f"{np.random.randint(2, 5)}:{np.random.randint(10, 59):02d}"
-                    })
+                for rows in zip_longest(*[df.to_dict("records") for df in per_genre]):
+                    for row in rows:
+                        if row is not None and len(recommendations) < num_recommendations:
+                            recommendations.append({
+                                'Rank': len(recommendations) + 1,
+                                'Song': row['Title'],
+                                'Artist': row['Artist'],
+                                'Genre': row['Genre'],
+                            })
+
+                if not recommendations:
+                    # Generate mock recommendations
+                    artists = ['Taylor Swift', 'Ed Sheeran', 'Adele', 'Bruno Mars', 'Billie Eilish', 
+                              'The Weeknd', 'Ariana Grande', 'Drake', 'Dua Lipa', 'Post Malone']
+                    songs = ['Song A', 'Song B', 'Song C', 'Song D', 'Song E', 
+                            'Song F', 'Song G', 'Song H', 'Song I', 'Song J']
+
+                    for i in range(num_recommendations):
+                        recommendations.append({
+                            'Rank': i + 1,
+                            'Song': np.random.choice(songs) + f' {i+1}',
+                            'Artist': np.random.choice(artists),
+                            'Genre': np.random.choice(preferred_genres if preferred_genres else ['Pop']),
+                            'Confidence': round(np.random.uniform(0.7, 0.99), 3),
+                            'Duration': f"{np.random.randint(2, 5)}:{np.random.randint(10, 59):02d}"
+                        })
                 
                 st.session_state.recommendations = recommendations
-                st.success(f"Generated {num_recommendations} recommendations!")
+                st.success(f"Generated {len(recommendations)} recommendations!")
     
     with col2:
         st.subheader("Recommendation Stats")
@@ -290,26 +368,95 @@ elif page == "Data Management":
         )
         
         if uploaded_file is not None:
-            # Read and display sample data
-            df = pd.read_csv(uploaded_file)
+            # Only the first rows are parsed for the preview; the full file is ingested chunk by chunk
+            try:
+                preview_df = read_preview(uploaded_file)
+            except UploadSchemaError as e:
+                st.error(str(e))
+                st.stop()
             st.success(f"File uploaded: {uploaded_file.name}")
-            st.write(f"Shape: {df.shape}")
+            st.write(f"Size: {uploaded_file.size / 1024 ** 2:,.1f} MB, {len(preview_df.columns)} columns")
             
             st.subheader("Data Preview")
-            st.dataframe(df.head(10))
+            st.dataframe(preview_df)
+            
+            try:
+                check_schema(list(preview_df.columns))
+            except UploadSchemaError as e:
+                st.error(str(e))
+                st.stop()
+            
+            if st.button("📥 Ingest to Parquet"):
+                progress_bar = st.progress(0.0, text="Ingesting...")
+                
+                def report_progress(done, total, rows):
+                    progress_bar.progress(min(done / max(total, 1), 1.0), text=f"Ingested {rows:,} rows")
+                
+                summary = ingest_csv(uploaded_file, os.path.join(UPLOAD_DIR, shard_dir_name(uploaded_file.name)),
+                                     progress=report_progress)
+                st.session_state.upload_ingest = {**summary, "source": uploaded_file.name}
+                st.success(f"Ingested {summary['rows']:,} rows into {len(summary['shards'])} Parquet shards "
+                           f"in {summary['elapsed_s']:.1f}s ({summary['invalid_rows']:,} invalid rows dropped)")
+                st.caption(f"Output: {summary['output_dir']}")
             
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("🚀 Process Data"):
-                    with st.spinner("Processing data..."):
-                        time.sleep(3)
-                        st.success("Data processed and sent to Kafka!")
+                    ingested = st.session_state.get("upload_ingest")
+                    if not ingested or ingested["source"] != uploaded_file.name:
+                        st.warning("Ingest the file to Parquet first.")
+                    else:
+                        # Live throughput while the producer batches events to Kafka
+                        throughput = st.empty()
+                        
+                        def report_throughput(stats):
+                            throughput.markdown(
+                                f"**{stats['delivered']:,}** / {ingested['rows']:,} events delivered · "
+                                f"{stats['events_per_s'] or 0:,.0f} events/s · {stats['mb_per_s'] or 0:.2f} MB/s"
+                            )
+                        
+                        try:
+                            producer = make_producer()
+                            try:
+                                result = producer.publish(iter_shard_events(ingested["shards"]),
+                                                          progress=report_throughput)
+                            finally:
+                                producer.close()
+                        except Exception as e:
+                            st.error(f"Failed to publish to Kafka: {e}")
+                        else:
+                            if result["failed"]:
+                                st.warning(f"{result['failed']:,} events failed: {producer.last_error}")
+                            st.success(f"Sent {result['delivered']:,} events to '{PREFERENCE_TOPIC}' "
+                                       f"in {result['elapsed_s']:.1f}s")
             
             with col2:
                 if st.button("💾 Save to MinIO"):
-                    with st.spinner("Saving to MinIO..."):
-                        time.sleep(2)
-                        st.success("Data saved to MinIO storage!")
+                    # The raw CSV is streamed straight from the upload in parallel multipart parts
+                    upload_bar = st.progress(0.0, text="Uploading to MinIO...")
+                    
+                    def report_upload(done, total):
+                        upload_bar.progress(min(done / max(total or done, 1), 1.0),
+                                            text=f"Uploaded {done / 1024 ** 2:,.1f} MB")
+                    
+                    try:
+                        s3 = make_s3_client()
+                        ensure_bucket(s3)
+                        uploaded_file.seek(0)
+                        result = upload_stream(uploaded_file, upload_key(uploaded_file.name, f"{UPLOAD_PREFIX}/raw"),
+                                               client=s3, progress=report_upload)
+                        # Parquet shards from "Ingest to Parquet" go next to it, ready for Spark
+                        ingested = st.session_state.get("upload_ingest")
+                        if ingested and ingested["source"] == uploaded_file.name:
+                            upload_files(ingested["shards"],
+                                         f"{UPLOAD_PREFIX}/parquet/{os.path.basename(ingested['output_dir'])}",
+                                         client=s3)
+                    except Exception as e:
+                        st.error(f"Failed to save to MinIO: {e}")
+                    else:
+                        st.success(f"Saved to s3://{result['bucket']}/{result['key']} "
+                                   f"({result['parts']} parts, {result['mb_per_s'] or 0:,.1f} MB/s)")
+                        st.caption(f"SHA-256: {result['sha256']}")
     
     with tab2:
         st.subheader("📈 Dataset Overview")
@@ -372,126 +519,160 @@ elif page == "Model Training":
     
     with col1:
         st.subheader("Training Configuration")
-        
-        model_type = st.selectbox(
-            "Model Type",
-            ["Collaborative Filtering", "Content-Based", "Hybrid Model", "Deep Learning"]
-        )
+        st.caption("Implicit-feedback ALS over the user-preference history (processing/als_train.py)")
         
         col1a, col1b = st.columns(2)
         with col1a:
-            batch_size = st.number_input("Batch Size", min_value=32, max_value=2048, value=512)
-            learning_rate = st.number_input("Learning Rate", min_value=0.0001, max_value=0.1, value=0.01, format="%.4f")
+            rank = st.number_input("Rank (latent factors)", min_value=4, max_value=256, value=32)
+            reg_param = st.number_input("Regularization", min_value=0.001, max_value=1.0, value=0.05, format="%.3f")
         
         with col1b:
-            epochs = st.number_input("Epochs", min_value=1, max_value=100, value=10)
-            validation_split = st.slider("Validation Split", 0.1, 0.5, 0.2)
+            epochs = st.number_input("Epochs (ALS iterations)", min_value=1, max_value=100, value=10)
+            alpha = st.number_input("Confidence Alpha", min_value=1.0, max_value=100.0, value=10.0)
         
-        st.subheader("Advanced Settings")
-        use_gpu = st.checkbox("Use GPU Acceleration", value=True)
-        early_stopping = st.checkbox("Enable Early Stopping", value=True)
+        full_retrain = st.checkbox("Full retrain (otherwise fold in users with new events)", value=False)
         
         if st.button("🚀 Start Training", type="primary"):
-            st.session_state.model_status = "Training"
-            
-            # Training progress simulation
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for i in range(100):
-                progress_bar.progress(i + 1)
-                status_text.text(f'Training Progress: {i+1}%')
-                time.sleep(0.05)
+            command = [SPARK_SUBMIT, "processing/als_train.py", "--rank", rank, "--max-iter", epochs,
+                       "--reg-param", reg_param, "--alpha", alpha] + (["--full"] if full_retrain else [])
+            job, created = job_runner.start(
+                "als_train", command, cwd=APP_DIR,
+                params={"rank": rank, "epochs": epochs, "reg_param": reg_param, "alpha": alpha, "full": full_retrain},
+            )
+            if not created:
+                st.info(f"Training job {job['id']} is already running; showing its progress instead.")
+        
+        # The job runs in its own process; this fragment only polls the registry
+        @st.fragment(run_every=JOB_POLL_S)
+        def training_status():
+            job = job_runner.latest("als_train")
+            if job is None:
+                st.info("No training jobs yet.")
+                return
             
-            st.success("Model training completed!")
-            st.session_state.model_status = "Ready"
+            records = job_runner.progress(job["id"])
+            last = records[-1] if records else {}
+            st.markdown(f"**Job** `{job['id']}` · **{job['status']}**")
+            st.progress(min(last.get("step", 0) / max(last.get("steps", 1), 1), 1.0),
+                        text=f"Stage: {last.get('stage', 'starting')}")
+            if job["status"] in ACTIVE_STATUSES:
+                if st.button("⏹️ Cancel Training"):
+                    job_runner.cancel(job["id"])
+            elif job["status"] != "succeeded":
+                st.error(f"Training {job['status']} (exit code {job['returncode']})")
+            with st.expander("Job output"):
+                st.code(job_runner.log_tail(job["id"]) or "(no output yet)")
+        
+        training_status()
     
     with col2:
         st.subheader("Training History")
         
-        # Mock training history
-        history_data = pd.DataFrame({
-            'Epoch': list(range(1, 11)),
-            'Loss': np.random.exponential(0.5, 10)[::-1] + 0.1,
-            'Accuracy': np.random.uniform(0.7, 0.95, 10)
-        })
-        
-        fig = make_subplots(specs=[[{"secondary_y": True}]])
-        
-        fig.add_trace(
-            go.Scatter(x=history_data['Epoch'], y=history_data['Loss'], name="Loss"),
-            secondary_y=False,
-        )
-        
-        fig.add_trace(
-            go.Scatter(x=history_data['Epoch'], y=history_data['Accuracy'], name="Accuracy"),
-            secondary_y=True,
-        )
-        
-        fig.update_layout(title_text="Training Progress")
-        fig.update_xaxes(title_text="Epoch")
-        fig.update_yaxes(title_text="Loss", secondary_y=False)
-        fig.update_yaxes(title_text="Accuracy", secondary_y=True)
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
-        st.subheader("Model Performance")
-        st.metric("Current Accuracy", "92.3%", "2.1%")
-        st.metric("F1 Score", "0.89", "0.03")
-        st.metric("Training Time", "45 min", "-5 min")
+        # Final training loss of recent runs (ALS reports its loss once per run)
+        history = []
+        for job in job_runner.list("als_train")[:20]:
+            losses = [record["loss"] for record in job_runner.progress(job["id"]) if "loss" in record]
+            if job["status"] == "succeeded" and losses:
+                history.append({"Finished": pd.to_datetime(job["finished_at"], unit="s"), "Loss": losses[-1],
+                                "Duration (min)": (job["finished_at"] - job["started_at"]) / 60})
+        history_data = pd.DataFrame(history)
+        
+        if history_data.empty:
+            st.info("No completed full training runs yet.")
+        else:
+            history_data = history_data.sort_values("Finished")
+            fig = make_subplots(specs=[[{"secondary_y": True}]])
+            
+            fig.add_trace(
+                go.Scatter(x=history_data['Finished'], y=history_data['Loss'], name="Loss"),
+                secondary_y=False,
+            )
+            
+            fig.add_trace(
+                go.Scatter(x=history_data['Finished'], y=history_data['Duration (min)'], name="Duration"),
+                secondary_y=True,
+            )
+            
+            fig.update_layout(title_text="Training Progress")
+            fig.update_xaxes(title_text="Run")
+            fig.update_yaxes(title_text="Loss", secondary_y=False)
+            fig.update_yaxes(title_text="Duration (min)", secondary_y=True)
+            
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.subheader("Model Performance")
+            latest = history_data.iloc[-1]
+            previous = history_data.iloc[-2] if len(history_data) > 1 else None
+            st.metric("Training Loss", f"{latest['Loss']:.4f}",
+                      f"{latest['Loss'] - previous['Loss']:+.4f}" if previous is not None else None,
+                      delta_color="inverse")
+            st.metric("Training Time", f"{latest['Duration (min)']:.1f} min",
+                      f"{latest['Duration (min)'] - previous['Duration (min)']:+.1f} min"
+                      if previous is not None else None, delta_color="inverse")
 
 elif page == "System Monitoring":
     st.header("🔍 System Monitoring")
-    
-    # Real-time metrics
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.subheader("Kafka Metrics")
-        st.metric("Messages/sec", "1,234", "56")
-        st.metric("Consumer Lag", "12ms", "-2ms")
-        
-    with col2:
-        st.subheader("Spark Metrics")
-        st.metric("CPU Usage", "68%", "5%")
-        st.metric("Memory Usage", "4.2GB", "0.3GB")
-        
-    with col3:
-        st.subheader("System Health")
-        st.metric("Uptime", "99.8%")
-        st.metric("Error Rate", "0.02%", "-0.01%")
-    
-    # System logs
-    st.subheader("📋 Recent Logs")
-    
-    logs = [
-        {"timestamp": "2024-01-15 10:30:25", "level": "INFO", "service": "Kafka", "message": "New message batch processed"},
-        {"timestamp": "2024-01-15 10:30:20", "level": "INFO", "service": "Spark", "message": "Model training completed"},
-        {"timestamp": "2024-01-15 10:30:15", "level": "WARN", "service": "MinIO", "message": "Storage usage above 80%"},
-        {"timestamp": "2024-01-15 10:30:10", "level": "INFO", "service": "API", "message": "Recommendation request processed"}
-    ]
-    
-    for log in logs:
-        level_color = {"INFO": "🟢", "WARN": "🟡", "ERROR": "🔴"}.get(log["level"], "⚪")
-        st.text(f"{level_color} {log['timestamp']} [{log['service']}] {log['message']}")
-    
-    # Performance charts
-    st.subheader("📊 Performance Metrics")
-    
-    # Generate sample performance data
-    timestamps = pd.date_range(start=datetime.now()-timedelta(hours=1), 
-                              end=datetime.now(), freq='1min')
-    perf_data = pd.DataFrame({
-        'Timestamp': timestamps,
-        'CPU_Usage': np.random.uniform(50, 90, len(timestamps)),
-        'Memory_Usage': np.random.uniform(40, 80, len(timestamps)),
-        'Network_IO': np.random.uniform(10, 50, len(timestamps))
-    })
-    
-    fig = px.line(perf_data, x='Timestamp', 
-                 y=['CPU_Usage', 'Memory_Usage', 'Network_IO'],
-                 title="System Performance (Last Hour)")
-    st.plotly_chart(fig, use_container_width=True)
+
+    # Per-batch metrics recorded by the StreamingQueryListener (processing/metrics_store.py)
+    window_minutes = st.select_slider("Time window", options=[15, 60, 360, 1440], value=60,
+                                      format_func=lambda m: f"{m // 60}h" if m >= 60 else f"{m}min")
+    metrics = get_stream_metrics(since_seconds=window_minutes * 60)
+
+    if metrics.empty:
+        st.info("No streaming metrics recorded yet. Start processing/spark_train.py to populate this page.")
+    else:
+        latest = metrics.iloc[-1]
+        previous = metrics.iloc[-2] if len(metrics) > 1 else latest
+
+        def delta(column, fmt="{:,.0f}"):
+            if pd.isna(latest[column]) or pd.isna(previous[column]):
+                return None
+            return fmt.format(latest[column] - previous[column])
+
+        def value(column, fmt="{:,.0f}"):
+            return "n/a" if pd.isna(latest[column]) else fmt.format(latest[column])
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            st.subheader("Kafka Metrics")
+            st.metric("Messages/sec", value("input_rows_per_s", "{:,.1f}"), delta("input_rows_per_s", "{:,.1f}"))
+            st.metric("Consumer Lag (offsets)", value("kafka_lag"), delta("kafka_lag"), delta_color="inverse")
+
+        with col2:
+            st.subheader("Spark Metrics")
+            st.metric("Batch Duration", value("batch_duration_ms", "{:,.0f} ms"),
+                      delta("batch_duration_ms", "{:,.0f} ms"), delta_color="inverse")
+            st.metric("Processed Rows/sec", value("processed_rows_per_s", "{:,.1f}"),
+                      delta("processed_rows_per_s", "{:,.1f}"))
+
+        with col3:
+            st.subheader("State Store")
+            st.metric("Profiles in State", value("state_rows"), delta("state_rows"))
+            st.metric("State Memory", "n/a" if pd.isna(latest["state_memory_bytes"])
+                      else f"{latest['state_memory_bytes'] / 1024 ** 2:,.1f} MB")
+
+        # Recent batches
+        st.subheader("📋 Recent Batches")
+        for _, row in metrics.tail(10).iloc[::-1].iterrows():
+            st.text(f"🟢 {row['Timestamp']:%Y-%m-%d %H:%M:%S} [{row['query_name']}] batch {row['batch_id']}: "
+                    f"{row['num_input_rows']} rows in {row['batch_duration_ms']} ms")
+
+        # Performance charts
+        st.subheader("📊 Performance Metrics")
+
+        fig = px.line(metrics, x='Timestamp', y=['input_rows_per_s', 'processed_rows_per_s'],
+                      title="Streaming Throughput (rows/sec)")
+        st.plotly_chart(fig, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = px.line(metrics, x='Timestamp', y='batch_duration_ms', title="Batch Duration (ms)")
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            fig = px.line(metrics, x='Timestamp', y=['kafka_lag', 'state_rows'],
+                          title="Kafka Lag & State Size")
+            st.plotly_chart(fig, use_container_width=True)
 
 # Footer
 st.markdown("---")
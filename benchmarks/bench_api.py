@@ -0,0 +1,102 @@
+"""
+Benchmark layanan rekomendasi web/api.py dengan klien aiohttp konkuren.
+
+Mengukur latensi p50/p99 per request dan throughput (req/s) untuk
+/recommend dan /catalog/search, lalu mencatatnya ke
+benchmarks/results/api.jsonl. Dengan --spawn, server dijalankan sebagai
+subprocess selama benchmark.
+
+Contoh:
+    python benchmarks/bench_api.py --spawn --requests 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from results import latency_summary, record_result
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WEB_DIR = os.path.join(HERE, "..", "web")
+
+QUERIES = ("Bohemian Rhapsody", "Shape of You", "montero", "hip hop", "unknown song")
+
+
+async def wait_ready(session, base_url, timeout_s=30):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{base_url}/health") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"API at {base_url} not ready after {timeout_s}s")
+
+
+async def run_case(session, url_for, total, concurrency):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                async with session.get(url_for(i)) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {**latency_summary(latencies), "errors": errors, "req_per_s": round(total / elapsed, 1)}
+
+
+async def run(args):
+    base_url = args.url.rstrip("/")
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await wait_ready(session, base_url)
+        cases = {
+            "recommend": lambda i: f"{base_url}/recommend?song={QUERIES[i % len(QUERIES)]}&n={args.num_recs}",
+            "catalog_search": lambda i: f"{base_url}/catalog/search?q={QUERIES[i % len(QUERIES)]}&limit=50",
+        }
+        for name, url_for in cases.items():
+            summary = await run_case(session, url_for, args.requests, args.concurrency)
+            record_result("api", {"endpoint": name, "concurrency": args.concurrency, **summary})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation API")
+    parser.add_argument("--url", default=os.environ.get("RECOMMENDER_API_URL", "http://localhost:8080"))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--num-recs", type=int, default=10)
+    parser.add_argument("--spawn", action="store_true", help="Jalankan web/api.py sebagai subprocess")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        port = args.url.rstrip("/").rsplit(":", 1)[-1]
+        server = subprocess.Popen([sys.executable, "api.py", "--host", "127.0.0.1", "--port", port], cwd=WEB_DIR)
+    try:
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
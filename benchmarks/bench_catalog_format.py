@@ -0,0 +1,83 @@
+"""
+Benchmark: katalog CSV (inferSchema) vs Parquet terpartisi.
+
+Mengukur untuk setiap format:
+  - load_s    : waktu cold-start membaca katalog sampai ter-materialisasi (count)
+  - filter_ms : latensi filter (genre, artist_name, language) seperti di
+                generate_recommendation, median dan p95 dari beberapa kunci sampel
+
+Hasil ditambahkan ke benchmarks/results/catalog_format.jsonl.
+
+Jalankan (setelah processing/convert_catalog.py):
+    spark-submit benchmarks/bench_catalog_format.py [--keys 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "processing"))
+
+from pyspark.sql.functions import col  # noqa: E402
+
+from results import percentile, record_result  # noqa: E402
+from spark_utils import CATALOG_CSV_PATH, PREFERENCE_KEYS, SONG_COLUMNS, build_spark, load_songs  # noqa: E402
+
+
+def read_csv_infer(spark):
+    """Jalur lama: CSV dengan inferSchema (dua kali baca)."""
+    return spark.read.csv(CATALOG_CSV_PATH, header=True, inferSchema=True).select(*SONG_COLUMNS)
+
+
+READERS = {
+    "csv_infer": read_csv_infer,
+    "csv_schema": lambda spark: load_songs(spark, "csv"),
+    "parquet": lambda spark: load_songs(spark, "parquet"),
+}
+
+
+def bench_format(spark, name, keys):
+    spark.catalog.clearCache()
+    started = time.perf_counter()
+    songs = READERS[name](spark)
+    rows = songs.count()
+    load_s = time.perf_counter() - started
+
+    latencies = []
+    for genre, artist, language in keys:
+        started = time.perf_counter()
+        songs.filter(
+            (col("genre") == genre) &
+            (col("artist_name") == artist) &
+            (col("language") == language)
+        ).limit(5).collect()
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "format": name,
+        "rows": rows,
+        "load_s": round(load_s, 3),
+        "filter_ms_p50": round(statistics.median(latencies), 1),
+        "filter_ms_p95": round(percentile(latencies, 0.95), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare CSV and Parquet catalog reads")
+    parser.add_argument("--keys", type=int, default=20, help="Jumlah kunci filter sampel")
+    parser.add_argument("--formats", nargs="+", default=list(READERS), choices=list(READERS))
+    args = parser.parse_args()
+
+    spark = build_spark("CatalogFormatBenchmark")
+    keys = [
+        tuple(row) for row in load_songs(spark, "parquet")
+        .select(*PREFERENCE_KEYS).dropna().distinct().limit(args.keys).collect()
+    ]
+
+    for name in args.formats:
+        record_result("catalog_format", bench_format(spark, name, keys))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark engine embedded (processing/embedded.py): DuckDB vs Polars.
+
+Setiap engine dijalankan di subprocess terpisah agar waktu import dan RSS
+tidak saling memengaruhi. Katalog dan event diambil dari file synthetic.py
+(dibuat di direktori sementara jika --catalog/--events tidak diberikan).
+
+Metrik per engine (benchmarks/results/engines.jsonl):
+  - import_s            : waktu import modul engine (pengganti startup SparkSession)
+  - load_s              : membaca katalog dan membangun index top-N
+  - events_per_s        : total event / durasi run() (tanpa sink)
+  - batch_p50_ms/p99_ms : latensi recommend per batch
+  - peak_rss_mb         : RSS maksimum subprocess
+  - digest              : sha256 semua baris rekomendasi; harus sama antar engine
+
+Contoh:
+    python benchmarks/bench_engines.py --rows 1m --events-rows 200000 [--ranker scored]
+"""
+import argparse
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "processing"))
+
+from results import latency_summary, record_result  # noqa: E402
+from synthetic import CATALOG_SIZES, write_catalog, write_events  # noqa: E402
+
+
+def run_one(engine_name, catalog, events, ranker, batch_rows, threads):
+    """Dijalankan di subprocess: mengukur satu engine dan mencetak hasil sebagai JSON."""
+    started = time.perf_counter()
+    import embedded
+
+    engine = embedded.make_engine(engine_name, ranker=ranker, threads=threads)
+    import_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    songs = engine.load_catalog(catalog)
+    load_s = time.perf_counter() - started
+
+    digest = hashlib.sha256()
+
+    class DigestSink:
+        """Sink tiruan: hanya menghitung digest baris, tanpa I/O SQLite."""
+
+        def is_applied(self, batch_id):
+            return False
+
+        def write_batch(self, batch_id, rows):
+            for row in rows:
+                digest.update(repr(tuple(row)).encode())
+
+    stats = embedded.run(engine, embedded.file_events([events], batch_rows), DigestSink())
+    latency = latency_summary(stats["batch_ms"])
+    print(json.dumps({
+        "catalog_rows": songs,
+        "import_s": round(import_s, 3),
+        "load_s": round(load_s, 3),
+        "events": stats["events"],
+        "batches": stats["batches"],
+        "recommendations": stats["recommendations"],
+        "events_per_s": stats["events_per_s"],
+        "batch_p50_ms": latency["p50_ms"],
+        "batch_p99_ms": latency["p99_ms"],
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "digest": digest.hexdigest(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embedded DuckDB/Polars engines")
+    parser.add_argument("--rows", default="1m", help="Jumlah baris katalog atau salah satu dari: 10k, 1m, 10m")
+    parser.add_argument("--events-rows", type=int, default=200_000)
+    parser.add_argument("--catalog", help="Parquet katalog yang sudah ada (default: dibuat dengan --rows)")
+    parser.add_argument("--events", help="File event yang sudah ada (default: dibuat dengan --events-rows)")
+    parser.add_argument("--engines", nargs="+", default=["duckdb", "polars"])
+    parser.add_argument("--ranker", default="exact", choices=("exact", "scored"))
+    parser.add_argument("--batch-rows", type=int, default=10_000)
+    parser.add_argument("--threads", type=int)
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        run_one(args.run_one, args.catalog, args.events, args.ranker, args.batch_rows, args.threads)
+        return
+
+    rows = CATALOG_SIZES.get(args.rows) or int(args.rows)
+    workdir = tempfile.mkdtemp(prefix="bench_engines_")
+    catalog = args.catalog or os.path.join(workdir, "catalog.parquet")
+    events = args.events or os.path.join(workdir, "events.jsonl")
+    if not args.catalog:
+        write_catalog(catalog, rows)
+    if not args.events:
+        write_events(events, args.events_rows, rows)
+
+    engines = {}
+    for name in args.engines:
+        command = [sys.executable, os.path.abspath(__file__), "--run-one", name, "--catalog", catalog,
+                   "--events", events, "--ranker", args.ranker, "--batch-rows", str(args.batch_rows)]
+        if args.threads:
+            command += ["--threads", str(args.threads)]
+        output = subprocess.check_output(command, text=True)
+        engines[name] = json.loads(output.strip().splitlines()[-1])
+
+    digests = {result.pop("digest") for result in engines.values()}
+    record_result("engines", {
+        "catalog": os.path.basename(catalog),
+        "ranker": args.ranker,
+        "batch_rows": args.batch_rows,
+        "threads": args.threads,
+        "cpus": os.cpu_count(),
+        "identical_output": len(digests) == 1,
+        **engines,
+    })
+
+
+if __name__ == "__main__":
+    main()
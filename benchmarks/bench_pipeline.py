@@ -0,0 +1,171 @@
+"""
+Benchmark pipeline streaming: RecommendationJob.generate_recommendation pada local[N].
+
+Sumber Kafka diganti rate source: setiap baris rate diubah menjadi event
+user-preference dengan ekspresi SQL yang deterministik (lihat synthetic.py),
+sehingga event selalu cocok dengan katalog sintetis. Katalog dibaca dari
+Parquet lokal hasil synthetic.py dan di-cache seperti di spark_train.py.
+
+Metrik yang dicatat (benchmarks/results/pipeline.jsonl):
+  - events_per_s        : total baris input / total durasi batch
+  - batch_p50_ms/p99_ms : latensi per micro-batch (batch pemanasan diabaikan)
+  - peak_driver_jvm_mb  : heap JVM driver terbesar yang teramati
+  - peak_driver_py_mb   : RSS maksimum proses Python driver
+
+--ranker scored mengukur ranker skor berbobot (processing/scoring.py) alih-alih
+join exact; --result-cache-size mengaktifkan cache hasil lintas batch.
+
+Contoh:
+    python benchmarks/synthetic.py catalog --rows 1m --out data/bench/catalog_1m.parquet
+    python benchmarks/bench_pipeline.py --catalog data/bench/catalog_1m.parquet --cores 4 \
+        --rows-per-second 20000 --duration 120
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "processing"))
+
+from pyspark.sql.functions import array, col, concat, element_at, expr, floor, lit, pmod, xxhash64  # noqa: E402
+from pyspark.sql.functions import pow as spark_pow  # noqa: E402
+from pyspark.sql.streaming import StreamingQueryListener  # noqa: E402
+
+from results import latency_summary, record_result  # noqa: E402
+from synthetic import GENRES, LANGUAGES, num_artists  # noqa: E402
+from recommendation_sink import RecommendationSink  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from spark_train import RANKERS, RecommendationJob, add_executor_files, aggregate_profiles  # noqa: E402
+from spark_utils import SONG_COLUMNS, build_spark  # noqa: E402
+
+WARMUP_BATCHES = 2
+
+
+class ProgressCollector(StreamingQueryListener):
+    """Mengumpulkan durasi/jumlah baris per batch dan memori JVM driver."""
+
+    def __init__(self, spark):
+        self.runtime = spark._jvm.java.lang.Runtime.getRuntime()
+        self.batches = []
+        self.peak_jvm_bytes = 0
+
+    def onQueryStarted(self, event):
+        pass
+
+    def onQueryProgress(self, event):
+        progress = event.progress
+        if progress.numInputRows > 0:
+            self.batches.append((progress.batchId, progress.numInputRows, progress.batchDuration))
+        used = self.runtime.totalMemory() - self.runtime.freeMemory()
+        self.peak_jvm_bytes = max(self.peak_jvm_bytes, used)
+
+    def onQueryIdle(self, event):
+        pass
+
+    def onQueryTerminated(self, event):
+        pass
+
+
+def rate_events(spark, rows_per_second, catalog_rows, num_users, partitions):
+    """Rate source -> event user-preference yang cocok dengan katalog sintetis."""
+    artists = num_artists(catalog_rows)
+    # u di [0, 1); pangkat 3 membuat artist dengan indeks kecil jauh lebih sering muncul
+    u = pmod(xxhash64(col("value")), lit(1_000_000)) / lit(1_000_000.0)
+    artist_idx = floor(spark_pow(u, 3) * artists).cast("long")
+
+    return spark.readStream.format("rate") \
+        .option("rowsPerSecond", rows_per_second) \
+        .option("numPartitions", partitions) \
+        .load() \
+        .withColumn("artist_idx", artist_idx) \
+        .select(
+            concat(lit("user_"), pmod(xxhash64(col("value"), lit(1)), lit(num_users)).cast("string")).alias("user_id"),
+            element_at(array(*[lit(g) for g in GENRES]), (pmod(col("artist_idx"), lit(len(GENRES))) + 1).cast("int"))
+            .alias("genre"),
+            concat(lit("Artist "), col("artist_idx").cast("string")).alias("artist"),
+            element_at(array(*[lit(language) for language in LANGUAGES]),
+                       (pmod(floor(col("artist_idx") / len(GENRES)), lit(len(LANGUAGES))) + 1).cast("int"))
+            .alias("language"),
+            expr("CAST(timestamp AS STRING)").alias("timestamp"),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming recommendation pipeline")
+    parser.add_argument("--catalog", required=True, help="Parquet katalog dari synthetic.py")
+    parser.add_argument("--cores", type=int, default=4, help="N untuk local[N]")
+    parser.add_argument("--rows-per-second", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--duration", type=int, default=60, help="Lama benchmark dalam detik")
+    parser.add_argument("--trigger-interval", default="2 seconds")
+    parser.add_argument("--with-profile", action="store_true",
+                        help="Sertakan tahap profil stateful (applyInPandasWithState)")
+    parser.add_argument("--driver-memory", default="4g")
+    parser.add_argument("--ranker", default="exact", choices=RANKERS)
+    parser.add_argument("--result-cache-size", type=int, default=0, help="0 = tanpa cache hasil")
+    args = parser.parse_args()
+
+    spark = build_spark("PipelineBenchmark", {
+        "spark.master": f"local[{args.cores}]",
+        "spark.driver.memory": args.driver_memory,
+        "spark.sql.shuffle.partitions": str(args.cores * 2),
+        "spark.sql.adaptive.enabled": "true",
+        "spark.sql.execution.arrow.pyspark.enabled": "true",
+    })
+    collector = ProgressCollector(spark)
+    spark.streams.addListener(collector)
+
+    song_df = spark.read.parquet(args.catalog).select(*SONG_COLUMNS).cache()
+    catalog_rows = song_df.count()
+
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    sink = RecommendationSink(os.path.join(workdir, "recommendations.db"), stream="bench")
+    result_cache = ResultCache(args.result_cache_size) if args.result_cache_size > 0 else None
+    job = RecommendationJob(spark, sink, song_df=song_df, version="catalog", result_cache=result_cache,
+                            ranker=args.ranker)
+    add_executor_files(spark, args.ranker)
+
+    events = rate_events(spark, args.rows_per_second, catalog_rows, args.users, args.cores)
+    if args.with_profile:
+        events = aggregate_profiles(events, "1 minute")
+        output_mode = "update"
+    else:
+        output_mode = "append"
+
+    query = events.writeStream \
+        .foreachBatch(job.generate_recommendation) \
+        .outputMode(output_mode) \
+        .trigger(processingTime=args.trigger_interval) \
+        .option("checkpointLocation", os.path.join(workdir, "checkpoint")) \
+        .start()
+    query.awaitTermination(args.duration)
+    query.stop()
+    time.sleep(1)  # beri waktu listener menerima progress terakhir
+
+    measured = collector.batches[WARMUP_BATCHES:]
+    total_rows = sum(rows for _, rows, _ in measured)
+    total_ms = sum(duration for _, _, duration in measured)
+    latency = latency_summary([duration for _, _, duration in measured])
+
+    record_result("pipeline", {
+        "catalog": os.path.basename(args.catalog),
+        "catalog_rows": catalog_rows,
+        "cores": args.cores,
+        "rows_per_second": args.rows_per_second,
+        "with_profile": args.with_profile,
+        "ranker": args.ranker,
+        "result_cache_size": args.result_cache_size,
+        "batches": latency["count"],
+        "events_per_s": round(total_rows / (total_ms / 1000.0), 1) if total_ms else None,
+        "batch_p50_ms": latency["p50_ms"],
+        "batch_p99_ms": latency["p99_ms"],
+        "peak_driver_jvm_mb": round(collector.peak_jvm_bytes / 1024 ** 2, 1),
+        "peak_driver_py_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark ranker skor berbobot (processing/scoring.py) terhadap loop Python per baris.
+
+Kedua implementasi menghitung skor SCORE_WEIGHTS untuk setiap lagu di katalog
+sintetis dan memilih top-K per kunci preferensi:
+  - loop       : iterasi Python per baris + heapq (baseline)
+  - vectorized : score_partition (kode kategori numpy + argpartition), satu proses
+  - spark      : score_keys (mapInPandas + applyInPandas) di local[N], dengan --spark
+
+Metrik per implementasi: scores_per_s (baris katalog x kunci per detik) dan
+ms_per_key. Hasil top-K loop dan vectorized dibandingkan untuk kunci yang sama.
+Hasil ditambahkan ke benchmarks/results/ranker.jsonl.
+
+Contoh:
+    python benchmarks/bench_ranker.py --rows 1m --keys 500 [--spark --cores 4]
+"""
+import argparse
+import heapq
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "processing"))
+
+from results import record_result  # noqa: E402
+from synthetic import CATALOG_SIZES, artist_attributes, catalog_chunks, num_artists  # noqa: E402
+from preferences import PREFERENCE_KEYS, SCORE_WEIGHTS, WILDCARD  # noqa: E402
+from scoring import score_partition  # noqa: E402
+
+SCORING_COLUMNS = ("track_id", "track_name", *PREFERENCE_KEYS)
+
+
+def sample_keys(catalog_rows, count, seed=11):
+    """Kunci preferensi seperti event synthetic.py, sebagian dengan field WILDCARD (kunci parsial)."""
+    rng = np.random.default_rng(seed)
+    artist_idx = (rng.zipf(1.3, count) - 1) % num_artists(catalog_rows)
+    names, genres, languages = artist_attributes(artist_idx)
+    keys = []
+    for i, key in enumerate(zip(genres, names, languages)):
+        # Setiap kunci ketiga hanya mengisi sebagian field
+        keys.append(tuple(WILDCARD if i % 3 == 2 and j == i % len(key) else value for j, value in enumerate(key)))
+    return list(dict.fromkeys(keys))
+
+
+def score_loop(songs, keys, top_k, weights=SCORE_WEIGHTS):
+    """Baseline: skor dihitung per baris dengan Python, top-K dengan heap."""
+    columns = [songs[name].tolist() for name in SCORING_COLUMNS]
+    field_weights = [weights[key] for key in PREFERENCE_KEYS]
+    result = {}
+    for key in keys:
+        heap = []
+        for track_id, track_name, *values in zip(*columns):
+            score = 0.0
+            for value, wanted, weight in zip(values, key, field_weights):
+                if wanted != WILDCARD and value == wanted:
+                    score += weight
+            if score <= 0:
+                continue
+            # Heap min berisi K terbaik; urutan sama dengan score_partition
+            item = (score, _Reverse(track_name or ""), _Reverse(track_id))
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+        result[key] = [item[2].value for item in sorted(heap, reverse=True)]
+    return result
+
+
+class _Reverse:
+    """Membalik urutan string di dalam tuple heap (nama lebih kecil = lebih baik)."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def timed(fn):
+    started = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - started
+
+
+def throughput(rows, keys, elapsed):
+    return {
+        "keys": keys,
+        "elapsed_s": round(elapsed, 3),
+        "scores_per_s": round(rows * keys / elapsed) if elapsed else None,
+        "ms_per_key": round(elapsed * 1000 / keys, 3) if keys else None,
+    }
+
+
+def bench_spark(songs, keys, top_k, cores):
+    from spark_train import add_executor_files
+    from spark_utils import build_spark
+    from scoring import score_keys
+
+    spark = build_spark("RankerBenchmark", {
+        "spark.master": f"local[{cores}]",
+        "spark.sql.shuffle.partitions": str(cores * 2),
+        "spark.sql.execution.arrow.pyspark.enabled": "true",
+    })
+    add_executor_files(spark, "scored")
+    song_df = spark.createDataFrame(songs).repartition(cores * 2).cache()
+    song_df.count()
+    # Pemanasan: worker Python dan modul scoring dimuat sekali
+    score_keys(spark, song_df, keys[:1], top_k).collect()
+    _, elapsed = timed(lambda: score_keys(spark, song_df, keys, top_k).collect())
+    spark.stop()
+    return throughput(len(songs), len(keys), elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the weighted-scoring ranker")
+    parser.add_argument("--rows", default="1m", help="Jumlah baris katalog atau salah satu dari: 10k, 1m, 10m")
+    parser.add_argument("--keys", type=int, default=500,
+                        help="Jumlah kunci sampel untuk ranker vectorized/spark (duplikat dibuang)")
+    parser.add_argument("--loop-keys", type=int, default=5, help="Jumlah kunci untuk baseline loop (lambat)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--spark", action="store_true", help="Ukur juga score_keys di local[N]")
+    parser.add_argument("--cores", type=int, default=4)
+    args = parser.parse_args()
+
+    rows = CATALOG_SIZES.get(args.rows) or int(args.rows)
+    songs = pd.concat([chunk[list(SCORING_COLUMNS)] for chunk in catalog_chunks(rows)], ignore_index=True)
+    keys = sample_keys(rows, args.keys)
+
+    loop_keys = keys[:args.loop_keys]
+    expected, loop_s = timed(lambda: score_loop(songs, loop_keys, args.top_k))
+    scored, vector_s = timed(lambda: score_partition(songs, keys, args.top_k))
+
+    by_key = {key: list(group["track_id"]) for key, group in scored.groupby(list(PREFERENCE_KEYS), sort=False)}
+    mismatches = sum(by_key.get(key, []) != tracks for key, tracks in expected.items())
+
+    result = {
+        "catalog_rows": rows,
+        "top_k": args.top_k,
+        "loop": throughput(rows, len(loop_keys), loop_s),
+        "vectorized": throughput(rows, len(keys), vector_s),
+        "mismatched_keys": mismatches,
+    }
+    result["speedup"] = round(result["vectorized"]["scores_per_s"] / result["loop"]["scores_per_s"], 1)
+    if args.spark:
+        result["spark"] = {"cores": args.cores, **bench_spark(songs, keys, args.top_k, args.cores)}
+    record_result("ranker", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark tabel tetangga content-based (processing/content_similarity.py).
+
+Katalog synthetic.py diubah menjadi CatalogFeatures (tanpa Spark), lalu untuk
+sampel --queries lagu diukur:
+  - exact : neighbour_partition (cosine exact per blok); tracks_per_s satu
+            proses, dan perkiraan core-detik untuk seluruh katalog
+  - lsh   : BucketedRandomProjectionLSH yang dulu dipakai, diemulasikan dengan
+            numpy (vektor proyeksi acak satuan di ruang fitur lengkap, hash =
+            floor(proyeksi / bucket_length), kandidat = lagu dengan hash sama di
+            salah satu tabel). Metrik: bucket per tabel, candidates_per_track
+            (pasangan yang harus dihitung approxSimilarityJoin per lagu) dan
+            recall top-K exact di antara kandidat.
+
+projection_std menunjukkan sebaran proyeksi (~1/sqrt(dimensi)); bucket_length
+jauh di atas nilai ini menaruh hampir semua lagu di bucket yang sama.
+Hasil ditambahkan ke benchmarks/results/similarity.jsonl.
+
+Contoh:
+    python benchmarks/bench_similarity.py --rows 100000 --queries 500 [--bucket-lengths 1.0 0.01]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "processing"))
+
+from results import record_result  # noqa: E402
+from synthetic import CATALOG_SIZES, NUMERIC_FEATURES, catalog_chunks  # noqa: E402
+from content_similarity import BLOCK_CELLS, CatalogFeatures, neighbour_partition  # noqa: E402
+
+# Kolom numerik katalog sintetis yang dipakai numeric_columns (tanpa year dan duration_ms)
+NUMERIC_COLUMNS = ("popularity", "tempo", "loudness", *NUMERIC_FEATURES)
+
+
+def lsh_hashes(features, bucket_length, num_hash_tables, seed=1):
+    """Hash BucketedRandomProjectionLSH per tabel (lagu x tabel) beserta std proyeksi."""
+    rng = np.random.default_rng(seed)
+    num_artists = features.artist_codes.max() + 1
+    dense = rng.standard_normal((features.dense.shape[1], num_hash_tables))
+    artist = rng.standard_normal((num_artists, num_hash_tables))
+    # Vektor acak satuan di ruang fitur lengkap (blok dense + one-hot artist)
+    norm = np.sqrt((dense ** 2).sum(axis=0) + (artist ** 2).sum(axis=0))
+    projections = (features.dense @ dense + features.artist_scale[:, None] * artist[features.artist_codes]) / norm
+    return np.floor(projections / bucket_length).astype(np.int64), float(projections.std(axis=0).mean())
+
+
+def bench_lsh(features, queries, exact, bucket_length, num_hash_tables):
+    hashes, projection_std = lsh_hashes(features, bucket_length, num_hash_tables)
+    candidates, found, total = [], 0, 0
+    for query in queries:
+        shares_bucket = (hashes == hashes[query]).any(axis=1)
+        shares_bucket[query] = False
+        candidates.append(int(shares_bucket.sum()))
+        neighbours = exact.get(query, [])
+        found += int(shares_bucket[neighbours].sum())
+        total += len(neighbours)
+    return {
+        "bucket_length": bucket_length,
+        "projection_std": round(projection_std, 6),
+        "buckets_per_table": round(float(np.mean([len(np.unique(column)) for column in hashes.T])), 1),
+        "candidates_per_track": round(float(np.mean(candidates)), 1),
+        "candidate_fraction": round(float(np.mean(candidates)) / (len(features) - 1), 4),
+        "recall": round(found / total, 4) if total else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the content similarity neighbour search")
+    parser.add_argument("--rows", default="10k", help="Jumlah baris katalog atau salah satu dari: 10k, 1m, 10m")
+    parser.add_argument("--queries", type=int, default=500, help="Jumlah lagu sampel yang dicari tetangganya")
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--min-similarity", type=float, default=0.5)
+    parser.add_argument("--block-cells", type=int, default=BLOCK_CELLS)
+    parser.add_argument("--bucket-lengths", type=float, nargs="*", default=[1.0],
+                        help="bucketLength LSH pembanding (default: nilai lama 1.0); "
+                             "1/sqrt(dimensi) selalu ditambahkan")
+    parser.add_argument("--num-hash-tables", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = CATALOG_SIZES.get(args.rows) or int(args.rows)
+    songs = pd.concat(catalog_chunks(rows), ignore_index=True)
+    started = time.perf_counter()
+    features = CatalogFeatures(songs, NUMERIC_COLUMNS)
+    features_s = time.perf_counter() - started
+    queries = np.random.default_rng(5).choice(len(features), min(args.queries, len(features)), replace=False)
+
+    started = time.perf_counter()
+    neighbours = neighbour_partition(features, queries, args.top_k, args.min_similarity, args.block_cells)
+    exact_s = time.perf_counter() - started
+    row_of = {track_id: row for row, track_id in enumerate(features.track_ids)}
+    exact = {row_of[track_id]: [row_of[neighbor] for neighbor in group["neighbor_id"]]
+             for track_id, group in neighbours.groupby("track_id")}
+
+    dimensions = features.dense.shape[1] + features.artist_codes.max() + 1
+    bucket_lengths = list(args.bucket_lengths) + [round(1 / np.sqrt(dimensions), 6)]
+    record_result("similarity", {
+        "catalog_rows": len(features),
+        "dimensions": int(dimensions),
+        "queries": len(queries),
+        "top_k": args.top_k,
+        "min_similarity": args.min_similarity,
+        "features_s": round(features_s, 3),
+        "exact": {
+            "pairs_per_track": len(features) - 1,
+            "tracks_per_s": round(len(queries) / exact_s, 1),
+            "full_catalog_core_s": round(len(features) * exact_s / len(queries), 1),
+            "neighbours_per_track": round(len(neighbours) / len(queries), 2),
+        },
+        "lsh": [bench_lsh(features, queries, exact, bucket_length, args.num_hash_tables)
+                for bucket_length in bucket_lengths],
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark fungsi rekomendasi/katalog di web/utils.py (tanpa Streamlit).
+
+Mengukur latensi p50/p99 per panggilan untuk beberapa input judul lagu dan
+mencatatnya ke benchmarks/results/web.jsonl. Dengan --catalog, pencarian
+katalog (index trigram) juga diukur pada katalog sintetis dari synthetic.py,
+termasuk waktu membangun index.
+
+Contoh:
+    python benchmarks/bench_web.py --calls 2000
+    python benchmarks/bench_web.py --catalog data/bench/catalog_1m.parquet
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "web"))
+
+from results import latency_summary, record_result  # noqa: E402
+import utils  # noqa: E402
+
+QUERIES = ("Bohemian Rhapsody", "Shape of You", "montero", "hip hop", "unknown song")
+
+# Query untuk katalog sintetis: awalan, angka selektif, salah ketik dan kata umum
+CATALOG_QUERIES = ("track 12345", "trak 98765", "artist 42", "artst 7 trck 55", "123456", "track")
+
+
+def time_calls(fn, calls):
+    latencies = []
+    for i in range(calls):
+        started = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latency_summary(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark web/utils recommendation helpers")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--num-recs", type=int, default=10)
+    parser.add_argument("--catalog", help="Parquet katalog dari synthetic.py untuk benchmark pencarian")
+    args = parser.parse_args()
+
+    cases = {
+        "get_recommendations_dummy": lambda i: utils.get_recommendations_dummy(
+            QUERIES[i % len(QUERIES)], args.num_recs),
+        "get_music_info_dummy": lambda i: utils.get_music_info_dummy(limit=100),
+        "search_catalog": lambda i: utils.search_catalog(QUERIES[i % len(QUERIES)].split()[0], limit=50),
+    }
+    for name, fn in cases.items():
+        summary = time_calls(fn, args.calls)
+        record_result("web", {"function": name, "num_recs": args.num_recs, **summary})
+
+    if args.catalog:
+        started = time.perf_counter()
+        catalog = utils.MusicCatalog.from_parquet(args.catalog)
+        build_s = time.perf_counter() - started
+        for query in CATALOG_QUERIES:
+            summary = time_calls(lambda i: utils.search_catalog(query, 24, catalog=catalog), args.calls)
+            record_result("web", {"function": "search_catalog_index", "catalog": os.path.basename(args.catalog),
+                                  "catalog_rows": len(catalog), "load_and_index_s": round(build_s, 2),
+                                  "query": query, **summary})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Pencatatan hasil benchmark ke benchmarks/results/<nama>.jsonl beserta commit git."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(RESULTS_DIR), text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(values, q):
+    """Persentil sederhana (nearest-rank) tanpa dependensi tambahan."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def latency_summary(latencies_ms):
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": round(statistics.median(latencies_ms), 3) if latencies_ms else None,
+        "p99_ms": round(percentile(latencies_ms, 0.99), 3) if latencies_ms else None,
+    }
+
+
+def record_result(name, result):
+    """Menambahkan satu hasil ke results/<name>.jsonl dan mencetaknya."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    entry = {
+        "benchmark": name,
+        "commit": git_commit(),
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        **result,
+    }
+    with open(os.path.join(RESULTS_DIR, f"{name}.jsonl"), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+    print(json.dumps(entry, indent=2))
+    return entry
@@ -0,0 +1,157 @@
+"""
+Generator data sintetis untuk benchmark.
+
+Katalog berbentuk seperti "Music Info.csv" (kolom yang dipakai pipeline plus
+fitur audio numerik) dan event user-preference sesuai spark_utils.EVENT_SCHEMA.
+Semua data deterministik dari (jumlah baris, seed) supaya hasil benchmark
+bisa dibandingkan antar commit.
+
+Artist ke-i selalu punya genre GENRES[i % len(GENRES)] dan language
+LANGUAGES[(i // len(GENRES)) % len(LANGUAGES)], sehingga event yang dibangkitkan
+(di sini maupun lewat ekspresi SQL di bench_pipeline.py) selalu cocok dengan katalog.
+
+Contoh:
+    python benchmarks/synthetic.py catalog --rows 1000000 --out data/bench/catalog_1m.parquet
+    python benchmarks/synthetic.py events --rows 100000 --catalog-rows 1000000 --out data/bench/events.jsonl
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+CATALOG_SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+GENRES = ("Pop", "Rock", "Hip Hop", "R&B", "Jazz", "Classical", "Electronic", "Country",
+          "Indie", "Metal", "Latin", "K-Pop", "Dangdut", "Folk", "Blues", "Reggae")
+LANGUAGES = ("English", "Indonesian", "Spanish", "Korean", "Japanese", "French")
+
+# Rata-rata jumlah lagu per artist
+TRACKS_PER_ARTIST = 20
+NUMERIC_FEATURES = ("danceability", "energy", "speechiness", "acousticness",
+                    "instrumentalness", "liveness", "valence")
+
+
+def num_artists(catalog_rows):
+    return max(1, catalog_rows // TRACKS_PER_ARTIST)
+
+
+def artist_attributes(artist_idx):
+    """Nama, genre dan language artist ke-i (vectorized untuk array numpy)."""
+    artist_idx = np.asarray(artist_idx)
+    genres = np.asarray(GENRES, dtype=object)[artist_idx % len(GENRES)]
+    languages = np.asarray(LANGUAGES, dtype=object)[(artist_idx // len(GENRES)) % len(LANGUAGES)]
+    names = np.char.add("Artist ", artist_idx.astype(str)).astype(object)
+    return names, genres, languages
+
+
+def catalog_chunks(rows, seed=42, chunk_size=500_000):
+    """Katalog sintetis dalam potongan DataFrame (memori tetap walau 10M baris)."""
+    artists = num_artists(rows)
+    for start in range(0, rows, chunk_size):
+        n = min(chunk_size, rows - start)
+        rng = np.random.default_rng([seed, start])
+        ids = np.arange(start, start + n)
+        # Popularitas artist mengikuti zipf supaya beberapa kunci jauh lebih padat
+        artist_idx = (rng.zipf(1.3, n) - 1) % artists
+        names, genres, languages = artist_attributes(artist_idx)
+
+        chunk = pd.DataFrame({
+            "track_id": np.char.add("TR", np.char.zfill(ids.astype(str), 9)).astype(object),
+            "track_name": np.char.add("Track ", ids.astype(str)).astype(object),
+            "artist_name": names,
+            "genre": genres,
+            "language": languages,
+            "year": rng.integers(1960, 2025, n).astype(np.int32),
+            "duration_ms": rng.integers(90_000, 420_000, n).astype(np.int64),
+            "popularity": rng.integers(0, 100, n).astype(np.int32),
+            "tempo": rng.uniform(60, 200, n),
+            "loudness": rng.uniform(-30, 0, n),
+        })
+        for feature in NUMERIC_FEATURES:
+            chunk[feature] = rng.random(n)
+        yield chunk
+
+
+def write_catalog(path, rows, seed=42):
+    """Menulis katalog sintetis ke .parquet atau .csv secara bertahap."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith(".csv"):
+        for i, chunk in enumerate(catalog_chunks(rows, seed)):
+            chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        return path
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in catalog_chunks(rows, seed):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
+
+
+def event_records(rows, catalog_rows, num_users=10_000, seed=7, start=None):
+    """Event user-preference (dict) yang cocok dengan katalog sintetis."""
+    rng = np.random.default_rng(seed)
+    start = start or datetime(2024, 1, 1, tzinfo=timezone.utc)
+    artists = num_artists(catalog_rows)
+    artist_idx = (rng.zipf(1.3, rows) - 1) % artists
+    names, genres, languages = artist_attributes(artist_idx)
+    users = rng.integers(0, num_users, rows)
+    offsets_ms = np.sort(rng.integers(0, 24 * 3600 * 1000, rows))
+
+    for i in range(rows):
+        yield {
+            "user_id": f"user_{users[i]}",
+            "genre": genres[i],
+            "artist": names[i],
+            "language": languages[i],
+            "timestamp": (start + timedelta(milliseconds=int(offsets_ms[i]))).isoformat(),
+        }
+
+
+def write_events(path, rows, catalog_rows, num_users=10_000, seed=7):
+    """Menulis event sebagai JSON lines (satu event per baris, sama dengan pesan Kafka)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        for event in event_records(rows, catalog_rows, num_users, seed):
+            f.write(json.dumps(event) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic benchmark data")
+    sub = parser.add_subparsers(dest="kind", required=True)
+
+    catalog = sub.add_parser("catalog")
+    catalog.add_argument("--rows", default="10k", help="Jumlah baris atau salah satu dari: 10k, 1m, 10m")
+    catalog.add_argument("--out", required=True, help="Path .parquet atau .csv")
+    catalog.add_argument("--seed", type=int, default=42)
+
+    events = sub.add_parser("events")
+    events.add_argument("--rows", type=int, default=100_000)
+    events.add_argument("--catalog-rows", default="10k")
+    events.add_argument("--users", type=int, default=10_000)
+    events.add_argument("--out", required=True)
+    events.add_argument("--seed", type=int, default=7)
+
+    args = parser.parse_args()
+    if args.kind == "catalog":
+        rows = CATALOG_SIZES.get(args.rows) or int(args.rows)
+        print(write_catalog(args.out, rows, args.seed))
+    else:
+        catalog_rows = CATALOG_SIZES.get(args.catalog_rows) or int(args.catalog_rows)
+        print(write_events(args.out, args.rows, catalog_rows, args.users, args.seed))
+
+
+if __name__ == "__main__":
+    main()
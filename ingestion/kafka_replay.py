@@ -0,0 +1,200 @@
+"""
+Replay log dengar yang terekam ke topik user-preference untuk load test dan backfill.
+
+Log dibaca secara streaming per batch (CSV, Parquet atau JSONL; folder berisi
+file-file tersebut juga bisa), diubah menjadi event preferensi dan dikirim
+lewat PreferenceProducer dari preference_producer.py (batching, kompresi,
+key = user_id). Pembacaan/parsing berjalan di thread terpisah dengan antrean
+terbatas, jadi I/O file tumpang tindih dengan pengiriman tanpa menampung
+seluruh log di memori.
+
+Laju pengiriman:
+  --rate N   : dibatasi N event/detik (rate limiter dengan pacing per batch kecil)
+  --rate 0   : max speed, secepat producer bisa mengirim
+
+Setiap REPORT_INTERVAL_S dicetak throughput interval dan throughput rata-rata;
+di akhir dicetak throughput sustained dan persentil latensi pengiriman
+(send -> ack broker).
+
+Jalankan:
+    python ingestion/kafka_replay.py logs/listening_log.parquet [--rate 5000] [--producer memory]
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+try:
+    from preference_producer import COLUMN_ALIASES, EVENT_FIELDS, PREFERENCE_PRODUCER, events_from_batch, make_producer
+except ImportError:  # diimpor sebagai package (ingestion.kafka_replay)
+    from ingestion.preference_producer import (COLUMN_ALIASES, EVENT_FIELDS, PREFERENCE_PRODUCER, events_from_batch,
+                                               make_producer)
+
+REPLAY_BATCH_ROWS = int(os.environ.get("REPLAY_BATCH_ROWS", 10_000))
+# Jumlah batch yang boleh menunggu di antrean antara thread pembaca dan pengirim
+PREFETCH_BATCHES = 8
+REPORT_INTERVAL_S = 2.0
+# Rate limiter memeriksa jadwal setiap ~1/PACING_STEPS detik
+PACING_STEPS = 100
+
+LOG_FORMATS = {".csv": "csv", ".parquet": "parquet", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl"}
+
+
+def log_paths(paths):
+    """File log yang didukung; folder diperluas menjadi isinya (urut nama)."""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from (os.path.join(path, name) for name in sorted(os.listdir(path))
+                        if os.path.splitext(name)[1].lower() in LOG_FORMATS)
+        elif os.path.splitext(path)[1].lower() in LOG_FORMATS:
+            yield path
+        else:
+            raise ValueError(f"Unsupported log format: {path}")
+
+
+def _csv_batches(path, batch_rows):
+    # Semua kolom dibaca sebagai string: event dikirim apa adanya, tanpa inferensi tipe
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8-sig").strip().split(",")
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=max(batch_rows * 128, 1 << 20)),
+        convert_options=pacsv.ConvertOptions(column_types={name.strip(): pa.string() for name in header}),
+    )
+    for batch in reader:
+        yield events_from_batch(batch)
+
+
+def _jsonl_batches(path, batch_rows):
+    events = []
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            event = {field: None for field in EVENT_FIELDS}
+            for name, value in record.items():
+                name = COLUMN_ALIASES.get(name, name)
+                if name in event:
+                    event[name] = value
+            if event["user_id"] is None:
+                continue
+            event["user_id"] = str(event["user_id"])
+            events.append(event)
+            if len(events) >= batch_rows:
+                yield events
+                events = []
+    if events:
+        yield events
+
+
+def iter_log_batches(paths, batch_rows=REPLAY_BATCH_ROWS):
+    """List event per batch dari file log, dibaca berurutan secara streaming."""
+    for path in log_paths(paths):
+        kind = LOG_FORMATS[os.path.splitext(path)[1].lower()]
+        if kind == "parquet":
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+                yield events_from_batch(batch)
+        elif kind == "csv":
+            yield from _csv_batches(path, batch_rows)
+        else:
+            yield from _jsonl_batches(path, batch_rows)
+
+
+def prefetch(iterable, depth=PREFETCH_BATCHES):
+    """Menjalankan iterable di thread latar; paling banyak depth item menunggu diambil."""
+    items = queue.Queue(maxsize=depth)
+    done = object()
+    errors = []
+
+    def worker():
+        try:
+            for item in iterable:
+                items.put(item)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            items.put(done)
+
+    threading.Thread(target=worker, daemon=True).start()
+    while True:
+        item = items.get()
+        if item is done:
+            break
+        yield item
+    if errors:
+        raise errors[0]
+
+
+class RateLimiter:
+    """Pacing ke rate event/detik: pengirim tidur jika sudah mendahului jadwal."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.started = time.perf_counter()
+
+    def wait(self, sent):
+        ahead = self.started + sent / self.rate - time.perf_counter()
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+def replay(producer, batches, rate=None, progress=None):
+    """
+    Mengirim semua event dari batches. rate None/0 berarti max speed.
+    progress(stats) dipanggil setiap REPORT_INTERVAL_S dengan throughput interval.
+    Mengembalikan statistik akhir termasuk persentil latensi pengiriman.
+    """
+    limiter = RateLimiter(rate) if rate else None
+    step = max(1, int(rate // PACING_STEPS)) if rate else None
+    started = last_report = time.perf_counter()
+    last_delivered = 0
+
+    for events in prefetch(batches):
+        chunk = step or len(events) or 1
+        for start in range(0, len(events), chunk):
+            for event in events[start:start + chunk]:
+                producer.send(event)
+            if limiter is not None:
+                limiter.wait(producer.sent)
+
+        now = time.perf_counter()
+        if progress is not None and now - last_report >= REPORT_INTERVAL_S:
+            stats = producer.stats(now - started)
+            stats["interval_events_per_s"] = round((stats["delivered"] - last_delivered) / (now - last_report), 1)
+            progress(stats)
+            last_report, last_delivered = now, stats["delivered"]
+
+    producer.flush()
+    result = producer.stats(time.perf_counter() - started)
+    result.update(producer.latency_percentiles())
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded listening logs to the user-preference topic")
+    parser.add_argument("paths", nargs="+", help="File/folder log CSV, Parquet atau JSONL")
+    parser.add_argument("--rate", type=float, default=0, help="Target event/detik; 0 = max speed")
+    parser.add_argument("--batch-rows", type=int, default=REPLAY_BATCH_ROWS)
+    parser.add_argument("--producer", default=PREFERENCE_PRODUCER, choices=("kafka", "memory"))
+    args = parser.parse_args()
+
+    producer = make_producer(args.producer)
+    try:
+        result = replay(producer, iter_log_batches(args.paths, args.batch_rows), rate=args.rate,
+                        progress=lambda stats: print(json.dumps(stats)))
+    finally:
+        producer.close()
+    print(f"Replayed {result['delivered']} events ({result['failed']} failed) in {result['elapsed_s']}s: "
+          f"{result['events_per_s']} events/s sustained, {result['mb_per_s']} MB/s, latency "
+          f"p50 {result['p50_ms']} ms / p95 {result['p95_ms']} ms / p99 {result['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
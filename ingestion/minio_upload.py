@@ -0,0 +1,271 @@
+"""
+Upload file besar ke MinIO (S3-compatible) dengan multipart upload paralel.
+
+File dibaca berurutan per part (UPLOAD_PART_SIZE byte) langsung dari stream
+sumber, lalu setiap part dikirim oleh thread pool (UPLOAD_CONCURRENCY).
+Jumlah part yang sedang dikirim dibatasi concurrency, jadi memori yang
+dipakai paling banyak sekitar part_size * concurrency berapa pun besar
+file-nya.
+
+Integritas data:
+  - setiap part dikirim dengan Content-MD5, server menolak part yang rusak
+  - ETag multipart dihitung ulang secara lokal dari MD5 per part dan
+    dibandingkan dengan ETag yang dikembalikan server
+  - SHA-256 seluruh file dihitung sambil membaca stream (untuk dicatat/dibandingkan)
+
+Part yang gagal dikirim ulang (UPLOAD_PART_RETRIES kali, backoff eksponensial);
+jika tetap gagal, multipart upload dibatalkan supaya tidak meninggalkan part
+yatim di bucket.
+
+Jalankan:
+    python ingestion/minio_upload.py listening_log.csv [--key uploads/raw/listening_log.csv]
+        [--part-size-mb 16] [--concurrency 8] [--endpoint http://localhost:9000]
+
+Untuk pengujian tanpa MinIO, arahkan --endpoint ke stand-in S3 lokal,
+misalnya `moto_server -p 5000` atau binary `minio server /tmp/data`.
+"""
+import argparse
+import base64
+import hashlib
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+MINIO_ENDPOINT = os.environ.get("MINIO_ENDPOINT", "http://minio:9000")
+MINIO_ACCESS_KEY = os.environ.get("MINIO_ACCESS_KEY", "minioadmin")
+MINIO_SECRET_KEY = os.environ.get("MINIO_SECRET_KEY", "minioadmin")
+
+# Bucket yang dibaca job Spark (MUSIC_BUCKET di processing/spark_utils.py, tanpa skema s3a://)
+UPLOAD_BUCKET = os.environ.get("UPLOAD_BUCKET", "music-data")
+UPLOAD_PREFIX = os.environ.get("UPLOAD_PREFIX", "uploads")
+
+# Batas S3: part minimal 5 MiB (kecuali part terakhir), maksimal 10.000 part
+MIN_PART_SIZE = 5 * 1024 ** 2
+MAX_PARTS = 10_000
+UPLOAD_PART_SIZE = int(os.environ.get("UPLOAD_PART_SIZE", 16 * 1024 ** 2))
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", 8))
+UPLOAD_PART_RETRIES = int(os.environ.get("UPLOAD_PART_RETRIES", 3))
+RETRY_BACKOFF_S = 0.5
+
+
+class UploadIntegrityError(RuntimeError):
+    """ETag dari server tidak sama dengan checksum yang dihitung secara lokal."""
+
+
+def make_s3_client(endpoint_url=MINIO_ENDPOINT, access_key=MINIO_ACCESS_KEY, secret_key=MINIO_SECRET_KEY,
+                   max_connections=UPLOAD_CONCURRENCY):
+    """Client boto3 untuk MinIO: path-style addressing dan pool koneksi seukuran concurrency."""
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        region_name="us-east-1",
+        config=Config(
+            s3={"addressing_style": "path"},
+            max_pool_connections=max_connections,
+            # Retry per part ditangani di sini, bukan oleh botocore
+            retries={"max_attempts": 1, "mode": "standard"},
+        ),
+    )
+
+
+def ensure_bucket(client, bucket=UPLOAD_BUCKET):
+    """Membuat bucket jika belum ada."""
+    from botocore.exceptions import ClientError
+
+    try:
+        client.head_bucket(Bucket=bucket)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchBucket", "NotFound"):
+            raise
+        client.create_bucket(Bucket=bucket)
+
+
+def upload_key(filename, prefix=UPLOAD_PREFIX):
+    return f"{prefix.strip('/')}/{os.path.basename(filename)}" if prefix else os.path.basename(filename)
+
+
+def _stream_size(f):
+    """Sisa ukuran stream dari posisi sekarang, None jika stream tidak bisa di-seek."""
+    try:
+        position = f.tell()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(position)
+    except (AttributeError, OSError, ValueError):
+        return None
+    return size - position
+
+
+def part_size_for(total_bytes, part_size=UPLOAD_PART_SIZE):
+    """Ukuran part yang dipakai: minimal MIN_PART_SIZE dan cukup besar agar jumlah part <= MAX_PARTS."""
+    part_size = max(part_size, MIN_PART_SIZE)
+    if total_bytes:
+        part_size = max(part_size, -(-total_bytes // MAX_PARTS))
+    return part_size
+
+
+def _read_part(f, size):
+    """Membaca tepat size byte (kecuali di akhir stream); read() pada stream jaringan bisa lebih pendek."""
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = f.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def _upload_part(client, bucket, key, upload_id, number, data, digest, retries):
+    content_md5 = base64.b64encode(digest).decode("ascii")
+    for attempt in range(retries + 1):
+        try:
+            response = client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=number,
+                                          Body=data, ContentMD5=content_md5)
+            return number, response["ETag"], attempt
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(RETRY_BACKOFF_S * 2 ** attempt)
+
+
+def _summary(bucket, key, total_bytes, parts, retried, sha256, etag, started):
+    elapsed = time.perf_counter() - started
+    return {
+        "bucket": bucket,
+        "key": key,
+        "bytes": total_bytes,
+        "parts": parts,
+        "retried_parts": retried,
+        "sha256": sha256,
+        "etag": etag,
+        "elapsed_s": round(elapsed, 3),
+        "mb_per_s": round(total_bytes / 1024 ** 2 / elapsed, 2) if elapsed > 0 else None,
+    }
+
+
+def upload_stream(f, key, bucket=UPLOAD_BUCKET, client=None, part_size=UPLOAD_PART_SIZE,
+                  concurrency=UPLOAD_CONCURRENCY, retries=UPLOAD_PART_RETRIES, progress=None):
+    """
+    Meng-upload stream biner f (dari posisi sekarang sampai habis) ke s3://bucket/key.
+
+    progress(bytes_uploaded, total_bytes) dipanggil dari thread pemanggil setelah
+    setiap part selesai; total_bytes None jika ukuran stream tidak diketahui.
+    Mengembalikan ringkasan (bytes, parts, sha256, etag, elapsed_s, mb_per_s).
+    """
+    if isinstance(f, (str, os.PathLike)):
+        with open(f, "rb") as handle:
+            return upload_stream(handle, key, bucket, client, part_size, concurrency, retries, progress)
+
+    client = client or make_s3_client(max_connections=concurrency)
+    total_bytes = _stream_size(f)
+    part_size = part_size_for(total_bytes, part_size)
+    sha256 = hashlib.sha256()
+    started = time.perf_counter()
+
+    first = _read_part(f, part_size)
+    sha256.update(first)
+    if len(first) < part_size:
+        # Cukup satu request untuk file yang lebih kecil dari satu part
+        digest = hashlib.md5(first).digest()
+        response = client.put_object(Bucket=bucket, Key=key, Body=first,
+                                     ContentMD5=base64.b64encode(digest).decode("ascii"))
+        _check_etag(response["ETag"], digest.hex())
+        if progress is not None:
+            progress(len(first), total_bytes)
+        return _summary(bucket, key, len(first), 1, 0, sha256.hexdigest(), response["ETag"].strip('"'), started)
+
+    upload_id = client.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+    etags, digests = {}, {}
+    uploaded = retried = 0
+    sizes = {}
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            pending = set()
+            number, data = 1, first
+            while data:
+                digests[number] = hashlib.md5(data).digest()
+                sizes[number] = len(data)
+                pending.add(pool.submit(_upload_part, client, bucket, key, upload_id, number, data,
+                                        digests[number], retries))
+                # Part berikutnya baru dibaca jika ada slot kosong, jadi memori tetap terbatas
+                while len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    uploaded, retried = _collect(done, etags, sizes, uploaded, retried, total_bytes, progress)
+                number += 1
+                data = _read_part(f, part_size)
+                sha256.update(data)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                uploaded, retried = _collect(done, etags, sizes, uploaded, retried, total_bytes, progress)
+
+        parts = [{"PartNumber": n, "ETag": etags[n]} for n in sorted(etags)]
+        response = client.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id,
+                                                    MultipartUpload={"Parts": parts})
+    except BaseException:
+        client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
+
+    # ETag multipart = MD5 dari gabungan MD5 setiap part, diikuti "-<jumlah part>"
+    combined = hashlib.md5(b"".join(digests[n] for n in sorted(digests))).hexdigest()
+    _check_etag(response["ETag"], f"{combined}-{len(parts)}")
+    return _summary(bucket, key, uploaded, len(parts), retried, sha256.hexdigest(),
+                    response["ETag"].strip('"'), started)
+
+
+def _collect(done, etags, sizes, uploaded, retried, total_bytes, progress):
+    for future in done:
+        number, etag, attempts = future.result()
+        etags[number] = etag
+        uploaded += sizes[number]
+        retried += attempts > 0
+    if progress is not None:
+        progress(uploaded, total_bytes)
+    return uploaded, retried
+
+
+def _check_etag(etag, expected):
+    etag = etag.strip('"')
+    if etag != expected:
+        raise UploadIntegrityError(f"ETag mismatch: server {etag}, local {expected}")
+
+
+def upload_files(paths, prefix, bucket=UPLOAD_BUCKET, client=None, **kwargs):
+    """Meng-upload beberapa file lokal (misalnya shard Parquet) ke prefix/<nama file>."""
+    client = client or make_s3_client()
+    return [upload_stream(path, upload_key(path, prefix), bucket, client, **kwargs) for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel multipart upload to MinIO/S3")
+    parser.add_argument("path")
+    parser.add_argument("--bucket", default=UPLOAD_BUCKET)
+    parser.add_argument("--key", help=f"Default: {UPLOAD_PREFIX}/<nama file>")
+    parser.add_argument("--part-size-mb", type=float, default=UPLOAD_PART_SIZE / 1024 ** 2)
+    parser.add_argument("--concurrency", type=int, default=UPLOAD_CONCURRENCY)
+    parser.add_argument("--retries", type=int, default=UPLOAD_PART_RETRIES)
+    parser.add_argument("--endpoint", default=MINIO_ENDPOINT)
+    args = parser.parse_args()
+
+    client = make_s3_client(args.endpoint, max_connections=args.concurrency)
+    ensure_bucket(client, args.bucket)
+
+    def report(done, total):
+        print(f"{done / max(total or done, 1):6.1%}  {done / 1024 ** 2:,.1f} MB")
+
+    summary = upload_stream(args.path, args.key or upload_key(args.path), args.bucket, client,
+                            part_size=int(args.part_size_mb * 1024 ** 2), concurrency=args.concurrency,
+                            retries=args.retries, progress=report)
+    print(f"Uploaded s3://{summary['bucket']}/{summary['key']}: {summary['bytes'] / 1024 ** 2:,.1f} MB "
+          f"in {summary['parts']} parts, {summary['elapsed_s']}s ({summary['mb_per_s']} MB/s), "
+          f"sha256 {summary['sha256']}")
+
+
+if __name__ == "__main__":
+    main()
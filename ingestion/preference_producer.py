@@ -0,0 +1,285 @@
+"""
+Publikasi event preferensi ke topik Kafka user-preference.
+
+Baris yang sudah di-ingest (shard Parquet dari upload_ingest.py) diubah
+menjadi event dengan schema yang dibaca processing/spark_train.py
+(user_id, genre, artist, language, timestamp, track_id opsional), lalu
+dikirim lewat PreferenceProducer:
+
+  - KafkaPreferenceProducer : kafka-python dengan batching (linger_ms,
+    batch_size), kompresi, key = user_id (semua event satu user masuk ke
+    partisi yang sama, jadi urutannya terjaga) dan callback pengiriman async.
+  - InMemoryPreferenceProducer : broker palsu di dalam proses dengan
+    partisi dan callback yang sama, untuk pengujian tanpa cluster Kafka.
+
+Pilih implementasi dengan PREFERENCE_PRODUCER=kafka|memory (default kafka).
+
+Jalankan:
+    python ingestion/preference_producer.py data/uploads/<folder shard> [--producer memory]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow.parquet as pq
+
+KAFKA_BOOTSTRAP_SERVERS = os.environ.get("KAFKA_BOOTSTRAP_SERVERS", "kafka:9092")
+PREFERENCE_TOPIC = os.environ.get("PREFERENCE_TOPIC", "user-preference")
+PREFERENCE_PRODUCER = os.environ.get("PREFERENCE_PRODUCER", "kafka")
+
+PRODUCER_LINGER_MS = int(os.environ.get("PRODUCER_LINGER_MS", 20))
+PRODUCER_BATCH_BYTES = int(os.environ.get("PRODUCER_BATCH_BYTES", 256 * 1024))
+PRODUCER_COMPRESSION = os.environ.get("PRODUCER_COMPRESSION", "gzip")
+
+# Field event sesuai EVENT_SCHEMA di processing/spark_utils.py
+EVENT_FIELDS = ("user_id", "genre", "artist", "language", "timestamp", "track_id")
+# Nama kolom alternatif di file upload -> field event
+COLUMN_ALIASES = {"artist_name": "artist", "song_id": "track_id"}
+
+PROGRESS_INTERVAL_S = 0.5
+READ_BATCH_ROWS = 10_000
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def events_from_batch(batch):
+    """pyarrow RecordBatch -> list event dict. Field yang tidak ada di file bernilai None."""
+    columns = {COLUMN_ALIASES.get(name, name): batch.column(i).to_pylist()
+               for i, name in enumerate(batch.schema.names)}
+    num_rows = batch.num_rows
+    now = _now_iso()
+    values = [columns.get(field) or [None] * num_rows for field in EVENT_FIELDS]
+    events = []
+    for row in zip(*values):
+        event = dict(zip(EVENT_FIELDS, row))
+        if event["user_id"] is None:
+            continue
+        # user_id menjadi key Kafka dan kolom string di EVENT_SCHEMA; log bisa berisi angka
+        event["user_id"] = str(event["user_id"])
+        event["timestamp"] = event["timestamp"] or now
+        events.append(event)
+    return events
+
+
+def iter_shard_events(paths, batch_rows=READ_BATCH_ROWS):
+    """Event dari shard Parquet, dibaca per batch supaya memori tetap kecil."""
+    for path in paths:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+            yield from events_from_batch(batch)
+
+
+def _encode(event):
+    # default=str: timestamp dari Parquet/CSV bisa berupa datetime
+    return json.dumps(event, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class PreferenceProducer:
+    """
+    Antarmuka producer event preferensi. Implementasi memanggil
+    _on_delivered/_on_failed dari callback pengiriman; penghitung di sini
+    dibaca untuk laporan throughput. Latensi pengiriman (send -> ack) dicatat
+    per event di latencies (detik).
+    """
+
+    topic = PREFERENCE_TOPIC
+
+    def __init__(self):
+        self.sent = 0
+        self.delivered = 0
+        self.failed = 0
+        self.bytes_sent = 0
+        self.last_error = None
+        self.latencies = array("d")
+        self._lock = threading.Lock()
+
+    def send(self, event):
+        raise NotImplementedError
+
+    def flush(self, timeout=None):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+
+    def _on_delivered(self, sent_at=None, *_):
+        with self._lock:
+            self.delivered += 1
+            if sent_at is not None:
+                self.latencies.append(time.perf_counter() - sent_at)
+
+    def _on_failed(self, error):
+        with self._lock:
+            self.failed += 1
+            self.last_error = error
+
+    def stats(self, elapsed_s):
+        return {
+            "sent": self.sent,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "bytes": self.bytes_sent,
+            "elapsed_s": round(elapsed_s, 3),
+            "events_per_s": round(self.delivered / elapsed_s, 1) if elapsed_s > 0 else None,
+            "mb_per_s": round(self.bytes_sent / 1024 ** 2 / elapsed_s, 3) if elapsed_s > 0 else None,
+        }
+
+    def latency_percentiles(self, percentiles=(50, 95, 99)):
+        """Persentil latensi pengiriman dalam milidetik, None jika belum ada yang terkirim."""
+        with self._lock:
+            latencies = np.frombuffer(self.latencies, dtype=np.float64).copy()
+        if not len(latencies):
+            return {f"p{p}_ms": None for p in percentiles}
+        values = np.percentile(latencies, percentiles) * 1000
+        return {f"p{p}_ms": round(float(v), 2) for p, v in zip(percentiles, values)}
+
+    def publish(self, events, progress=None):
+        """
+        Mengirim semua event lalu menunggu flush. progress(stats) dipanggil
+        paling sering setiap PROGRESS_INTERVAL_S detik dan sekali di akhir.
+        """
+        started = time.perf_counter()
+        last_report = started
+        for event in events:
+            self.send(event)
+            now = time.perf_counter()
+            if progress is not None and now - last_report >= PROGRESS_INTERVAL_S:
+                progress(self.stats(now - started))
+                last_report = now
+        self.flush()
+        result = self.stats(time.perf_counter() - started)
+        if progress is not None:
+            progress(result)
+        return result
+
+
+class KafkaPreferenceProducer(PreferenceProducer):
+    """Producer kafka-python dengan batching, kompresi dan key user_id."""
+
+    def __init__(self, bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS, topic=PREFERENCE_TOPIC,
+                 linger_ms=PRODUCER_LINGER_MS, batch_bytes=PRODUCER_BATCH_BYTES,
+                 compression=PRODUCER_COMPRESSION):
+        from kafka import KafkaProducer
+
+        super().__init__()
+        self.topic = topic
+        self.producer = KafkaProducer(
+            bootstrap_servers=bootstrap_servers,
+            key_serializer=lambda key: key.encode("utf-8"),
+            linger_ms=linger_ms,
+            batch_size=batch_bytes,
+            compression_type=compression,
+            acks=1,
+            retries=3,
+        )
+
+    def send(self, event):
+        value = _encode(event)
+        future = self.producer.send(self.topic, key=event["user_id"], value=value)
+        future.add_callback(self._on_delivered, time.perf_counter())
+        future.add_errback(self._on_failed)
+        self.sent += 1
+        self.bytes_sent += len(value)
+
+    def flush(self, timeout=None):
+        self.producer.flush(timeout)
+
+    def close(self):
+        self.producer.close()
+
+
+class InMemoryBroker:
+    """Broker palsu: topik -> partisi -> list (key, value), dipartisi berdasarkan hash key."""
+
+    def __init__(self, num_partitions=3):
+        self.num_partitions = num_partitions
+        self.topics = {}
+        self._lock = threading.Lock()
+
+    def partition_for(self, key):
+        return zlib.crc32(key) % self.num_partitions
+
+    def append(self, topic, records):
+        with self._lock:
+            partitions = self.topics.setdefault(topic, [[] for _ in range(self.num_partitions)])
+            for key, value in records:
+                partitions[self.partition_for(key)].append((key, value))
+
+    def messages(self, topic):
+        """Semua pesan topik (urutan per partisi), value di-decode dari JSON."""
+        partitions = self.topics.get(topic, [])
+        return [json.loads(value) for partition in partitions for _, value in partition]
+
+
+class InMemoryPreferenceProducer(PreferenceProducer):
+    """
+    Producer untuk pengujian: event ditampung per batch (batch_bytes) dan
+    dikirim ke InMemoryBroker saat batch penuh atau saat flush; callback
+    pengiriman dipanggil per event seperti pada Kafka.
+    """
+
+    def __init__(self, broker=None, topic=PREFERENCE_TOPIC, batch_bytes=PRODUCER_BATCH_BYTES):
+        super().__init__()
+        self.broker = broker or InMemoryBroker()
+        self.topic = topic
+        self.batch_bytes = batch_bytes
+        self._batch = []
+        self._batch_size = 0
+
+    def send(self, event):
+        value = _encode(event)
+        self._batch.append((event["user_id"].encode("utf-8"), value, time.perf_counter()))
+        self._batch_size += len(value)
+        self.sent += 1
+        self.bytes_sent += len(value)
+        if self._batch_size >= self.batch_bytes:
+            self.flush()
+
+    def flush(self, timeout=None):
+        batch, self._batch, self._batch_size = self._batch, [], 0
+        try:
+            self.broker.append(self.topic, [(key, value) for key, value, _ in batch])
+        except Exception as e:
+            for _ in batch:
+                self._on_failed(e)
+            return
+        for _, _, sent_at in batch:
+            self._on_delivered(sent_at)
+
+
+def make_producer(kind=None):
+    """Producer sesuai PREFERENCE_PRODUCER (kafka atau memory)."""
+    kind = kind or PREFERENCE_PRODUCER
+    if kind == "kafka":
+        return KafkaPreferenceProducer()
+    if kind == "memory":
+        return InMemoryPreferenceProducer()
+    raise ValueError(f"Unknown producer: {kind}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish ingested upload shards to the user-preference topic")
+    parser.add_argument("shard_dir", help="Folder shard Parquet dari upload_ingest.py")
+    parser.add_argument("--producer", default=PREFERENCE_PRODUCER, choices=("kafka", "memory"))
+    args = parser.parse_args()
+
+    paths = sorted(os.path.join(args.shard_dir, name) for name in os.listdir(args.shard_dir)
+                   if name.endswith(".parquet"))
+    producer = make_producer(args.producer)
+    try:
+        result = producer.publish(iter_shard_events(paths), progress=lambda stats: print(json.dumps(stats)))
+    finally:
+        producer.close()
+    print(f"Published {result['delivered']} events ({result['failed']} failed) "
+          f"at {result['events_per_s']} events/s")
+
+
+if __name__ == "__main__":
+    main()
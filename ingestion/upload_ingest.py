@@ -0,0 +1,188 @@
+"""
+Ingestion CSV yang diunggah (tab "Upload Data" di app.py) secara bertahap.
+
+File dibaca per potongan (UPLOAD_CHUNK_ROWS baris) dengan dtype yang
+dideklarasikan, setiap potongan divalidasi (kolom wajib, nilai numerik) lalu
+langsung ditulis sebagai satu shard Parquet. Memori yang dipakai dibatasi
+ukuran satu potongan, berapa pun besar file-nya.
+
+Jalankan untuk file lokal:
+    python ingestion/upload_ingest.py listening_log.csv [--out data/uploads] [--chunk-rows 100000]
+"""
+import argparse
+import csv
+import io
+import os
+import re
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+UPLOAD_DIR = os.environ.get("UPLOAD_DIR", "data/uploads")
+UPLOAD_CHUNK_ROWS = int(os.environ.get("UPLOAD_CHUNK_ROWS", 100_000))
+PREVIEW_ROWS = 10
+
+# Kolom numerik yang dikenal (log dengar, katalog) dan dtype tujuannya; kolom lain tetap string
+NUMERIC_COLUMNS = {
+    "rating": "float32",
+    "play_count": "float32",
+    "year": "float32",
+    "duration_ms": "float64",
+    "popularity": "float32",
+}
+# Setidaknya salah satu kolom identitas ini harus ada
+IDENTITY_COLUMNS = ("user_id", "track_id", "song_id")
+
+
+class UploadSchemaError(ValueError):
+    """File tidak memiliki kolom yang dibutuhkan."""
+
+
+def read_header(f):
+    """
+    Nama kolom dari baris pertama file, tanpa spasi di tepi; posisi file
+    dikembalikan ke awal. read_csv memakai nama ini (names=) sebagai ganti header
+    asli, supaya "user_id , rating" tetap dikenali sebagai user_id dan rating.
+    """
+    f.seek(0)
+    first_line = f.readline()
+    f.seek(0)
+    if isinstance(first_line, bytes):
+        first_line = first_line.decode("utf-8-sig")
+    return [name.strip() for name in next(csv.reader([first_line]), [])]
+
+
+def upload_dtypes(columns):
+    """
+    Dtype yang dideklarasikan untuk read_csv. Kolom numerik dibaca sebagai string
+    dulu supaya nilai yang tidak valid bisa dihitung per potongan, bukan
+    menggagalkan seluruh file.
+    """
+    return {name: "string" for name in columns}
+
+
+def check_unique_columns(columns):
+    # Setelah spasi di tepi dibuang, "a" dan " a" menjadi nama yang sama
+    duplicates = sorted({name for name in columns if columns.count(name) > 1})
+    if duplicates:
+        raise UploadSchemaError(f"Nama kolom duplikat: {', '.join(duplicates)}")
+
+
+def check_schema(columns):
+    check_unique_columns(columns)
+    if not any(name in columns for name in IDENTITY_COLUMNS):
+        raise UploadSchemaError(f"File harus memiliki salah satu kolom: {', '.join(IDENTITY_COLUMNS)}")
+
+
+def read_preview(f, rows=PREVIEW_ROWS):
+    """Beberapa baris pertama saja (tanpa membaca seluruh file) untuk pratinjau."""
+    columns = read_header(f)
+    check_unique_columns(columns)
+    preview = pd.read_csv(f, nrows=rows, header=0, names=columns, dtype=upload_dtypes(columns))
+    f.seek(0)
+    return preview
+
+
+def validate_chunk(chunk):
+    """
+    Mengonversi kolom numerik dan membuang baris yang tidak valid
+    (identitas kosong atau angka yang tidak bisa di-parse).
+    Mengembalikan (chunk valid, jumlah baris yang dibuang).
+    """
+    invalid = pd.Series(False, index=chunk.index)
+    identity = [name for name in IDENTITY_COLUMNS if name in chunk.columns]
+    invalid |= chunk[identity].isna().all(axis=1)
+
+    for name, dtype in NUMERIC_COLUMNS.items():
+        if name not in chunk.columns:
+            continue
+        raw = chunk[name]
+        values = pd.to_numeric(raw, errors="coerce")
+        invalid |= raw.notna() & values.isna()
+        chunk[name] = values.astype(dtype)
+
+    return chunk[~invalid], int(invalid.sum())
+
+
+def _file_size(f):
+    position = f.tell()
+    f.seek(0, io.SEEK_END)
+    size = f.tell()
+    f.seek(position)
+    return size
+
+
+def shard_dir_name(filename):
+    """Nama folder output: nama file yang aman untuk path + timestamp."""
+    stem = re.sub(r"[^A-Za-z0-9_.-]+", "_", os.path.splitext(os.path.basename(filename))[0]) or "upload"
+    return f"{stem}-{time.strftime('%Y%m%d%H%M%S')}"
+
+
+def ingest_csv(f, output_dir, chunk_rows=UPLOAD_CHUNK_ROWS, progress=None):
+    """
+    Membaca CSV f (path atau file object biner) per potongan dan menulis
+    output_dir/part-NNNNN.parquet untuk setiap potongan.
+
+    progress(bytes_read, total_bytes, rows) dipanggil setelah setiap shard.
+    Mengembalikan ringkasan (jumlah baris, baris tidak valid, shard, durasi).
+    """
+    if isinstance(f, (str, os.PathLike)):
+        with open(f, "rb") as handle:
+            return ingest_csv(handle, output_dir, chunk_rows, progress)
+
+    columns = read_header(f)
+    check_schema(columns)
+    total_bytes = _file_size(f)
+    os.makedirs(output_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    rows = invalid_rows = 0
+    shards = []
+    schema = None
+    reader = pd.read_csv(f, header=0, names=columns, dtype=upload_dtypes(columns), chunksize=chunk_rows)
+    for i, chunk in enumerate(reader):
+        chunk, invalid = validate_chunk(chunk)
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        # Semua shard memakai schema shard pertama supaya bisa dibaca sebagai satu dataset
+        schema = schema or table.schema
+        path = os.path.join(output_dir, f"part-{i:05d}.parquet")
+        pq.write_table(table.cast(schema), path, compression="snappy")
+
+        shards.append(path)
+        rows += len(chunk)
+        invalid_rows += invalid
+        if progress is not None:
+            progress(min(f.tell(), total_bytes), total_bytes, rows)
+
+    return {
+        "output_dir": output_dir,
+        "columns": columns,
+        "rows": rows,
+        "invalid_rows": invalid_rows,
+        "shards": shards,
+        "bytes": total_bytes,
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked CSV -> Parquet shard ingestion")
+    parser.add_argument("path")
+    parser.add_argument("--out", default=UPLOAD_DIR, help="Folder induk untuk shard Parquet")
+    parser.add_argument("--chunk-rows", type=int, default=UPLOAD_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    output_dir = os.path.join(args.out, shard_dir_name(args.path))
+
+    def report(done, total, rows):
+        print(f"{done / max(total, 1):6.1%}  {rows} rows")
+
+    summary = ingest_csv(args.path, output_dir, args.chunk_rows, progress=report)
+    print(f"Wrote {summary['rows']} rows ({summary['invalid_rows']} invalid dropped) "
+          f"in {len(summary['shards'])} shards to {output_dir} in {summary['elapsed_s']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Batch job: collaborative filtering (ALS implicit) dari topik user-preference.
+
+Setiap run hanya membaca event Kafka baru sejak offset terakhir yang sudah
+diproses (disimpan di models/als/offsets.json), mengubahnya menjadi interaksi
+implicit (user_id, track_id, weight) lalu menambahkannya ke riwayat interaksi.
+
+Mode training:
+  - full      : ALS dilatih ulang atas seluruh riwayat interaksi, lalu
+                recommendForAllUsers ditulis sekaligus ke Parquet. Dipakai saat
+                belum ada model atau dengan --full (mis. mingguan).
+  - fold-in   : (default bila sudah ada model) warm start dari faktor
+                sebelumnya. Faktor item dibiarkan tetap, dan faktor user yang
+                punya interaksi baru dihitung ulang dengan closed-form ALS
+                implicit, diregularisasi ke faktor lamanya. Biaya sebanding dengan
+                jumlah interaksi baru, bukan seluruh riwayat. Lagu yang belum
+                punya faktor baru ikut dihitung setelah full retrain berikutnya.
+
+Event tanpa track_id dipetakan ke top lagu untuk kunci preferensinya lewat
+index dari build_index.py, dengan bobot menurun sesuai ranking.
+
+Output di music-data/models/als:
+    interactions/run_id=...      interaksi baru per run
+    user_ids/, item_ids/         pemetaan id string -> integer untuk ALS
+    factors/user/run_id=...      faktor user (delta per run, terbaru menang)
+    factors/item/v=...           faktor item per versi full training
+    recommendations/run_id=...   top-N per user (terbaru per user menang)
+
+Progress (tahap, langkah, loss training) ditulis ke --progress-file sebagai
+JSONL bila dijalankan sebagai job latar belakang (jobs.py). ALS di Spark ML
+tidak punya hook per iterasi, jadi progress dilaporkan per tahap dan loss
+dihitung sekali setelah training penuh.
+
+Jalankan:
+    spark-submit processing/als_train.py [--full] [--rank 32] [--top-n 20] [--progress-file PATH]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from pyspark.ml.recommendation import ALS
+from pyspark.sql import Window
+from pyspark.sql.functions import (
+    arrays_zip, broadcast, coalesce, col, from_json, lit, max as spark_max, posexplode, row_number, sum as spark_sum
+)
+from pyspark.sql.utils import AnalysisException
+from pyspark.sql.types import ArrayType, FloatType, IntegerType, StringType, StructField, StructType
+
+from jobs import ProgressReporter
+from spark_utils import (
+    ALS_PATH, EVENT_SCHEMA, KAFKA_BOOTSTRAP_SERVERS, PREFERENCE_KEYS, PREFERENCE_TOPIC,
+    build_spark, current_index_path, key_pattern_column, normalize_preferences, read_text_file, write_text_file
+)
+
+OFFSETS_FILE = f"{ALS_PATH}/offsets.json"
+ITEM_VERSION_FILE = f"{ALS_PATH}/factors/item/_CURRENT"
+
+# Jumlah lagu dari index yang mewakili satu event tanpa track_id
+TRACKS_PER_EVENT = 10
+
+FOLD_IN_SCHEMA = StructType([
+    StructField("user_id", StringType()),
+    StructField("user_idx", IntegerType()),
+    StructField("features", ArrayType(FloatType())),
+    StructField("track_ids", ArrayType(StringType())),
+    StructField("scores", ArrayType(FloatType())),
+])
+
+
+def _read_topic(spark, starting):
+    return spark.read.format("kafka") \
+        .option("kafka.bootstrap.servers", KAFKA_BOOTSTRAP_SERVERS) \
+        .option("subscribe", PREFERENCE_TOPIC) \
+        .option("startingOffsets", starting) \
+        .option("endingOffsets", "latest") \
+        .load()
+
+
+def _max_offsets(raw):
+    return {str(row["partition"]): row["offset"] + 1
+            for row in raw.groupBy("partition").agg(spark_max("offset").alias("offset")).collect()}
+
+
+def read_new_events(spark):
+    """
+    Event Kafka sejak offset terakhir, beserta offset akhir untuk di-commit
+    (None jika belum ada event sama sekali, sehingga tidak ada yang di-commit).
+    """
+    starting = read_text_file(spark, OFFSETS_FILE) or "earliest"
+    committed = json.loads(starting)[PREFERENCE_TOPIC] if starting != "earliest" else {}
+    raw = _read_topic(spark, starting).cache()
+    try:
+        ending = _max_offsets(raw)
+    except Exception as e:
+        # startingOffsets spesifik harus memuat semua partisi; partisi yang
+        # ditambahkan setelah commit terakhir dibaca dari awal, partisi lama
+        # tetap mulai dari offset yang sudah di-commit
+        print(f"Reading from committed offsets failed ({type(e).__name__}), filtering from earliest instead")
+        raw.unpersist()
+        starts = spark.createDataFrame([(int(p), int(o)) for p, o in committed.items()],
+                                       "partition INT, start_offset LONG")
+        raw = _read_topic(spark, "earliest") \
+            .join(broadcast(starts), on="partition", how="left") \
+            .filter(col("offset") >= coalesce(col("start_offset"), lit(0))) \
+            .drop("start_offset") \
+            .cache()
+        ending = _max_offsets(raw)
+
+    # Partisi tanpa event baru tetap di offset lamanya
+    ending = {**committed, **ending}
+    events = raw.selectExpr("CAST(value AS STRING)") \
+        .select(from_json(col("value"), EVENT_SCHEMA).alias("data")) \
+        .select("data.*") \
+        .filter(col("user_id").isNotNull())
+    ending_offsets = json.dumps({PREFERENCE_TOPIC: ending}, sort_keys=True) if ending else None
+    return events, starting, ending_offsets
+
+
+def make_run_id(starting_offsets):
+    """
+    run_id dari total offset awal: naik monoton antar run (untuk "terbaru menang")
+    dan deterministik, sehingga run ulang setelah crash menimpa partisi yang sama.
+    """
+    if starting_offsets == "earliest":
+        return f"{0:015d}"
+    return f"{sum(json.loads(starting_offsets)[PREFERENCE_TOPIC].values()):015d}"
+
+
+def events_to_interactions(spark, events):
+    """Interaksi implicit (user_id, track_id, weight) dari event preferensi."""
+    played = events.filter(col("track_id").isNotNull()) \
+        .select("user_id", "track_id", lit(1.0).alias("weight"))
+
+    index_path = current_index_path(spark)
+    if index_path is None:
+        print("Preference index not found, only events with track_id are used")
+        interactions = played
+    else:
+        prefs = normalize_preferences(
+            events.filter(col("track_id").isNull())
+            .select("user_id", "genre", col("artist").alias("artist_name"), "language")
+        ).withColumn("key_pattern", key_pattern_column())
+        index_df = spark.read.parquet(f"{index_path}/index")
+        inferred = index_df \
+            .join(broadcast(prefs), on=["key_pattern", *PREFERENCE_KEYS], how="inner") \
+            .select("user_id", posexplode(col("track_ids")).alias("pos", "track_id")) \
+            .filter(col("pos") < TRACKS_PER_EVENT) \
+            .select("user_id", "track_id", (lit(1.0) / (col("pos") + 2)).alias("weight"))
+        interactions = played.unionByName(inferred)
+
+    return interactions.groupBy("user_id", "track_id").agg(spark_sum("weight").alias("weight"))
+
+
+def update_id_mapping(spark, path, ids, id_col, idx_col):
+    """Menambahkan id baru ke pemetaan string -> integer (append-only)."""
+    try:
+        mapping = spark.read.parquet(path)
+        max_idx = mapping.agg(spark_max(idx_col)).first()[0]
+    except AnalysisException:
+        mapping, max_idx = None, None
+    start = -1 if max_idx is None else max_idx
+
+    new_ids = ids.select(id_col).distinct()
+    if mapping is not None:
+        new_ids = new_ids.join(mapping, on=id_col, how="left_anti")
+    new_rows = new_ids.withColumn(idx_col, (row_number().over(Window.orderBy(id_col)) + lit(start)).cast("int"))
+    new_rows.write.mode("append").parquet(path)
+    return spark.read.parquet(path)
+
+
+def latest_per_key(df, key):
+    """Baris dengan run_id terbaru untuk setiap key (tabel delta append-only)."""
+    window = Window.partitionBy(key).orderBy(col("run_id").desc())
+    return df.withColumn("_n", row_number().over(window)).filter(col("_n") == 1).drop("_n")
+
+
+def write_recommendations(recs, run_id):
+    recs.withColumn("run_id", lit(run_id)) \
+        .write.mode("overwrite").partitionBy("run_id").parquet(f"{ALS_PATH}/recommendations")
+
+
+def training_loss(model, history, alpha):
+    """
+    Loss kuadrat berbobot confidence (1 + alpha * weight) pada interaksi yang
+    diamati, dengan target preferensi 1. Hanya bagian objektif ALS implicit
+    untuk pasangan yang diamati; cukup untuk memantau tren antar run.
+    """
+    return model.transform(history) \
+        .select(((lit(1.0) + lit(alpha) * col("weight")) * (lit(1.0) - col("prediction")) ** 2).alias("loss")) \
+        .agg({"loss": "avg"}).first()[0]
+
+
+def train_full(spark, users, items, run_id, args):
+    """
+    Training ulang penuh atas seluruh riwayat interaksi. Mengembalikan loss
+    training, atau None jika belum ada interaksi yang pernah ditulis.
+    """
+    try:
+        interactions = spark.read.parquet(f"{ALS_PATH}/interactions")
+    except AnalysisException:
+        return None
+    history = interactions \
+        .groupBy("user_id", "track_id").agg(spark_sum("weight").alias("weight")) \
+        .join(users, on="user_id").join(items, on="track_id")
+
+    als = ALS(
+        rank=args.rank, maxIter=args.max_iter, regParam=args.reg_param, alpha=args.alpha,
+        implicitPrefs=True, userCol="user_idx", itemCol="item_idx", ratingCol="weight",
+        coldStartStrategy="drop", seed=42,
+    )
+    model = als.fit(history)
+    loss = training_loss(model, history, args.alpha)
+
+    model.userFactors.join(users, model.userFactors.id == users.user_idx) \
+        .select("user_id", "user_idx", "features") \
+        .withColumn("run_id", lit(run_id)) \
+        .write.mode("overwrite").partitionBy("run_id").parquet(f"{ALS_PATH}/factors/user")
+    model.itemFactors.write.mode("overwrite").parquet(f"{ALS_PATH}/factors/item/v={run_id}")
+    write_text_file(spark, ITEM_VERSION_FILE, run_id)
+
+    recs = model.recommendForAllUsers(args.top_n) \
+        .select("user_idx", posexplode("recommendations").alias("pos", "rec")) \
+        .select("user_idx", (col("pos") + 1).alias("rank"),
+                col("rec.item_idx").alias("item_idx"), col("rec.rating").alias("score")) \
+        .join(users, on="user_idx").join(items, on="item_idx") \
+        .select("user_id", "rank", "track_id", "score")
+    write_recommendations(recs, run_id)
+    return loss
+
+
+def fold_in(spark, new_interactions, users, items, run_id, args):
+    """Warm start: hitung ulang faktor user yang punya interaksi baru saja."""
+    item_version = read_text_file(spark, ITEM_VERSION_FILE)
+    item_pdf = spark.read.parquet(f"{ALS_PATH}/factors/item/v={item_version}") \
+        .join(items, col("id") == col("item_idx")) \
+        .select("item_idx", "track_id", "features") \
+        .toPandas()
+
+    item_factors = np.vstack(item_pdf["features"].to_numpy()).astype(np.float32)
+    positions = np.full(int(item_pdf["item_idx"].max()) + 1, -1, dtype=np.int64)
+    positions[item_pdf["item_idx"].to_numpy()] = np.arange(len(item_pdf))
+    shared = spark.sparkContext.broadcast({
+        "Y": item_factors,
+        "YtY": item_factors.T @ item_factors,
+        "positions": positions,
+        "track_ids": item_pdf["track_id"].to_numpy(),
+    })
+    rank, alpha, reg, prior, top_n = args.rank, args.alpha, args.reg_param, args.prior_weight, args.top_n
+
+    def solve_user(pdf):
+        data = shared.value
+        Y, positions = data["Y"], data["positions"]
+        item_idx = pdf["item_idx"].to_numpy()
+        rows = np.full(len(item_idx), -1, dtype=np.int64)
+        in_range = item_idx < len(positions)
+        rows[in_range] = positions[item_idx[in_range]]
+        has_factor = rows >= 0
+        rows = rows[has_factor]
+        weights = pdf["weight"].to_numpy()[has_factor]
+
+        # Closed-form ALS implicit: (YtY + Yu^T (Cu - I) Yu + lambda I) x = Yu^T Cu p
+        confidence = 1.0 + alpha * weights
+        Yu = Y[rows]
+        A = data["YtY"] + (Yu.T * (confidence - 1.0)) @ Yu + (reg * max(len(rows), 1) + prior) * np.eye(rank)
+        b = Yu.T @ confidence
+        previous = pdf["previous"].iloc[0]
+        if previous is not None and len(previous) == rank:
+            b = b + prior * np.asarray(previous, dtype=np.float64)
+        x = np.linalg.solve(A, b).astype(np.float32)
+
+        scores = Y @ x
+        scores[rows] = -np.inf  # jangan rekomendasikan lagu yang baru saja diputar
+        k = min(top_n, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return pd.DataFrame({
+            "user_id": [pdf["user_id"].iloc[0]],
+            "user_idx": [int(pdf["user_idx"].iloc[0])],
+            "features": [x.tolist()],
+            "track_ids": [data["track_ids"][top].tolist()],
+            "scores": [scores[top].astype(np.float32).tolist()],
+        })
+
+    touched = new_interactions.select("user_id").distinct()
+    previous = latest_per_key(
+        spark.read.parquet(f"{ALS_PATH}/factors/user").join(touched, on="user_id", how="left_semi"),
+        "user_id",
+    ).select("user_id", col("features").alias("previous"))
+
+    solved = new_interactions \
+        .join(users, on="user_id").join(items, on="track_id") \
+        .join(previous, on="user_id", how="left") \
+        .select("user_id", "user_idx", "item_idx", "weight", "previous") \
+        .groupBy("user_id") \
+        .applyInPandas(solve_user, schema=FOLD_IN_SCHEMA) \
+        .cache()
+
+    solved.select("user_id", "user_idx", "features") \
+        .withColumn("run_id", lit(run_id)) \
+        .write.mode("overwrite").partitionBy("run_id").parquet(f"{ALS_PATH}/factors/user")
+
+    recs = solved \
+        .select("user_id", posexplode(arrays_zip("track_ids", "scores")).alias("pos", "rec")) \
+        .select("user_id", (col("pos") + 1).alias("rank"),
+                col("rec.track_ids").alias("track_id"), col("rec.scores").alias("score"))
+    write_recommendations(recs, run_id)
+    return solved.count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental ALS trainer over the user-preference topic")
+    parser.add_argument("--full", action="store_true", help="Latih ulang penuh atas seluruh riwayat")
+    parser.add_argument("--rank", type=int, default=32)
+    parser.add_argument("--max-iter", type=int, default=10)
+    parser.add_argument("--reg-param", type=float, default=0.05)
+    parser.add_argument("--alpha", type=float, default=10.0)
+    parser.add_argument("--prior-weight", type=float, default=1.0,
+                        help="Kekuatan regularisasi fold-in ke faktor user sebelumnya")
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--progress-file", default=os.environ.get("JOB_PROGRESS_FILE"),
+                        help="File JSONL untuk laporan progress (diisi otomatis oleh jobs.py)")
+    args = parser.parse_args()
+    progress = ProgressReporter(args.progress_file)
+    steps = 4
+
+    spark = build_spark("ALSTrainer", {"spark.sql.sources.partitionOverwriteMode": "dynamic"})
+    started = time.perf_counter()
+
+    progress.report(stage="read_events", step=0, steps=steps)
+    events, starting_offsets, ending_offsets = read_new_events(spark)
+    run_id = make_run_id(starting_offsets)
+
+    new_interactions = events_to_interactions(spark, events).cache()
+    num_new = new_interactions.count()
+    print(f"{num_new} new interactions since {starting_offsets}")
+    progress.report(stage="interactions", step=1, steps=steps, new_interactions=num_new)
+
+    if num_new > 0:
+        new_interactions.withColumn("run_id", lit(run_id)) \
+            .write.mode("overwrite").partitionBy("run_id").parquet(f"{ALS_PATH}/interactions")
+    users = update_id_mapping(spark, f"{ALS_PATH}/user_ids", new_interactions, "user_id", "user_idx")
+    items = update_id_mapping(spark, f"{ALS_PATH}/item_ids", new_interactions, "track_id", "item_idx")
+
+    progress.report(stage="id_mapping", step=2, steps=steps)
+
+    has_model = read_text_file(spark, ITEM_VERSION_FILE) is not None
+    if args.full or not has_model:
+        print("Full ALS training over the interaction history...")
+        progress.report(stage="train_full", step=3, steps=steps, max_iter=args.max_iter)
+        loss = train_full(spark, users, items, run_id, args)
+        if loss is None:
+            print("No interaction history yet, training skipped")
+        else:
+            print(f"Training loss {loss:.4f}")
+        progress.report(stage="train_full", step=3, steps=steps, epoch=args.max_iter, loss=loss)
+    elif num_new > 0:
+        progress.report(stage="fold_in", step=3, steps=steps)
+        updated = fold_in(spark, new_interactions, users, items, run_id, args)
+        print(f"Fold-in updated {updated} users")
+        progress.report(stage="fold_in", step=3, steps=steps, users_updated=updated)
+
+    if ending_offsets is not None:
+        write_text_file(spark, OFFSETS_FILE, ending_offsets)
+    elapsed = time.perf_counter() - started
+    print(f"ALS run {run_id} finished in {elapsed:.1f}s")
+    progress.report(stage="done", step=steps, steps=steps, run_id=run_id, elapsed_s=round(elapsed, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Batch job: membangun index preferensi -> top-K track_id di MinIO.
+
+Setiap lagu di katalog dipetakan ke 8 kunci (genre, artist_name, language),
+yaitu kunci lengkap ditambah semua kombinasi parsial dengan WILDCARD ("*").
+Untuk setiap kunci disimpan daftar top-K track_id yang sudah diranking, dalam
+Parquet yang dipartisi berdasarkan pola kunci (key_pattern). Pola diturunkan
+dari nilai kunci, jadi lagu dengan field kosong (dinormalisasi ke WILDCARD)
+masuk ke kunci parsial yang sama dan setiap kunci hanya punya satu baris.
+
+Index disimpan per versi:
+    index/preference_topk/v=<versi>/index     -> index Parquet
+    index/preference_topk/v=<versi>/snapshot  -> snapshot katalog untuk diff
+    index/preference_topk/_CURRENT            -> pointer ke versi aktif
+
+Jika sudah ada versi sebelumnya, job membandingkan katalog baru dengan
+snapshot lama dan hanya menghitung ulang kunci yang terdampak perubahan.
+
+Jalankan:
+    spark-submit processing/build_index.py [--top-k 50] [--full]
+"""
+import argparse
+import itertools
+import time
+
+from pyspark.sql import Window
+from pyspark.sql.functions import array, col, explode, expr, lit, min as spark_min, row_number, struct, xxhash64
+
+from spark_utils import (
+    PREFERENCE_INDEX_PATH, PREFERENCE_KEYS, RANK_ORDER, WILDCARD,
+    build_spark, current_index_path, key_pattern_column, load_songs, normalize_preferences, write_text_file
+)
+
+DEFAULT_TOP_K = 50
+
+
+def key_patterns():
+    """Semua kombinasi kunci: True = kolom dipakai, False = WILDCARD."""
+    return list(itertools.product((True, False), repeat=len(PREFERENCE_KEYS)))
+
+
+def expand_keys(df, extra_columns=()):
+    """
+    Menggandakan setiap baris ke semua pola kunci (lengkap dan parsial). Baris
+    dengan field WILDCARD menghasilkan kunci yang sama dari beberapa pola;
+    duplikat ini dibuang oleh pemanggil.
+    """
+    keyed = array(*[
+        struct(*[(col(key) if used else lit(WILDCARD)).alias(key) for key, used in zip(PREFERENCE_KEYS, mask)])
+        for mask in key_patterns()
+    ])
+    return df.select(*extra_columns, explode(keyed).alias("k")) \
+        .select(*extra_columns, *[f"k.{key}" for key in PREFERENCE_KEYS]) \
+        .select(*extra_columns, key_pattern_column().alias("key_pattern"), *PREFERENCE_KEYS)
+
+
+def catalog_snapshot(songs):
+    """Snapshot ringkas katalog: kunci preferensi dan hash isi per track."""
+    return normalize_preferences(songs) \
+        .withColumn("row_hash", xxhash64(*[col(c) for c in songs.columns])) \
+        .select("track_id", "track_name", *PREFERENCE_KEYS, "row_hash")
+
+
+def rank_keys(snapshot, top_k, only_keys=None):
+    """Top-K track per kunci, diurutkan sesuai RANK_ORDER; setiap track paling banyak sekali per kunci."""
+    tracks = snapshot.withColumn("track_artist", col("artist_name"))
+    keyed = expand_keys(tracks, extra_columns=("track_id", "track_name", "track_artist"))
+    if only_keys is not None:
+        keyed = keyed.join(only_keys, on=["key_pattern", *PREFERENCE_KEYS], how="left_semi")
+    # Satu baris per (kunci, track_id): judul terkecil, sama dengan urutan RANK_ORDER
+    keyed = keyed.groupBy("key_pattern", *PREFERENCE_KEYS, "track_id") \
+        .agg(spark_min(struct("track_name", "track_artist")).alias("track")) \
+        .select("key_pattern", *PREFERENCE_KEYS, "track_id", "track.track_name", "track.track_artist")
+
+    window = Window.partitionBy("key_pattern", *PREFERENCE_KEYS).orderBy(*RANK_ORDER)
+    return keyed \
+        .withColumn("rank", row_number().over(window)) \
+        .filter(col("rank") <= top_k) \
+        .groupBy("key_pattern", *PREFERENCE_KEYS) \
+        .agg(expr("sort_array(collect_list(struct(rank, track_id, track_name, track_artist)))").alias("ranked")) \
+        .select(
+            "key_pattern", *PREFERENCE_KEYS,
+            expr("transform(ranked, x -> x.track_id)").alias("track_ids"),
+            expr("transform(ranked, x -> x.track_name)").alias("track_names"),
+            expr("transform(ranked, x -> x.track_artist)").alias("artist_names"),
+        )
+
+
+def affected_keys(old_snapshot, new_snapshot):
+    """Kunci yang isinya bisa berubah karena track ditambah, dihapus atau diubah."""
+    old = old_snapshot.select("track_id", *[col(k).alias(f"old_{k}") for k in PREFERENCE_KEYS],
+                              col("row_hash").alias("old_hash"))
+    new = new_snapshot.select("track_id", *[col(k).alias(f"new_{k}") for k in PREFERENCE_KEYS],
+                              col("row_hash").alias("new_hash"))
+    changed = old.join(new, on="track_id", how="full_outer") \
+        .filter(~col("old_hash").eqNullSafe(col("new_hash")))
+
+    sides = []
+    for side in ("old", "new"):
+        sides.append(
+            changed.filter(col(f"{side}_hash").isNotNull())
+            .select(*[col(f"{side}_{k}").alias(k) for k in PREFERENCE_KEYS])
+        )
+    return expand_keys(sides[0].unionByName(sides[1])).distinct()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build preference-key -> top-K track index")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--full", action="store_true", help="Abaikan versi lama dan bangun ulang semuanya")
+    args = parser.parse_args()
+
+    spark = build_spark("PreferenceIndexBuilder")
+    started = time.perf_counter()
+
+    snapshot = catalog_snapshot(load_songs(spark)).cache()
+    previous = None if args.full else current_index_path(spark)
+
+    if previous is None:
+        print("Building full preference index...")
+        index = rank_keys(snapshot, args.top_k)
+    else:
+        print(f"Incremental rebuild from {previous}...")
+        old_snapshot = spark.read.parquet(f"{previous}/snapshot")
+        changed_keys = affected_keys(old_snapshot, snapshot).cache()
+        num_changed = changed_keys.count()
+        if num_changed == 0:
+            print("Catalog unchanged, index is up to date.")
+            return
+        print(f"{num_changed} keys affected by catalog changes")
+
+        # Versi lama bisa berisi baris dengan pola yang tidak cocok dengan nilai kuncinya
+        old_index = spark.read.parquet(f"{previous}/index") \
+            .filter(col("key_pattern") == key_pattern_column())
+        index = old_index \
+            .join(changed_keys, on=["key_pattern", *PREFERENCE_KEYS], how="left_anti") \
+            .unionByName(rank_keys(snapshot, args.top_k, only_keys=changed_keys))
+
+    version = time.strftime("%Y%m%d%H%M%S")
+    target = f"{PREFERENCE_INDEX_PATH}/v={version}"
+    index.write.mode("overwrite").partitionBy("key_pattern").parquet(f"{target}/index")
+    snapshot.write.mode("overwrite").parquet(f"{target}/snapshot")
+    write_text_file(spark, f"{PREFERENCE_INDEX_PATH}/_CURRENT", version)
+
+    elapsed = time.perf_counter() - started
+    print(f"Preference index v={version} written to {target} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Batch job: content-based similarity antar lagu (item-item top-K).
+
+Setiap lagu diubah menjadi vektor fitur:
+  - one-hot genre, language dan artist_name
+  - fitur audio numerik yang tersedia di katalog (danceability, energy, ...),
+    distandardisasi
+Setiap blok diberi bobot lalu vektor dinormalisasi (L2), sehingga dot product
+sama dengan cosine similarity.
+
+Tetangga terdekat dihitung exact dengan cosine per blok di numpy (BLAS), bukan
+LSH: vektor ternormalisasi dengan ribuan dimensi one-hot artist memproyeksikan
+hampir semua lagu ke satu-dua bucket BucketedRandomProjectionLSH, sehingga
+approxSimilarityJoin menjadi self-join hampir O(N^2) dengan pasangan yang
+di-shuffle (lihat benchmarks/bench_similarity.py). Di sini:
+  1. Katalog ringkas (CatalogFeatures) dibangun sekali di driver dan dikirim
+     sebagai broadcast variable: one-hot genre/language dan fitur numerik
+     sebagai matriks dense kecil, artist lewat inverted index (kode -> baris).
+  2. mapInPandas atas nomor baris lagu: setiap task menghitung similarity
+     blok query x seluruh katalog dengan satu perkalian matriks, menambahkan
+     kontribusi artist hanya untuk baris dengan artist yang sama, lalu memilih
+     top-K per lagu dengan np.argpartition. Memori per task dibatasi BLOCK_CELLS.
+
+Hasil top-K per lagu ditulis ke music-data/similarity/neighbours dan dibaca
+oleh web/utils.py untuk halaman "Dapatkan Rekomendasi"; file _VERSION di folder
+yang sama menandai kapan tabel terakhir diperbarui.
+
+Jalankan:
+    spark-submit processing/content_similarity.py [--top-k 20] [--min-similarity 0.5]
+"""
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from pyspark.sql.functions import col, lit
+from pyspark.sql.types import DoubleType, IntegerType, NumericType, StringType, StructField, StructType
+
+from spark_utils import SIMILARITY_PATH, build_spark, load_catalog, write_text_file
+
+DEFAULT_TOP_K = 20
+
+# Bobot setiap blok fitur sebelum normalisasi
+FEATURE_WEIGHTS = {
+    "genre": 1.0,
+    "language": 0.5,
+    "artist_name": 0.8,
+    "numeric": 1.0,
+}
+CATEGORICAL_COLUMNS = ("genre", "language", "artist_name")
+# Blok one-hot yang disimpan dense; artist_name (kardinalitas tinggi) lewat inverted index
+DENSE_CATEGORICAL_COLUMNS = ("genre", "language")
+
+# Jumlah sel similarity (query x katalog) per blok: 2^24 float32 = 64 MB per task
+BLOCK_CELLS = int(os.environ.get("SIMILARITY_BLOCK_CELLS", 1 << 24))
+# Jumlah lagu query per task mapInPandas
+QUERY_ROWS_PER_TASK = 20_000
+
+NEIGHBOUR_SCHEMA = StructType([
+    StructField("track_id", StringType()),
+    StructField("rank", IntegerType()),
+    StructField("neighbor_id", StringType()),
+    StructField("similarity", DoubleType()),
+])
+NEIGHBOUR_COLUMNS = tuple(field.name for field in NEIGHBOUR_SCHEMA.fields)
+
+
+def numeric_columns(catalog):
+    """Kolom fitur audio numerik yang ada di katalog."""
+    return [
+        field.name for field in catalog.schema.fields
+        if isinstance(field.dataType, NumericType) and field.name not in ("year", "duration_ms")
+    ]
+
+
+class CatalogFeatures:
+    """
+    Vektor fitur ternormalisasi semua lagu dalam bentuk ringkas. Untuk lagu i, j:
+
+        cosine(i, j) = dense_i . dense_j + artist_scale_i * artist_scale_j * [artist_i == artist_j]
+
+    dengan dense = one-hot genre/language dan fitur numerik terstandardisasi
+    (sudah dibobot dan dibagi norma vektor lengkap) dan artist_scale = bobot
+    artist / norma. Hasilnya sama dengan dot product vektor one-hot lengkap.
+    """
+
+    def __init__(self, songs, numeric=(), weights=FEATURE_WEIGHTS):
+        # Urutan baris = urutan track_id, dipakai sebagai pemecah skor sama
+        songs = songs.sort_values("track_id", ignore_index=True)
+        n = len(songs)
+        self.track_ids = songs["track_id"].to_numpy(dtype=object)
+
+        blocks = []
+        for name in DENSE_CATEGORICAL_COLUMNS:
+            codes, uniques = pd.factorize(songs[name].fillna("unknown"))
+            one_hot = np.zeros((n, len(uniques)), dtype=np.float64)
+            one_hot[np.arange(n), codes] = weights[name]
+            blocks.append(one_hot)
+        if numeric:
+            values = songs[list(numeric)].astype(np.float64).fillna(0.0)
+            # Sama dengan StandardScaler(withMean, withStd): std sampel, kolom konstan menjadi 0
+            std = values.std().fillna(0.0).replace(0.0, 1.0)
+            blocks.append(((values - values.mean()) / std).to_numpy() * weights["numeric"])
+        dense = np.hstack(blocks) if blocks else np.zeros((n, 0))
+
+        # Setiap one-hot kategori menyumbang bobot^2 ke norma
+        norm = np.sqrt((dense ** 2).sum(axis=1) + weights["artist_name"] ** 2)
+        self.dense = (dense / norm[:, None]).astype(np.float32)
+        self.artist_scale = (weights["artist_name"] / norm).astype(np.float32)
+
+        self.artist_codes = pd.factorize(songs["artist_name"].fillna("unknown"))[0]
+        self.artist_rows = np.argsort(self.artist_codes, kind="stable")
+        # Baris dengan kode artist c: artist_rows[artist_bounds[c]:artist_bounds[c + 1]]
+        self.artist_bounds = np.searchsorted(self.artist_codes[self.artist_rows],
+                                             np.arange(self.artist_codes.max(initial=-1) + 2))
+
+    def __len__(self):
+        return len(self.track_ids)
+
+    def similarities(self, rows):
+        """Matriks cosine similarity (len(rows) x jumlah lagu); lagu itu sendiri bernilai -inf."""
+        sims = self.dense[rows] @ self.dense.T
+        for i, row in enumerate(rows):
+            code = self.artist_codes[row]
+            same_artist = self.artist_rows[self.artist_bounds[code]:self.artist_bounds[code + 1]]
+            sims[i, same_artist] += self.artist_scale[row] * self.artist_scale[same_artist]
+        sims[np.arange(len(rows)), rows] = -np.inf
+        return sims
+
+
+def neighbour_partition(features, rows, top_k, min_similarity, block_cells=BLOCK_CELLS):
+    """
+    Top-K tetangga (exact) untuk baris rows dari CatalogFeatures, dihitung per
+    blok query supaya matriks similarity tidak melebihi block_cells sel.
+    Mengembalikan DataFrame NEIGHBOUR_COLUMNS; urutan sama skor: neighbor_id.
+    """
+    k = min(top_k, len(features) - 1)
+    rows = np.asarray(rows, dtype=np.int64)
+    if k <= 0 or len(rows) == 0:
+        return pd.DataFrame({name: pd.Series(dtype="object") for name in NEIGHBOUR_COLUMNS}) \
+            .astype({"rank": "int32", "similarity": "float64"})
+
+    block_rows = max(1, block_cells // len(features))
+    out_rows, out_neighbours, out_similarities, out_ranks = [], [], [], []
+    for start in range(0, len(rows), block_rows):
+        block = rows[start:start + block_rows]
+        sims = features.similarities(block)
+        # argpartition memilih top-K per baris dalam O(N); hanya K kolom itu yang diurutkan
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.lexsort((top, -top_sims), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_sims = np.take_along_axis(top_sims, order, axis=1)
+        # Setelah diurutkan, tetangga di atas min_similarity selalu berupa awalan baris
+        keep = top_sims >= min_similarity
+        out_rows.append(np.broadcast_to(block[:, None], top.shape)[keep])
+        out_neighbours.append(top[keep])
+        out_similarities.append(top_sims[keep])
+        out_ranks.append(np.broadcast_to(np.arange(1, k + 1, dtype=np.int32), top.shape)[keep])
+
+    return pd.DataFrame({
+        "track_id": features.track_ids[np.concatenate(out_rows)],
+        "rank": np.concatenate(out_ranks),
+        "neighbor_id": features.track_ids[np.concatenate(out_neighbours)],
+        # float32 -> float64, dibatasi ke [-1, 1] dari galat pembulatan
+        "similarity": np.clip(np.concatenate(out_similarities).astype(np.float64), -1.0, 1.0),
+    })
+
+
+def add_executor_files(spark):
+    """Modul yang diimpor di executor oleh neighbour_partition (content_similarity dan dependensinya)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ("preferences.py", "spark_utils.py", "content_similarity.py"):
+        spark.sparkContext.addPyFile(os.path.join(here, name))
+
+
+def nearest_neighbours(spark, catalog, top_k, min_similarity, block_cells=BLOCK_CELLS):
+    """Top-K tetangga per lagu dengan cosine exact per blok (mapInPandas atas nomor baris)."""
+    numeric = numeric_columns(catalog)
+    songs = catalog.select("track_id", *CATEGORICAL_COLUMNS, *numeric).toPandas()
+    features_bc = spark.sparkContext.broadcast(CatalogFeatures(songs, numeric))
+    print(f"Built feature vectors for {len(songs)} tracks")
+
+    def neighbour_batches(batches):
+        features = features_bc.value
+        for batch in batches:
+            yield neighbour_partition(features, batch["id"].to_numpy(), top_k, min_similarity, block_cells)
+
+    num_tasks = max(spark.sparkContext.defaultParallelism, math.ceil(len(songs) / QUERY_ROWS_PER_TASK))
+    return spark.range(len(songs), numPartitions=num_tasks).mapInPandas(neighbour_batches, NEIGHBOUR_SCHEMA)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute item-item content similarity")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--min-similarity", type=float, default=0.5)
+    parser.add_argument("--block-cells", type=int, default=BLOCK_CELLS,
+                        help="Jumlah sel similarity per blok (memori per task = 4 byte x nilai ini)")
+    args = parser.parse_args()
+
+    spark = build_spark("ContentSimilarity")
+    add_executor_files(spark)
+    started = time.perf_counter()
+
+    catalog = load_catalog(spark).dropDuplicates(["track_id"]).cache()
+    neighbours = nearest_neighbours(spark, catalog, args.top_k, args.min_similarity, args.block_cells)
+
+    # Sertakan info tampilan supaya web tidak perlu join ulang dengan katalog
+    year = col("year") if "year" in catalog.columns else lit(None).cast("int")
+    source = catalog.select("track_id", "track_name", "artist_name")
+    target = catalog.select(
+        col("track_id").alias("neighbor_id"),
+        col("track_name").alias("neighbor_name"),
+        col("artist_name").alias("neighbor_artist"),
+        col("genre").alias("neighbor_genre"),
+        year.alias("neighbor_year"),
+    )
+    neighbours \
+        .join(source, on="track_id") \
+        .join(target, on="neighbor_id") \
+        .select("track_id", "track_name", "artist_name", "rank", "neighbor_id", "neighbor_name",
+                "neighbor_artist", "neighbor_genre", "neighbor_year", "similarity") \
+        .repartition("track_id") \
+        .sortWithinPartitions("track_id", "rank") \
+        .write.mode("overwrite").parquet(SIMILARITY_PATH)
+    write_text_file(spark, f"{SIMILARITY_PATH}/_VERSION", time.strftime("%Y%m%d%H%M%S"))
+
+    elapsed = time.perf_counter() - started
+    print(f"Neighbour table written to {SIMILARITY_PATH} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
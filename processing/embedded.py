@@ -0,0 +1,497 @@
+"""
+Engine embedded (tanpa JVM) untuk pipeline rekomendasi: DuckDB atau Polars.
+
+Untuk deployment satu node dan laptop developer, memulai SparkSession dengan
+S3A dan konektor Kafka hanya untuk menjalankan logika spark_train.py terlalu
+mahal. Engine di sini menjalankan langkah yang sama di dalam proses Python,
+di atas file Parquet/CSV lokal:
+
+  1. load_catalog : katalog dibaca dan dinormalisasi (field kosong -> WILDCARD),
+                    lalu dibangun index top-N per kunci preferensi di memori,
+                    dengan 8 pola kunci yang sama seperti build_index.py
+  2. recommend    : per micro-batch event, preferensi user di-join dengan index
+                    dan diranking per user -> top-N (RECOMMENDATION_COLUMNS)
+  3. sink         : ditulis ke RecommendationSink (SQLite, idempotent per batch_id);
+                    nama stream diturunkan dari isi file event (input_stream_name)
+
+Ranker sama dengan --ranker di spark_train.py:
+  exact  : semua field yang diisi harus cocok (kunci parsial lewat WILDCARD)
+  scored : skor berbobot SCORE_WEIGHTS, kecocokan parsial ikut diranking.
+           Kandidat diambil dari index untuk setiap subset field kunci yang
+           diisi; karena index sudah top-N dengan urutan RANK_ORDER, top-N
+           berdasarkan skor pasti ada di antara kandidat tersebut.
+
+Tahap profil stateful (user_profile.py) tidak dijalankan: preferensi diambil
+langsung dari event di batch, seperti bench_pipeline.py tanpa --with-profile.
+
+Event dibaca dari file JSONL/CSV/Parquet (atau "-" untuk JSONL dari stdin,
+mis. hasil kafka-console-consumer) atau dari queue.Queue di proses yang sama
+(queue_events).
+
+Jalankan:
+    python processing/embedded.py --engine duckdb --catalog data/bench/catalog_1m.parquet \
+        --events data/bench/events.jsonl [--ranker scored] [--batch-rows 10000]
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import queue
+import sys
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.json as pajson
+import pyarrow.parquet as pq
+
+from preferences import PREFERENCE_KEYS, RANK_ORDER, SCORE_WEIGHTS, TOP_N, WILDCARD
+from recommendation_sink import RECOMMENDATION_COLUMNS, RECOMMENDATIONS_DB, RecommendationSink
+
+EMBEDDED_ENGINE = os.environ.get("EMBEDDED_ENGINE", "duckdb")
+EMBEDDED_BATCH_ROWS = int(os.environ.get("EMBEDDED_BATCH_ROWS", 10_000))
+# Batch dari queue dikirim jika sudah penuh atau setelah menunggu selama ini
+QUEUE_MAX_WAIT_S = 1.0
+
+RANKERS = ("exact", "scored")
+
+# Field event yang dipakai (EVENT_SCHEMA di spark_utils.py); artist -> artist_name
+EVENT_COLUMNS = ("user_id", "genre", "artist", "language")
+EVENT_ARROW_SCHEMA = pa.schema([(name, pa.string()) for name in EVENT_COLUMNS])
+# Nama kolom alternatif di file event -> field event
+COLUMN_ALIASES = {"artist_name": "artist"}
+
+# Field lagu di index untuk menghitung skor ranker scored
+TRACK_FIELDS = {"genre": "track_genre", "artist_name": "track_artist", "language": "track_language"}
+
+
+def key_masks():
+    """Semua pola kunci (sama dengan build_index.key_patterns): True = field dipakai, False = WILDCARD."""
+    return list(itertools.product((True, False), repeat=len(PREFERENCE_KEYS)))
+
+
+def scored_masks():
+    """Pola kunci dengan minimal satu field: sumber kandidat ranker scored."""
+    return [mask for mask in key_masks() if any(mask)]
+
+
+def _event_table(batch):
+    """RecordBatch/Table dari file -> tabel EVENT_COLUMNS (string); kolom yang tidak ada bernilai null."""
+    names = {COLUMN_ALIASES.get(name, name): name for name in batch.schema.names}
+    columns = []
+    for field in EVENT_COLUMNS:
+        if field in names:
+            columns.append(batch.column(names[field]).cast(pa.string()))
+        else:
+            columns.append(pa.nulls(batch.num_rows, pa.string()))
+    return pa.Table.from_arrays(columns, schema=EVENT_ARROW_SCHEMA)
+
+
+def _rebatch(batches, batch_rows):
+    """Menyusun ulang batch dengan ukuran sembarang menjadi tabel berisi batch_rows baris."""
+    pending, size = [], 0
+    for batch in batches:
+        pending.append(_event_table(batch))
+        size += batch.num_rows
+        while size >= batch_rows:
+            table = pa.concat_tables(pending)
+            yield table.slice(0, batch_rows)
+            rest = table.slice(batch_rows)
+            pending, size = [rest], rest.num_rows
+    if size:
+        yield pa.concat_tables(pending)
+
+
+def _jsonl_lines(lines, batch_rows):
+    events = []
+    for line in lines:
+        if line.strip():
+            events.append(json.loads(line))
+        if len(events) >= batch_rows:
+            yield pa.Table.from_pylist(events, schema=EVENT_ARROW_SCHEMA)
+            events = []
+    if events:
+        yield pa.Table.from_pylist(events, schema=EVENT_ARROW_SCHEMA)
+
+
+def _file_batches(path, batch_rows):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        return pq.ParquetFile(path).iter_batches(batch_size=batch_rows)
+    if ext == ".csv":
+        return pacsv.open_csv(path, convert_options=pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in (*EVENT_COLUMNS, *COLUMN_ALIASES)}))
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return pajson.open_json(path, parse_options=pajson.ParseOptions(
+            explicit_schema=EVENT_ARROW_SCHEMA, unexpected_field_behavior="ignore"))
+    raise ValueError(f"Unsupported event file: {path}")
+
+
+def file_events(paths, batch_rows=EMBEDDED_BATCH_ROWS):
+    """Batch event (pa.Table) dari file JSONL/CSV/Parquet secara berurutan; "-" = JSONL dari stdin."""
+    for path in paths:
+        if path == "-":
+            yield from _jsonl_lines(sys.stdin, batch_rows)
+        else:
+            yield from _rebatch(_file_batches(path, batch_rows), batch_rows)
+
+
+def input_stream_name(paths, batch_rows=EMBEDDED_BATCH_ROWS):
+    """
+    Nama stream sink untuk sekumpulan file event: hash isi file (berurutan) dan
+    batch_rows. batch_id dari run() adalah nomor batch di input ini (offset
+    batch_id * batch_rows), jadi input yang sama dilewati saat dijalankan ulang,
+    sedangkan file lain ke sink yang sama tidak dianggap sudah ditulis.
+    """
+    digest = hashlib.sha256(f"{batch_rows}\n".encode())
+    for path in paths:
+        if path == "-":
+            raise ValueError("stdin input needs an explicit stream name")
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+    return f"embedded-{digest.hexdigest()[:16]}"
+
+
+def queue_events(events_queue, batch_rows=EMBEDDED_BATCH_ROWS, max_wait_s=QUEUE_MAX_WAIT_S):
+    """
+    Batch event dari queue.Queue berisi event dict (mis. diisi producer di proses
+    yang sama). Batch dikirim saat penuh atau max_wait_s setelah event pertama;
+    None di queue menandai akhir stream.
+    """
+    done = False
+    while not done:
+        first = events_queue.get()
+        if first is None:
+            return
+        events = [first]
+        deadline = time.monotonic() + max_wait_s
+        while len(events) < batch_rows:
+            try:
+                item = events_queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                done = True
+                break
+            events.append(item)
+        yield pa.Table.from_pylist(events, schema=EVENT_ARROW_SCHEMA)
+
+
+class EmbeddedEngine:
+    """Antarmuka engine: load_catalog sekali, lalu recommend per batch event."""
+
+    name = None
+
+    def __init__(self, top_n=TOP_N, ranker="exact", weights=SCORE_WEIGHTS, threads=None):
+        if ranker not in RANKERS:
+            raise ValueError(f"Unknown ranker: {ranker}")
+        self.top_n = top_n
+        self.ranker = ranker
+        self.weights = weights
+        self.threads = threads
+
+    def load_catalog(self, path):
+        """Membaca katalog Parquet/CSV lokal dan membangun index; mengembalikan jumlah lagu."""
+        raise NotImplementedError
+
+    def recommend(self, events):
+        """Top-N per user untuk satu batch event (pa.Table EVENT_COLUMNS): list tuple RECOMMENDATION_COLUMNS."""
+        raise NotImplementedError
+
+
+def _sql_str(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _sql_normalized(expr, alias):
+    # Sama dengan normalize_preferences: trim spasi, string kosong/null -> WILDCARD
+    return f"coalesce(nullif(trim({expr}), ''), {_sql_str(WILDCARD)}) AS {alias}"
+
+
+class DuckDBEngine(EmbeddedEngine):
+    """Engine DuckDB in-memory; batch event dibaca langsung dari tabel Arrow."""
+
+    name = "duckdb"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        import duckdb
+
+        self.conn = duckdb.connect()
+        if self.threads:
+            self.conn.execute(f"SET threads = {int(self.threads)}")
+
+    def load_catalog(self, path):
+        if path.endswith(".csv"):
+            source = f"read_csv({_sql_str(path)}, header = true, all_varchar = true)"
+        else:
+            source = f"read_parquet({_sql_str(path)})"
+        self.conn.execute(f"""
+            CREATE OR REPLACE TABLE songs AS
+            SELECT CAST(track_id AS VARCHAR) AS track_id, CAST(track_name AS VARCHAR) AS track_name,
+                   {", ".join(_sql_normalized(key, key) for key in PREFERENCE_KEYS)}
+            FROM {source}
+        """)
+
+        patterns = " UNION ALL ".join(
+            "SELECT track_id, track_name, "
+            + ", ".join(f"{key} AS {field}" for key, field in TRACK_FIELDS.items()) + ", "
+            + ", ".join(key if used else f"{_sql_str(WILDCARD)} AS {key}" for key, used in zip(PREFERENCE_KEYS, mask))
+            + " FROM songs"
+            for mask in key_masks()
+        )
+        keys = ", ".join(PREFERENCE_KEYS)
+        order = ", ".join(f"{column} NULLS FIRST" for column in RANK_ORDER)
+        # Field kosong menjadi WILDCARD, jadi beberapa pola bisa menghasilkan
+        # (kunci, track_id) yang sama; satu baris per pasangan
+        self.conn.execute(f"""
+            CREATE OR REPLACE TABLE pref_index AS
+            SELECT * FROM (
+                SELECT *, row_number() OVER (PARTITION BY {keys} ORDER BY {order}) - 1 AS key_rank
+                FROM (
+                    SELECT * FROM ({patterns})
+                    QUALIFY row_number() OVER (PARTITION BY {keys}, track_id ORDER BY {order}) = 1
+                )
+            ) WHERE key_rank < {int(self.top_n)}
+        """)
+        return self.conn.execute("SELECT count(*) FROM songs").fetchone()[0]
+
+    def _scored_candidates(self):
+        keys = ", ".join(PREFERENCE_KEYS)
+        lookups = []
+        for mask in scored_masks():
+            conditions = [f"i.{key} = k.{key} AND k.{key} <> {_sql_str(WILDCARD)}" if used
+                          else f"i.{key} = {_sql_str(WILDCARD)}" for key, used in zip(PREFERENCE_KEYS, mask)]
+            lookups.append(f"SELECT k.{', k.'.join(PREFERENCE_KEYS)}, i.track_id, i.track_name, "
+                           f"i.{', i.'.join(TRACK_FIELDS.values())} "
+                           f"FROM pref_keys k JOIN pref_index i ON {' AND '.join(conditions)}")
+        score = " + ".join(
+            f"CAST({field} = {key} AND {key} <> {_sql_str(WILDCARD)} AS DOUBLE) * {float(self.weights[key])}"
+            for key, field in TRACK_FIELDS.items())
+        return f"""
+            pref_keys AS (SELECT DISTINCT {keys} FROM prefs),
+            scored AS (
+                SELECT DISTINCT *, {score} AS score FROM ({" UNION ALL ".join(lookups)})
+            ),
+            ranked AS (
+                SELECT * FROM (
+                    SELECT {keys}, track_id, track_name, row_number() OVER (
+                        PARTITION BY {keys} ORDER BY score DESC, track_name NULLS FIRST, track_id) - 1 AS key_rank
+                    FROM scored
+                ) WHERE key_rank < {int(self.top_n)}
+            ),
+            candidates AS (
+                SELECT p.user_id, {", ".join(f"p.{key}" for key in PREFERENCE_KEYS)}, r.key_rank, r.track_id,
+                       r.track_name
+                FROM prefs p JOIN ranked r USING ({keys})
+            )"""
+
+    def recommend(self, events):
+        keys = ", ".join(PREFERENCE_KEYS)
+        self.conn.register("events", events)
+        try:
+            if self.ranker == "scored":
+                candidates = self._scored_candidates()
+            else:
+                candidates = f"""
+                    candidates AS (
+                        SELECT p.user_id, {", ".join(f"p.{key}" for key in PREFERENCE_KEYS)}, i.key_rank,
+                               i.track_id, i.track_name
+                        FROM prefs p JOIN pref_index i USING ({keys})
+                    )"""
+            return self.conn.execute(f"""
+                WITH prefs AS (
+                    SELECT DISTINCT user_id, {_sql_normalized("genre", "genre")},
+                           {_sql_normalized("artist", "artist_name")}, {_sql_normalized("language", "language")}
+                    FROM events WHERE user_id IS NOT NULL
+                ),
+                {candidates},
+                unique_tracks AS (
+                    -- Lagu yang muncul di beberapa kunci user: kunci dengan key_rank terkecil
+                    SELECT * FROM candidates
+                    QUALIFY row_number() OVER (PARTITION BY user_id, track_id ORDER BY key_rank, {keys}) = 1
+                )
+                SELECT {", ".join(RECOMMENDATION_COLUMNS)} FROM (
+                    SELECT *, row_number() OVER (
+                        PARTITION BY user_id ORDER BY key_rank, track_name NULLS FIRST, track_id) AS rank
+                    FROM unique_tracks
+                ) WHERE rank <= {int(self.top_n)}
+                ORDER BY user_id, rank
+            """).fetchall()
+        finally:
+            self.conn.unregister("events")
+
+
+class PolarsEngine(EmbeddedEngine):
+    """Engine Polars (lazy); batch event dikonversi dari Arrow tanpa salinan."""
+
+    name = "polars"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.threads:
+            # Harus di-set sebelum polars diimpor pertama kali
+            os.environ.setdefault("POLARS_MAX_THREADS", str(self.threads))
+        import polars
+
+        self.pl = polars
+        self.index = None
+
+    def _normalized(self, column, alias):
+        pl = self.pl
+        trimmed = pl.col(column).cast(pl.String).str.strip_chars(" ")
+        return pl.when(trimmed.str.len_chars() > 0).then(trimmed).otherwise(pl.lit(WILDCARD)).alias(alias)
+
+    def load_catalog(self, path):
+        pl = self.pl
+        scan = pl.scan_csv(path, infer_schema=False) if path.endswith(".csv") else pl.scan_parquet(path)
+        songs = scan \
+            .select(pl.col("track_id").cast(pl.String), pl.col("track_name").cast(pl.String),
+                    *[self._normalized(key, key) for key in PREFERENCE_KEYS]) \
+            .collect()
+
+        patterns = [
+            songs.lazy().select(
+                "track_id", "track_name", *[pl.col(key).alias(field) for key, field in TRACK_FIELDS.items()],
+                *[pl.col(key) if used else pl.lit(WILDCARD).alias(key) for key, used in zip(PREFERENCE_KEYS, mask)])
+            for mask in key_masks()
+        ]
+        # Field kosong menjadi WILDCARD, jadi beberapa pola bisa menghasilkan (kunci,
+        # track_id) yang sama: diurutkan per kunci lalu RANK_ORDER, satu baris per
+        # pasangan, dan nomor baris per kunci = key_rank
+        self.index = pl.concat(patterns) \
+            .sort([*PREFERENCE_KEYS, *RANK_ORDER], nulls_last=False) \
+            .unique(subset=[*PREFERENCE_KEYS, "track_id"], keep="first", maintain_order=True) \
+            .with_columns(pl.int_range(pl.len(), dtype=pl.Int32).over(list(PREFERENCE_KEYS)).alias("key_rank")) \
+            .filter(pl.col("key_rank") < self.top_n) \
+            .collect()
+        return songs.height
+
+    def _scored_candidates(self, prefs):
+        pl = self.pl
+        keys = list(PREFERENCE_KEYS)
+        pref_keys = prefs.select(keys).unique()
+        index = self.index.lazy()
+        lookups = []
+        for mask in scored_masks():
+            used = [key for key, flag in zip(PREFERENCE_KEYS, mask) if flag]
+            lookup = pref_keys \
+                .filter(pl.all_horizontal([pl.col(key) != WILDCARD for key in used])) \
+                .with_columns([(pl.col(key) if flag else pl.lit(WILDCARD)).alias(f"lookup_{key}")
+                               for key, flag in zip(PREFERENCE_KEYS, mask)]) \
+                .join(index.drop("key_rank"), left_on=[f"lookup_{key}" for key in keys], right_on=keys) \
+                .select(*keys, "track_id", "track_name", *TRACK_FIELDS.values())
+            lookups.append(lookup)
+
+        score = pl.sum_horizontal([
+            ((pl.col(field) == pl.col(key)) & (pl.col(key) != WILDCARD)).cast(pl.Float64) * self.weights[key]
+            for key, field in TRACK_FIELDS.items()
+        ])
+        ranked = pl.concat(lookups) \
+            .unique(subset=[*keys, "track_id"]) \
+            .with_columns(score.alias("score")) \
+            .sort(["score", *RANK_ORDER], descending=[True, False, False], nulls_last=False) \
+            .with_columns(pl.int_range(pl.len(), dtype=pl.Int32).over(keys).alias("key_rank")) \
+            .filter(pl.col("key_rank") < self.top_n)
+        return prefs.join(ranked.select(*keys, "key_rank", "track_id", "track_name"), on=keys)
+
+    def recommend(self, events):
+        pl = self.pl
+        keys = list(PREFERENCE_KEYS)
+        prefs = pl.from_arrow(events).lazy() \
+            .filter(pl.col("user_id").is_not_null()) \
+            .select("user_id", self._normalized("genre", "genre"), self._normalized("artist", "artist_name"),
+                    self._normalized("language", "language")) \
+            .unique()
+
+        if self.ranker == "scored":
+            candidates = self._scored_candidates(prefs)
+        else:
+            candidates = prefs.join(self.index.lazy().select(*keys, "key_rank", "track_id", "track_name"), on=keys)
+        return candidates \
+            .sort(["user_id", "key_rank", *RANK_ORDER, *keys], nulls_last=False) \
+            .unique(subset=["user_id", "track_id"], keep="first", maintain_order=True) \
+            .with_columns((pl.int_range(pl.len(), dtype=pl.Int32).over("user_id") + 1).alias("rank")) \
+            .filter(pl.col("rank") <= self.top_n) \
+            .select(*RECOMMENDATION_COLUMNS) \
+            .collect() \
+            .rows()
+
+
+ENGINES = {engine.name: engine for engine in (DuckDBEngine, PolarsEngine)}
+
+
+def make_engine(name=EMBEDDED_ENGINE, **kwargs):
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine: {name}")
+    return ENGINES[name](**kwargs)
+
+
+def run(engine, batches, sink=None, progress=None):
+    """
+    Memproses semua batch event: recommend lalu tulis ke sink (jika ada).
+    progress(stats) dipanggil setelah setiap batch. Mengembalikan statistik akhir
+    beserta latensi per batch (batch_ms).
+
+    batch_id adalah posisi batch di batches, jadi stream sink harus unik per
+    input (input_stream_name); jika tidak, input lain dianggap sudah ditulis.
+    """
+    started = time.perf_counter()
+    stats = {"batches": 0, "events": 0, "recommendations": 0, "skipped_batches": 0, "batch_ms": []}
+    for batch_id, events in enumerate(batches):
+        if sink is not None and sink.is_applied(batch_id):
+            # Batch yang sama sudah ditulis pada run sebelumnya (stream yang sama)
+            stats["skipped_batches"] += 1
+            continue
+        batch_started = time.perf_counter()
+        rows = engine.recommend(events)
+        if sink is not None:
+            sink.write_batch(batch_id, rows)
+        stats["batch_ms"].append((time.perf_counter() - batch_started) * 1000)
+        stats["batches"] += 1
+        stats["events"] += events.num_rows
+        stats["recommendations"] += len(rows)
+        if progress is not None:
+            progress(batch_id, len(rows), stats["batch_ms"][-1])
+
+    elapsed = time.perf_counter() - started
+    stats["elapsed_s"] = round(elapsed, 3)
+    stats["events_per_s"] = round(stats["events"] / elapsed, 1) if elapsed > 0 else None
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the recommendation pipeline on an embedded engine")
+    parser.add_argument("--engine", default=EMBEDDED_ENGINE, choices=sorted(ENGINES))
+    parser.add_argument("--catalog", required=True, help="Katalog lokal (.parquet atau .csv)")
+    parser.add_argument("--events", nargs="+", required=True, help="File event JSONL/CSV/Parquet; - untuk stdin")
+    parser.add_argument("--ranker", default="exact", choices=RANKERS)
+    parser.add_argument("--top-n", type=int, default=TOP_N)
+    parser.add_argument("--batch-rows", type=int, default=EMBEDDED_BATCH_ROWS)
+    parser.add_argument("--threads", type=int, help="Jumlah thread engine (default: semua core)")
+    parser.add_argument("--sink-db", default=RECOMMENDATIONS_DB)
+    parser.add_argument("--stream",
+                        help="Nama stream di sink; batch yang sudah ditulis untuk stream ini dilewati "
+                             "(default: dari hash isi file event, wajib untuk stdin)")
+    args = parser.parse_args()
+    if args.stream is None and "-" in args.events:
+        parser.error("--stream is required when reading events from stdin")
+
+    started = time.perf_counter()
+    engine = make_engine(args.engine, top_n=args.top_n, ranker=args.ranker, threads=args.threads)
+    songs = engine.load_catalog(args.catalog)
+    print(f"{args.engine}: loaded {songs} songs and built index in {time.perf_counter() - started:.2f}s")
+
+    stream = args.stream or input_stream_name(args.events, args.batch_rows)
+    sink = RecommendationSink(args.sink_db, stream=stream)
+    stats = run(engine, file_events(args.events, args.batch_rows), sink,
+                progress=lambda batch_id, rows, ms: print(f"Batch {batch_id}: {rows} recommendations in {ms:.1f} ms"))
+    print(f"Processed {stats['events']} events in {stats['batches']} batches "
+          f"({stats['skipped_batches']} already applied) in {stats['elapsed_s']}s: {stats['events_per_s']} events/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Runner job latar belakang (training dsb.) dengan registry di disk.
+
+Setiap job adalah satu folder di JOBS_DIR:
+
+    <job_id>/job.json        metadata: kind, params, command, status, pid, waktu, returncode
+    <job_id>/progress.jsonl  progress dari trainer (satu objek JSON per baris)
+    <job_id>/output.log      stdout + stderr proses
+
+Job dijalankan oleh proses supervisor terpisah (`python jobs.py supervise
+<folder job>`) di session baru. Supervisor menjalankan command, menunggu
+hingga selesai dan menulis status akhir ke job.json, jadi job tetap berjalan
+walaupun halaman Streamlit di-rerun atau ditutup. Halaman cukup membaca
+job.json dan progress.jsonl (polling, tanpa menunggu proses).
+
+Hanya satu job aktif per kind: start() mengembalikan job yang sedang berjalan
+jika ada, sehingga beberapa user melihat job yang sama alih-alih masing-masing
+memulai training sendiri.
+
+Trainer melaporkan progress lewat ProgressReporter, yang menulis ke file di
+environment variable JOB_PROGRESS_FILE (no-op jika tidak dijalankan sebagai job).
+Modul ini hanya memakai standard library supaya bisa diimpor oleh app.py.
+"""
+import argparse
+import fcntl
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+
+JOBS_DIR = os.environ.get("JOBS_DIR", "data/jobs")
+# Folder job selesai yang disimpan; yang lebih lama dihapus saat job baru dimulai
+JOBS_KEEP = int(os.environ.get("JOBS_KEEP", 50))
+
+ACTIVE_STATUSES = ("pending", "running")
+
+
+def _now():
+    return time.time()
+
+
+def _write_json(path, data):
+    """Tulis atomik: pembaca tidak pernah melihat file yang setengah ditulis."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProgressReporter:
+    """Menambahkan baris progress (JSON) ke file progress job; no-op di luar job."""
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("JOB_PROGRESS_FILE")
+
+    def report(self, **fields):
+        if not self.path:
+            return
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"ts": _now(), **fields}) + "\n")
+
+
+class JobRunner:
+    """Registry job di disk: memulai, membaca status/progress dan membatalkan job."""
+
+    def __init__(self, jobs_dir=JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    @contextmanager
+    def _lock(self):
+        # Lock antar proses (beberapa worker Streamlit bisa berbagi JOBS_DIR)
+        with open(os.path.join(self.jobs_dir, ".lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def get(self, job_id):
+        """Metadata job, dengan status "lost" jika supervisor mati tanpa menulis status akhir."""
+        try:
+            with open(os.path.join(self._job_dir(job_id), "job.json")) as f:
+                job = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if job["status"] in ACTIVE_STATUSES and not _pid_alive(job.get("supervisor_pid")):
+            job["status"] = "lost"
+        return job
+
+    def list(self, kind=None):
+        """Semua job (terbaru dulu), opsional hanya satu kind."""
+        jobs = [self.get(name) for name in os.listdir(self.jobs_dir)
+                if os.path.isdir(self._job_dir(name))]
+        jobs = [job for job in jobs if job is not None and (kind is None or job["kind"] == kind)]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def active(self, kind):
+        """Job kind ini yang sedang berjalan, atau None."""
+        return next((job for job in self.list(kind) if job["status"] in ACTIVE_STATUSES), None)
+
+    def latest(self, kind):
+        jobs = self.list(kind)
+        return jobs[0] if jobs else None
+
+    def start(self, kind, command, params=None, cwd=None):
+        """
+        Memulai command sebagai job kind, kecuali sudah ada job kind yang aktif.
+        Mengembalikan (job, created); created False berarti job yang sudah berjalan dikembalikan.
+        """
+        with self._lock():
+            running = self.active(kind)
+            if running is not None:
+                return running, False
+            self._prune()
+
+            job_id = f"{kind}-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+            job_dir = self._job_dir(job_id)
+            os.makedirs(job_dir)
+            # Supervisor membaca job.json setelah lock dilepas, jadi job.json sudah lengkap
+            supervisor = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "supervise", os.path.abspath(job_dir)],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+            job = {
+                "id": job_id,
+                "kind": kind,
+                "params": params or {},
+                "command": [str(part) for part in command],
+                "cwd": os.path.abspath(cwd or os.getcwd()),
+                "status": "pending",
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "returncode": None,
+                "supervisor_pid": supervisor.pid,
+                "pid": None,
+            }
+            _write_json(os.path.join(job_dir, "job.json"), job)
+            return job, True
+
+    def _update(self, job_id, **fields):
+        path = os.path.join(self._job_dir(job_id), "job.json")
+        with self._lock():
+            with open(path) as f:
+                job = json.load(f)
+            job.update(fields)
+            _write_json(path, job)
+        return job
+
+    def _prune(self):
+        finished = [job for job in self.list() if job["status"] not in ACTIVE_STATUSES]
+        for job in finished[JOBS_KEEP:]:
+            job_dir = self._job_dir(job["id"])
+            for name in os.listdir(job_dir):
+                os.remove(os.path.join(job_dir, name))
+            os.rmdir(job_dir)
+
+    def progress(self, job_id):
+        """Semua baris progress job, urut waktu."""
+        path = os.path.join(self._job_dir(job_id), "progress.jsonl")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            lines = f.readlines()
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Baris terakhir bisa saja sedang ditulis
+                continue
+        return records
+
+    def log_tail(self, job_id, max_bytes=4096):
+        path = os.path.join(self._job_dir(job_id), "output.log")
+        if not os.path.exists(path):
+            return ""
+        with open(path, "rb") as f:
+            f.seek(max(0, os.path.getsize(path) - max_bytes))
+            return f.read().decode("utf-8", errors="replace")
+
+    def cancel(self, job_id):
+        """Meminta supervisor menghentikan job; status akhir ditulis oleh supervisor."""
+        job = self.get(job_id)
+        if job is None or job["status"] not in ACTIVE_STATUSES:
+            return False
+        os.kill(job["supervisor_pid"], signal.SIGTERM)
+        return True
+
+
+def supervise(job_dir):
+    """Menjalankan command job, meneruskan SIGTERM ke proses job dan mencatat status akhir."""
+    runner = JobRunner(os.path.dirname(job_dir))
+    job_id = os.path.basename(job_dir)
+    with runner._lock():
+        job = runner.get(job_id)
+    env = {**os.environ, "JOB_ID": job_id, "JOB_PROGRESS_FILE": os.path.join(job_dir, "progress.jsonl")}
+
+    with open(os.path.join(job_dir, "output.log"), "ab") as log:
+        try:
+            proc = subprocess.Popen(job["command"], cwd=job["cwd"], env=env,
+                                    stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+        except OSError as e:
+            log.write(f"Failed to start {job['command']}: {e}\n".encode())
+            runner._update(job_id, status="failed", finished_at=_now())
+            return 1
+
+        cancelled = []
+
+        def terminate(signum, frame):
+            cancelled.append(signum)
+            proc.terminate()
+
+        signal.signal(signal.SIGTERM, terminate)
+        runner._update(job_id, status="running", pid=proc.pid, started_at=_now())
+        returncode = proc.wait()
+
+    status = "cancelled" if cancelled else ("succeeded" if returncode == 0 else "failed")
+    runner._update(job_id, status=status, returncode=returncode, finished_at=_now())
+    return returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Background job runner")
+    sub = parser.add_subparsers(dest="command", required=True)
+    supervise_parser = sub.add_parser("supervise", help="Dipakai oleh JobRunner.start")
+    supervise_parser.add_argument("job_dir")
+    list_parser = sub.add_parser("list", help="Tampilkan job di registry")
+    list_parser.add_argument("--jobs-dir", default=JOBS_DIR)
+    args = parser.parse_args()
+
+    if args.command == "supervise":
+        sys.exit(supervise(args.job_dir))
+    for job in JobRunner(args.jobs_dir).list():
+        print(f"{job['id']}  {job['status']:<10} {' '.join(job['command'])}")
+
+
+if __name__ == "__main__":
+    main()
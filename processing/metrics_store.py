@@ -0,0 +1,113 @@
+"""
+Penyimpanan metrik streaming ringan berbasis SQLite.
+
+StreamingMetricsListener (StreamingQueryListener) mencatat satu baris per
+micro-batch: durasi batch, input/processed rows per detik, lag offset Kafka
+dan ukuran state store. Aplikasi Streamlit (app.py) membaca tabel yang sama
+untuk halaman Dashboard dan System Monitoring.
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from pyspark.sql.streaming import StreamingQueryListener
+
+METRICS_DB = os.environ.get("METRICS_DB", "data/metrics.db")
+
+# Baris metrik lebih lama dari ini dibuang supaya file tetap kecil
+METRICS_RETENTION_S = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stream_metrics (
+    query_name         TEXT NOT NULL,
+    batch_id           INTEGER NOT NULL,
+    ts                 REAL NOT NULL,
+    batch_duration_ms  INTEGER,
+    num_input_rows     INTEGER,
+    input_rows_per_s   REAL,
+    processed_rows_per_s REAL,
+    kafka_lag          INTEGER,
+    state_rows         INTEGER,
+    state_memory_bytes INTEGER,
+    state_update_ms    INTEGER,
+    PRIMARY KEY (query_name, batch_id)
+);
+CREATE INDEX IF NOT EXISTS stream_metrics_ts ON stream_metrics (ts);
+"""
+
+
+class MetricsStore:
+    """Tabel metrik per batch di satu file SQLite."""
+
+    def __init__(self, path=METRICS_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30, isolation_level=None))
+
+    def record(self, row):
+        """Menyimpan satu baris metrik (dict dengan kolom stream_metrics)."""
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        with self._connect() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO stream_metrics ({columns}) VALUES ({placeholders})",
+                         tuple(row.values()))
+            conn.execute("DELETE FROM stream_metrics WHERE ts < ?", (time.time() - METRICS_RETENTION_S,))
+
+
+def kafka_lag(progress):
+    """Total lag offset Kafka (offset terbaru - offset yang sudah diproses) di semua partisi."""
+    lag = 0
+    found = False
+    for source in progress.sources:
+        latest = source.latestOffset
+        processed = source.endOffset
+        if not latest or not processed:
+            continue
+        latest, processed = json.loads(latest), json.loads(processed)
+        for topic, partitions in latest.items():
+            for partition, offset in partitions.items():
+                lag += max(0, offset - processed.get(topic, {}).get(partition, offset))
+                found = True
+    return lag if found else None
+
+
+class StreamingMetricsListener(StreamingQueryListener):
+    """Mencatat progress setiap micro-batch ke MetricsStore."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def onQueryStarted(self, event):
+        print(f"Query started: {event.name} ({event.id})")
+
+    def onQueryProgress(self, event):
+        progress = event.progress
+        operators = progress.stateOperators or []
+        self.store.record({
+            "query_name": progress.name or str(progress.id),
+            "batch_id": progress.batchId,
+            "ts": time.time(),
+            "batch_duration_ms": progress.batchDuration,
+            "num_input_rows": progress.numInputRows,
+            "input_rows_per_s": progress.inputRowsPerSecond,
+            "processed_rows_per_s": progress.processedRowsPerSecond,
+            "kafka_lag": kafka_lag(progress),
+            "state_rows": sum(op.numRowsTotal for op in operators) if operators else None,
+            "state_memory_bytes": sum(op.memoryUsedBytes for op in operators) if operators else None,
+            "state_update_ms": sum(op.allUpdatesTimeMs for op in operators) if operators else None,
+        })
+
+    def onQueryIdle(self, event):
+        pass
+
+    def onQueryTerminated(self, event):
+        print(f"Query terminated: {event.id} {event.exception or ''}")
@@ -0,0 +1,28 @@
+"""
+Kunci preferensi dan urutan ranking yang dipakai bersama oleh job Spark
+(spark_utils.py, scoring.py) dan engine embedded (embedded.py).
+
+Modul ini tidak mengimpor pyspark, supaya engine embedded bisa berjalan tanpa
+Spark terpasang.
+"""
+
+# Kolom kunci preferensi dan nilai pengganti untuk field yang tidak diisi
+PREFERENCE_KEYS = ("genre", "artist_name", "language")
+WILDCARD = "*"
+
+# Urutan ranking default lagu dalam satu kunci preferensi
+RANK_ORDER = ("track_name", "track_id")
+
+SONG_COLUMNS = ("track_id", "track_name", "artist_name", "genre", "language")
+
+# Jumlah rekomendasi teratas per user di setiap micro-batch
+TOP_N = 5
+
+# Bobot per field untuk ranker scored; field WILDCARD (tidak diisi user) tidak menyumbang skor
+SCORE_WEIGHTS = {"genre": 0.5, "artist_name": 0.35, "language": 0.15}
+
+
+def normalize_key(genre, artist_name, language):
+    """Padanan Python dari normalize_preferences: field kosong/null menjadi WILDCARD."""
+    # trim() Spark hanya membuang spasi, bukan semua whitespace
+    return tuple((value or "").strip(" ") or WILDCARD for value in (genre, artist_name, language))
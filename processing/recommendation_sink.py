@@ -0,0 +1,126 @@
+"""
+Sink rekomendasi per user ke file SQLite (key-value berdasarkan user_id).
+
+Setiap micro-batch ditulis dalam satu transaksi: baris lama untuk user di
+batch tersebut dihapus, top-N baru dimasukkan, lalu batch_id dicatat di tabel
+applied_batches. Jika batch yang sama diputar ulang setelah crash (Spark
+memanggil foreachBatch lagi dengan batch_id yang sama), batch dilewati
+sehingga tidak ada baris ganda.
+
+Web membaca file yang sama dalam mode read-only (web/utils.py).
+"""
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+RECOMMENDATIONS_DB = os.environ.get("RECOMMENDATIONS_DB", "data/recommendations.db")
+
+RECOMMENDATION_COLUMNS = ("user_id", "rank", "track_id", "track_name", "artist_name", "genre", "language")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    user_id     TEXT NOT NULL,
+    rank        INTEGER NOT NULL,
+    track_id    TEXT NOT NULL,
+    track_name  TEXT,
+    artist_name TEXT,
+    genre       TEXT,
+    language    TEXT,
+    batch_id    INTEGER NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (user_id, rank)
+);
+CREATE TABLE IF NOT EXISTS applied_batches (
+    stream     TEXT NOT NULL,
+    batch_id   INTEGER NOT NULL,
+    num_rows   INTEGER NOT NULL,
+    applied_at REAL NOT NULL,
+    PRIMARY KEY (stream, batch_id)
+);
+"""
+
+
+class RecommendationSink:
+    """Sink idempotent per (stream, batch_id) di atas satu file SQLite."""
+
+    def __init__(self, path=RECOMMENDATIONS_DB, stream="spark_train"):
+        self.path = path
+        self.stream = stream
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, timeout=30, isolation_level=None))
+
+    def is_applied(self, batch_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM applied_batches WHERE stream = ? AND batch_id = ?",
+                (self.stream, batch_id),
+            ).fetchone()
+        return row is not None
+
+    def write_batch(self, batch_id, rows):
+        """
+        Menulis top-N per user untuk satu batch. rows berisi tuple/Row dengan
+        urutan RECOMMENDATION_COLUMNS. Mengembalikan False jika batch sudah pernah ditulis.
+        """
+        rows = [tuple(row) for row in rows]
+        now = time.time()
+        with self._connect() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                applied = conn.execute(
+                    "SELECT 1 FROM applied_batches WHERE stream = ? AND batch_id = ?",
+                    (self.stream, batch_id),
+                ).fetchone()
+                if applied is not None:
+                    conn.execute("ROLLBACK")
+                    return False
+
+                users = {(row[0],) for row in rows}
+                conn.executemany("DELETE FROM recommendations WHERE user_id = ?", users)
+                conn.executemany(
+                    "INSERT INTO recommendations "
+                    "(user_id, rank, track_id, track_name, artist_name, genre, language, batch_id, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [row + (batch_id, now) for row in rows],
+                )
+                conn.execute(
+                    "INSERT INTO applied_batches (stream, batch_id, num_rows, applied_at) VALUES (?, ?, ?, ?)",
+                    (self.stream, batch_id, len(rows), now),
+                )
+                conn.execute("COMMIT")
+                return True
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def applied_per_hour(self, since=0.0):
+        """
+        (awal jam epoch detik, jumlah baris, jumlah batch, batch_id terakhir) per
+        jam penulisan untuk stream ini, mulai dari jam yang memuat since.
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT CAST(applied_at / 3600 AS INTEGER) * 3600 AS hour, SUM(num_rows), COUNT(*), MAX(batch_id) "
+                "FROM applied_batches WHERE stream = ? AND applied_at >= ? GROUP BY hour ORDER BY hour",
+                (self.stream, since - since % 3600),
+            ).fetchall()
+
+    def get(self, user_id, limit=None):
+        """Point lookup rekomendasi satu user, diurutkan berdasarkan rank."""
+        query = "SELECT * FROM recommendations WHERE user_id = ? ORDER BY rank"
+        params = (user_id,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(query, params)]
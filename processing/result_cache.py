@@ -0,0 +1,68 @@
+"""
+Cache hasil rekomendasi di driver yang bertahan lintas micro-batch.
+
+Banyak user di topik user-preference mengirim kombinasi (genre, artist,
+language) yang sama. Daftar lagu berperingkat untuk satu kunci preferensi
+hanya bergantung pada kunci tersebut dan versi index/katalog, jadi hasilnya
+disimpan di sini dan batch berikutnya hanya menjalankan Spark untuk kunci
+yang belum pernah dihitung.
+
+Kunci cache = (versi, genre, artist_name, language) setelah normalisasi yang
+sama dengan spark_utils.normalize_preferences (preferences.normalize_key).
+Saat index berganti versi, entri versi lama tidak pernah cocok lagi dan
+terbuang dengan sendirinya oleh LRU.
+
+Dipakai dari foreachBatch (satu thread driver), jadi tidak memakai lock.
+"""
+import os
+from collections import OrderedDict
+
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 100_000))
+
+
+class ResultCache:
+    """Cache LRU daftar berperingkat per (versi, kunci preferensi) dengan statistik hit."""
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, version, keys):
+        """Mengembalikan (ditemukan: kunci -> daftar, kunci yang belum ada di cache)."""
+        found, missing = {}, []
+        for key in keys:
+            ranked = self._data.get((version, key))
+            if ranked is None:
+                missing.append(key)
+                continue
+            self._data.move_to_end((version, key))
+            found[key] = ranked
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def put(self, version, key, ranked):
+        if self.maxsize <= 0:
+            return
+        self._data[(version, key)] = ranked
+        self._data.move_to_end((version, key))
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
@@ -0,0 +1,137 @@
+"""
+Rollup dashboard yang dipelihara secara inkremental oleh pipeline streaming.
+
+Tabel (masing-masing satu file Parquet kecil di music-data/rollups/):
+
+  events_hour / events_day : per (period_start, genre) jumlah event dan user
+      aktif (approx_count_distinct). Baris dengan genre WILDCARD ("*") berisi
+      total semua genre, karena user aktif tidak bisa dijumlahkan antar genre.
+  served_hour              : per (period_start, stream) jumlah rekomendasi
+      yang ditulis ke sink dan jumlah micro-batch, diturunkan dari tabel
+      applied_batches di sink.
+
+Agregasi event memakai window waktu kedatangan Kafka dengan watermark
+ROLLUP_WATERMARK, jadi state Spark hanya menyimpan window yang masih terbuka.
+Setiap micro-batch (outputMode update) hanya berisi window yang berubah,
+dengan nilai lengkapnya; baris tersebut di-upsert ke tabel di driver. Karena
+upsert menimpa berdasarkan kunci, batch yang diputar ulang tidak menggandakan
+angka. served_hour dihitung ulang dari applied_batches, yang ditulis dalam
+transaksi yang sama dengan rekomendasinya; crash setelah penulisan sink tidak
+membuat batch hilang dari hitungan, dan batch yang diputar ulang tidak dihitung dua kali.
+
+Semua period_start dalam UTC (spark.sql.session.timeZone di spark_train.py).
+
+Ukuran tabel dibatasi retensi (ROLLUP_RETENTION_S), bukan panjang histori
+event, jadi biaya membaca tabel di dashboard tetap konstan.
+"""
+import io
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyspark.sql.functions import approx_count_distinct, array, coalesce, col, count, explode, lit, window
+
+from spark_utils import ROLLUP_PATH, WILDCARD, read_bytes_file, write_bytes_file
+
+ROLLUP_WATERMARK = os.environ.get("ROLLUP_WATERMARK", "2 minutes")
+
+# Ukuran window per grain
+ROLLUP_GRAINS = {"hour": "1 hour", "day": "1 day"}
+ROLLUP_RETENTION_S = {"hour": 35 * 24 * 3600, "day": 400 * 24 * 3600}
+
+UNKNOWN_GENRE = "unknown"
+
+
+def aggregate_events(events, grain):
+    """
+    Event per (window, genre) dan user aktif per window. events adalah stream
+    dari read_preferences (kolom kafka_ts = waktu kedatangan di Kafka).
+    """
+    return events \
+        .withWatermark("kafka_ts", ROLLUP_WATERMARK) \
+        .withColumn("genre", explode(array(coalesce(col("genre"), lit(UNKNOWN_GENRE)), lit(WILDCARD)))) \
+        .groupBy(window("kafka_ts", ROLLUP_GRAINS[grain]), "genre") \
+        .agg(count(lit(1)).alias("events"), approx_count_distinct("user_id").alias("active_users")) \
+        .select(col("window.start").alias("period_start"), "genre", "events", "active_users")
+
+
+class RollupTable:
+    """Satu tabel rollup kecil: dibaca utuh, di-upsert di pandas, ditulis ulang sebagai satu objek."""
+
+    def __init__(self, spark, name, keys, retention_s, path=ROLLUP_PATH):
+        self.spark = spark
+        self.name = name
+        self.keys = list(keys)
+        self.retention_s = retention_s
+        self.path = f"{path}/{name}.parquet"
+
+    def read(self):
+        data = read_bytes_file(self.spark, self.path)
+        if data is None:
+            return None
+        return pq.read_table(io.BytesIO(data)).to_pandas()
+
+    def write(self, df):
+        buffer = io.BytesIO()
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer, compression="snappy")
+        write_bytes_file(self.spark, self.path, buffer.getvalue())
+
+    def upsert(self, updates, current=None):
+        """
+        Menimpa baris dengan kunci yang sama, lalu membuang periode di luar retensi.
+        current adalah isi tabel jika pemanggil sudah membacanya.
+        """
+        current = self.read() if current is None else current
+        if current is not None:
+            updates = pd.concat([current, updates], ignore_index=True) \
+                .drop_duplicates(subset=self.keys, keep="last")
+        cutoff = pd.Timestamp(time.time() - self.retention_s, unit="s")
+        updates = updates[updates["period_start"] >= cutoff]
+        self.write(updates.sort_values(self.keys).reset_index(drop=True))
+        return len(updates)
+
+    def write_batch(self, batch_df, batch_id):
+        """foreachBatch: window yang berubah di micro-batch ini (hasilnya kecil, dikumpulkan ke driver)."""
+        updates = batch_df.toPandas()
+        if updates.empty:
+            return
+        rows = self.upsert(updates)
+        print(f"Rollup {self.name} batch {batch_id}: {len(updates)} windows updated, {rows} rows in table")
+
+
+def events_table(spark, grain):
+    return RollupTable(spark, f"events_{grain}", ("period_start", "genre"), ROLLUP_RETENTION_S[grain])
+
+
+class ServedRollup(RollupTable):
+    """
+    Rekomendasi yang ditulis ke sink per jam (waktu penulisan) per stream
+    (checkpoint). Nilainya diturunkan dari applied_batches di RecommendationSink,
+    bukan dijumlahkan per batch, jadi selalu sama dengan isi sink.
+    """
+
+    def __init__(self, spark, stream, path=ROLLUP_PATH):
+        super().__init__(spark, "served_hour", ("period_start", "stream"), ROLLUP_RETENTION_S["hour"], path)
+        self.stream = stream
+
+    def refresh(self, sink):
+        """
+        Menghitung ulang jam terakhir di tabel dan jam sesudahnya dari sink; jam
+        sebelumnya sudah lengkap. Mengembalikan jumlah jam yang diperbarui.
+        """
+        current = self.read()
+        since = 0.0
+        if current is not None:
+            stream_rows = current[current["stream"] == self.stream]
+            if len(stream_rows):
+                since = stream_rows["period_start"].max().timestamp()
+        hours = sink.applied_per_hour(since)
+        if not hours:
+            return 0
+        updates = pd.DataFrame(hours, columns=["period_start", "recommendations", "batches", "last_batch_id"])
+        updates["period_start"] = pd.to_datetime(updates["period_start"], unit="s")
+        updates.insert(1, "stream", self.stream)
+        self.upsert(updates, current)
+        return len(updates)
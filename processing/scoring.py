@@ -0,0 +1,173 @@
+"""
+Ranker skor berbobot untuk preferensi (genre, artist_name, language).
+
+Join exact di spark_train.py hanya mengembalikan lagu yang cocok di ketiga
+field sekaligus. Ranker ini memberi setiap lagu di katalog skor
+
+    SCORE_WEIGHTS[genre] * cocok(genre) + SCORE_WEIGHTS[artist_name] * cocok(artist_name)
+        + SCORE_WEIGHTS[language] * cocok(language)
+
+sehingga kecocokan parsial tetap menghasilkan rekomendasi, terurut dari yang
+paling relevan. Field WILDCARD (tidak diisi user) tidak menyumbang skor; lagu
+dengan skor 0 tidak pernah direkomendasikan.
+
+Eksekusi (score_keys):
+  1. mapInPandas atas katalog (transfer Arrow): setiap partisi menghitung skor
+     untuk semua kunci preferensi secara columnar dengan numpy (kode kategori
+     integer dan kelompok baris per kode, bukan perbandingan string per baris),
+     lalu memilih top-K per kunci dengan np.argpartition. Kunci preferensi dikirim sebagai broadcast variable.
+  2. applyInPandas per kunci menggabungkan top-K dari semua partisi.
+
+Urutan antar lagu dengan skor sama: track_name lalu track_id, sama dengan
+ranking join exact.
+"""
+import numpy as np
+import pandas as pd
+from pyspark.sql.types import DoubleType, IntegerType, StringType, StructField, StructType
+
+from preferences import PREFERENCE_KEYS, SCORE_WEIGHTS, WILDCARD
+
+SCORED_SCHEMA = StructType(
+    [StructField(key, StringType()) for key in PREFERENCE_KEYS] + [
+        StructField("key_rank", IntegerType()),
+        StructField("track_id", StringType()),
+        StructField("track_name", StringType()),
+        StructField("score", DoubleType()),
+    ]
+)
+SCORED_COLUMNS = tuple(field.name for field in SCORED_SCHEMA.fields)
+
+
+def pattern_ranks(weights=SCORE_WEIGHTS):
+    """
+    Skor dan peringkat skor (0 = terbaik) untuk 8 pola kecocokan; bit ke-i pola
+    menandai PREFERENCE_KEYS[i] cocok. Pola dengan skor sama mendapat peringkat sama.
+    """
+    field_weights = np.array([weights[key] for key in PREFERENCE_KEYS], dtype=np.float64)
+    bits = (np.arange(8)[:, None] >> np.arange(len(PREFERENCE_KEYS))) & 1
+    scores = bits @ field_weights
+    ranks = np.unique(-scores, return_inverse=True)[1].reshape(-1)
+    return scores, ranks.astype(np.int64)
+
+
+def _empty_scored():
+    return pd.DataFrame({name: pd.Series(dtype="object") for name in SCORED_COLUMNS}) \
+        .astype({"key_rank": "int32", "score": "float64"})
+
+
+def score_partition(songs, keys, top_k, weights=SCORE_WEIGHTS):
+    """
+    Top-K lagu per kunci preferensi untuk satu potongan katalog (DataFrame pandas
+    dengan track_id, track_name dan PREFERENCE_KEYS). keys berisi tuple yang sudah
+    dinormalisasi (normalize_preferences). Mengembalikan DataFrame SCORED_COLUMNS.
+    """
+    n = len(songs)
+    if n == 0 or not keys:
+        return _empty_scored()
+
+    # Setiap field diubah menjadi kode integer sekali per potongan, lalu baris
+    # dikelompokkan per kode (inverted index); nilai kunci yang tidak ada di
+    # potongan ini tidak cocok dengan baris mana pun
+    groups = []
+    for key in PREFERENCE_KEYS:
+        codes, uniques = pd.factorize(songs[key])
+        rows_by_code = np.argsort(codes, kind="stable")
+        # factorize memberi -1 untuk null; kode c menempati bounds[c]:bounds[c + 1]
+        bounds = np.searchsorted(codes[rows_by_code], np.arange(len(uniques) + 1))
+        groups.append(({value: code for code, value in enumerate(uniques)}, rows_by_code, bounds))
+
+    track_ids = songs["track_id"].to_numpy(dtype=object)
+    track_names = songs["track_name"].to_numpy(dtype=object)
+    # Peringkat (track_name, track_id) di potongan ini sebagai pemecah skor sama
+    order = np.lexsort((songs["track_id"].fillna("").to_numpy(dtype=str),
+                        songs["track_name"].fillna("").to_numpy(dtype=str)))
+    tiebreak = np.empty(n, dtype=np.int64)
+    tiebreak[order] = np.arange(n)
+    scores, ranks = pattern_ranks(weights)
+
+    out_keys, out_rows, out_patterns, out_ranks = [], [], [], []
+    # Pola kecocokan per baris; hanya baris kandidat yang disentuh lalu di-reset
+    pattern = np.zeros(n, dtype=np.uint8)
+    for key in keys:
+        matched = []
+        for bit, (value, (lookup, rows_by_code, bounds)) in enumerate(zip(key, groups)):
+            code = lookup.get(value) if value != WILDCARD else None
+            if code is None:
+                continue
+            rows = rows_by_code[bounds[code]:bounds[code + 1]]
+            pattern[rows] |= np.uint8(1 << bit)
+            matched.append((bit, rows))
+        if not matched:
+            continue
+
+        # Gabungan kelompok tanpa duplikat: baris dari kelompok berikutnya hanya
+        # diambil jika belum cocok dengan field kelompok sebelumnya
+        seen_bits = 0
+        parts = []
+        for bit, rows in matched:
+            parts.append(rows[(pattern[rows] & seen_bits) == 0] if seen_bits else rows)
+            seen_bits |= 1 << bit
+        candidates = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        candidate_patterns = pattern[candidates]
+        pattern[candidates] = 0
+
+        # Satu kunci integer: peringkat skor dulu, lalu urutan nama; argpartition
+        # memilih top-K dalam O(n), hanya K baris itu yang diurutkan
+        composite = ranks[candidate_patterns] * n + tiebreak[candidates]
+        k = min(top_k, len(candidates))
+        top = np.argpartition(composite, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+        top = top[np.argsort(composite[top])]
+
+        out_keys.extend([key] * k)
+        out_rows.append(candidates[top])
+        out_patterns.append(candidate_patterns[top])
+        out_ranks.append(np.arange(k, dtype=np.int32))
+
+    if not out_rows:
+        return _empty_scored()
+    rows = np.concatenate(out_rows)
+    result = pd.DataFrame(out_keys, columns=list(PREFERENCE_KEYS))
+    result["key_rank"] = np.concatenate(out_ranks)
+    result["track_id"] = track_ids[rows]
+    result["track_name"] = track_names[rows]
+    result["score"] = scores[np.concatenate(out_patterns)]
+    return result
+
+
+def merge_top_k(partials, top_k):
+    """Menggabungkan top-K beberapa partisi untuk satu kunci menjadi top-K global."""
+    merged = partials \
+        .sort_values(["score", "track_name", "track_id"], ascending=[False, True, True], na_position="first") \
+        .drop_duplicates("track_id") \
+        .head(top_k) \
+        .reset_index(drop=True)
+    merged["key_rank"] = np.arange(len(merged), dtype=np.int32)
+    return merged[list(SCORED_COLUMNS)]
+
+
+def score_keys(spark, songs, keys, top_k, weights=SCORE_WEIGHTS, broadcasts=None):
+    """
+    Top-K lagu per kunci preferensi atas seluruh katalog songs (DataFrame Spark).
+    keys adalah list tuple yang sudah dinormalisasi; hasilnya DataFrame SCORED_SCHEMA.
+
+    Kunci dikirim sebagai broadcast variable yang dipakai sampai hasilnya
+    dieksekusi. Jika broadcasts (list) diberikan, broadcast tersebut ditambahkan
+    ke sana supaya pemanggil bisa menghapusnya (destroy) setelah action selesai;
+    tanpa itu setiap pemanggilan di stream panjang menambah memori executor.
+    """
+    keys_bc = spark.sparkContext.broadcast([tuple(key) for key in keys])
+    if broadcasts is not None:
+        broadcasts.append(keys_bc)
+
+    def score_batches(batches):
+        # Batch Arrow satu partisi digabung dulu, jadi top-K per kunci dihitung
+        # sekali per partisi (ukuran partisi katalog yang di-cache kecil)
+        frames = list(batches)
+        if frames:
+            yield score_partition(pd.concat(frames, ignore_index=True), keys_bc.value, top_k, weights)
+
+    return songs \
+        .select("track_id", "track_name", *PREFERENCE_KEYS) \
+        .mapInPandas(score_batches, SCORED_SCHEMA) \
+        .groupBy(*PREFERENCE_KEYS) \
+        .applyInPandas(lambda partials: merge_top_k(partials, top_k), SCORED_SCHEMA)
@@ -1,77 +1,433 @@
-from pyspark.sql import SparkSession
-from pyspark.sql.functions import col
-from pyspark.sql.types import StructType, StringType
-from pyspark.sql.streaming import DataStreamWriter
-
-# 1. Inisialisasi SparkSession
-spark = SparkSession.builder \
-    .appName("SongRecommender") \
-    .config("spark.sql.shuffle.partitions", "2") \
-    .getOrCreate()
-
-spark.sparkContext.setLogLevel("WARN")
-
-# 2. Load Data Lagu dari MinIO (CSV)
-song_df = spark.read.csv(
-    "s3a://music-data/Music Info.csv",  # nama bucket & file di MinIO
-    header=True,
-    inferSchema=True
-).select("track_id", "track_name", "artist_name", "genre", "language")
-
-# 3. Konfigurasi koneksi ke MinIO
-hadoop_conf = spark._jsc.hadoopConfiguration()
-hadoop_conf.set("fs.s3a.access.key", "minioadmin")
-hadoop_conf.set("fs.s3a.secret.key", "minioadmin")
-hadoop_conf.set("fs.s3a.endpoint", "http://minio:9000")
-hadoop_conf.set("fs.s3a.path.style.access", "true")
-hadoop_conf.set("fs.s3a.impl", "org.apache.hadoop.fs.s3a.S3AFileSystem")
-
-# 4. Baca data preferensi user dari Kafka
-kafka_df = spark.readStream \
-    .format("kafka") \
-    .option("kafka.bootstrap.servers", "kafka:9092") \
-    .option("subscribe", "user-preference") \
-    .load()
-
-# 5. Parse nilai JSON dari Kafka
-json_schema = StructType() \
-    .add("user_id", StringType()) \
-    .add("genre", StringType()) \
-    .add("artist", StringType()) \
-    .add("language", StringType()) \
-    .add("timestamp", StringType())
-
-from pyspark.sql.functions import from_json
-
-user_pref_df = kafka_df.selectExpr("CAST(value AS STRING)") \
-    .select(from_json(col("value"), json_schema).alias("data")) \
-    .select("data.*")
-
-# 6. Join preferensi user dengan data lagu
-def generate_recommendation(batch_df, batch_id):
-    print(f"Processing batch {batch_id}...")
-    batch_df.createOrReplaceTempView("user_pref")
-
-    for row in batch_df.collect():
-        genre = row['genre']
-        artist = row['artist']
-        language = row['language']
-        user_id = row['user_id']
-
-        # Filter lagu berdasarkan preferensi
-        filtered = song_df.filter(
-            (col("genre") == genre) &
-            (col("artist_name") == artist) &
-            (col("language") == language)
+"""
+Streaming rekomendasi lagu dari topik Kafka user-preference.
+
+Alur: event preferensi -> profil per user (stateful, event time + watermark)
+-> lookup index / join katalog per micro-batch -> sink rekomendasi (SQLite).
+Query terpisah pada stream yang sama memelihara rollup dashboard per jam/hari
+(rollups.py).
+
+Semua pengaturan bisa diberikan lewat argumen atau environment variable:
+checkpoint (lokal atau s3a://), interval trigger, batas offset per trigger
+(backpressure) dan jumlah partisi shuffle awal. Dengan checkpoint yang sama,
+query melanjutkan dari offset terakhir setelah restart; karena sink idempotent
+pada batch_id, batch yang diputar ulang tidak menghasilkan baris ganda.
+
+Daftar lagu berperingkat per kunci preferensi disimpan di cache LRU driver
+(result_cache.py) lintas micro-batch, dengan kunci (versi index, genre, artist,
+language). Spark hanya dijalankan untuk kunci yang belum ada di cache;
+--result-cache-size 0 kembali ke satu join per batch tanpa cache. Versi index
+diperiksa setiap INDEX_CHECK_INTERVAL_S dan dimuat ulang jika berganti.
+
+--ranker scored mengganti join exact dengan ranker skor berbobot (scoring.py):
+kecocokan parsial ikut diranking, dihitung dengan pandas UDF di atas katalog.
+
+Jalankan:
+    spark-submit processing/spark_train.py [--checkpoint PATH] [--trigger-interval "10 seconds"]
+        [--max-offsets-per-trigger 10000] [--result-cache-size 100000] [--ranker scored] [--available-now]
+"""
+import argparse
+import json
+import os
+import time
+
+from pyspark.sql import Window
+from pyspark.sql.functions import (
+    arrays_zip, broadcast, coalesce, col, current_timestamp, from_json, lit, posexplode, row_number,
+    to_timestamp, unix_millis
+)
+from pyspark.sql.streaming.state import GroupStateTimeout
+from pyspark.sql.types import StringType, StructField, StructType
+
+from spark_utils import (
+    EVENT_SCHEMA, KAFKA_BOOTSTRAP_SERVERS, MUSIC_BUCKET, PREFERENCE_KEYS, PREFERENCE_TOPIC,
+    build_spark, current_index_path, key_pattern_column, load_songs, normalize_preferences
+)
+from metrics_store import METRICS_DB, MetricsStore, StreamingMetricsListener
+from recommendation_sink import RECOMMENDATION_COLUMNS, RECOMMENDATIONS_DB, RecommendationSink
+from preferences import TOP_N, normalize_key
+from result_cache import RESULT_CACHE_SIZE, ResultCache
+from scoring import score_keys
+from rollups import ROLLUP_GRAINS, ServedRollup, aggregate_events, events_table
+from user_profile import PROFILE_OUTPUT_SCHEMA, PROFILE_STATE_SCHEMA, update_profile
+
+METRICS_INTERVAL_S = 30
+
+# Seberapa sering driver memeriksa pointer _CURRENT index preferensi
+INDEX_CHECK_INTERVAL_S = float(os.environ.get("INDEX_CHECK_INTERVAL_S", 300))
+
+# exact: join index/katalog pada ketiga field; scored: skor berbobot (scoring.py)
+RANKERS = ("exact", "scored")
+
+KEY_SCHEMA = StructType([StructField(key, StringType()) for key in PREFERENCE_KEYS])
+
+
+def parse_args(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Streaming song recommender")
+    parser.add_argument("--checkpoint", default=env("CHECKPOINT_LOCATION", f"{MUSIC_BUCKET}/checkpoints/spark_train"),
+                        help="Lokasi checkpoint (path lokal atau s3a://)")
+    parser.add_argument("--trigger-interval", default=env("TRIGGER_INTERVAL", "10 seconds"))
+    parser.add_argument("--max-offsets-per-trigger", type=int, default=int(env("MAX_OFFSETS_PER_TRIGGER", 10000)),
+                        help="Batas event Kafka per micro-batch (backpressure)")
+    parser.add_argument("--starting-offsets", default=env("STARTING_OFFSETS", "latest"),
+                        help="Hanya dipakai saat checkpoint masih kosong")
+    parser.add_argument("--shuffle-partitions", type=int, default=int(env("SHUFFLE_PARTITIONS", 8)),
+                        help="Partisi shuffle awal; AQE menggabungkan partisi kecil saat runtime")
+    parser.add_argument("--watermark-delay", default=env("WATERMARK_DELAY", "10 minutes"),
+                        help="Batas keterlambatan event sebelum state profil boleh dibersihkan")
+    parser.add_argument("--top-n", type=int, default=TOP_N)
+    parser.add_argument("--sink-db", default=RECOMMENDATIONS_DB)
+    parser.add_argument("--metrics-db", default=METRICS_DB)
+    parser.add_argument("--result-cache-size", type=int, default=RESULT_CACHE_SIZE,
+                        help="Jumlah kunci preferensi di cache hasil driver; 0 = tanpa cache")
+    parser.add_argument("--ranker", default=env("RANKER", "exact"), choices=RANKERS)
+    parser.add_argument("--rollups", action=argparse.BooleanOptionalAction, default=env("ROLLUPS", "1") != "0",
+                        help="Pelihara rollup dashboard (events_hour/events_day/served_hour)")
+    parser.add_argument("--available-now", action="store_true",
+                        help="Proses semua offset yang tersedia (tetap dibatasi per batch) lalu berhenti")
+    return parser.parse_args(argv)
+
+
+def spark_conf(args):
+    # Catatan: jumlah partisi state store (profil) ditetapkan saat checkpoint
+    # pertama kali dibuat; AQE hanya berlaku untuk query di dalam foreachBatch.
+    return {
+        "spark.sql.shuffle.partitions": str(args.shuffle_partitions),
+        # Timestamp event dari producer dalam UTC; window rollup juga dinyatakan dalam UTC
+        "spark.sql.session.timeZone": "UTC",
+        "spark.sql.adaptive.enabled": "true",
+        "spark.sql.adaptive.coalescePartitions.enabled": "true",
+        "spark.sql.adaptive.skewJoin.enabled": "true",
+        # Transfer Arrow untuk pandas UDF ranker scored dan collect/createDataFrame di driver
+        "spark.sql.execution.arrow.pyspark.enabled": "true",
+        "spark.sql.execution.arrow.maxRecordsPerBatch": "50000",
+        "spark.sql.streaming.stateStore.providerClass":
+            "org.apache.spark.sql.execution.streaming.state.RocksDBStateStoreProvider",
+    }
+
+
+class RecommendationJob:
+    """Menyimpan katalog/index yang sudah di-cache dan menulis hasil tiap micro-batch ke sink."""
+
+    # Seluruh batch di-join sekaligus dengan index (lookup kunci) atau katalog
+    # (broadcast) pada (genre, artist_name, language), lalu diranking per user
+    # dengan window function. Hasilnya satu job Spark per batch, bukan satu scan
+    # katalog per event. Window dibuat saat dipakai: Window.partitionBy butuh
+    # SparkContext aktif, yang belum ada saat modul diimpor.
+    rank_order = ("key_rank", "track_name", "track_id")
+
+    def __init__(self, spark, sink, top_n=TOP_N, song_df=None, index_df=None, served=None,
+                 version=None, result_cache=None, ranker="exact", check_interval_s=None):
+        self.spark = spark
+        self.sink = sink
+        self.served = served
+        self.top_n = top_n
+        self.song_df = song_df
+        self.index_df = index_df
+        self.version = version
+        self.result_cache = result_cache
+        self.ranker = ranker
+        # None: index tidak pernah dimuat ulang (mis. katalog lokal di benchmark)
+        self.check_interval_s = check_interval_s
+        self.checked_at = time.monotonic()
+        # Broadcast kunci dari score_keys; dihapus setelah batch selesai
+        self.broadcasts = []
+
+    @staticmethod
+    def load_storage(spark, ranker="exact"):
+        """
+        (index_df, song_df, versi): index preferensi (build_index.py), atau katalog
+        lagu jika index belum ada. Ranker scored selalu memakai katalog.
+        """
+        index_path = current_index_path(spark) if ranker == "exact" else None
+        if index_path is not None:
+            index_df = spark.read.parquet(f"{index_path}/index").cache()
+            print(f"Using preference index {index_path} ({index_df.count()} keys)")
+            return index_df, None, index_path
+
+        # Katalog di-cache sekali di awal supaya setiap micro-batch tidak membaca
+        # ulang dari MinIO, lalu di-broadcast saat join dengan preferensi user.
+        song_df = load_songs(spark).cache()
+        print(f"{'Scored ranker' if ranker == 'scored' else 'Preference index not found'}, "
+              f"loaded {song_df.count()} songs into cache")
+        return None, song_df, "catalog"
+
+    @classmethod
+    def from_storage(cls, spark, sink, top_n=TOP_N, served=None, result_cache=None, ranker="exact"):
+        index_df, song_df, version = cls.load_storage(spark, ranker)
+        return cls(spark, sink, top_n, song_df=song_df, index_df=index_df, served=served,
+                   version=version, result_cache=result_cache, ranker=ranker,
+                   check_interval_s=INDEX_CHECK_INTERVAL_S)
+
+    def refresh_storage(self):
+        """Memuat ulang index jika pointer _CURRENT berganti (diperiksa paling sering check_interval_s)."""
+        if self.check_interval_s is None or self.ranker == "scored" \
+                or time.monotonic() - self.checked_at < self.check_interval_s:
+            return
+        self.checked_at = time.monotonic()
+        if (current_index_path(self.spark) or "catalog") == self.version:
+            return
+        previous = self.index_df if self.index_df is not None else self.song_df
+        self.index_df, self.song_df, self.version = self.load_storage(self.spark)
+        # Entri cache versi lama tidak cocok lagi dan terbuang oleh LRU
+        previous.unpersist()
+
+    def lookup_index(self, prefs):
+        """Jawab preferensi dengan lookup kunci di index (termasuk kunci parsial)."""
+        extra = [name for name in prefs.columns if name not in PREFERENCE_KEYS]
+        prefs = normalize_preferences(prefs).withColumn("key_pattern", key_pattern_column())
+        return self.index_df \
+            .join(broadcast(prefs), on=["key_pattern", *PREFERENCE_KEYS], how="inner") \
+            .select(*extra, *PREFERENCE_KEYS,
+                    posexplode(arrays_zip("track_ids", "track_names")).alias("key_rank", "track")) \
+            .select(*extra, *PREFERENCE_KEYS, "key_rank",
+                    col("track.track_ids").alias("track_id"), col("track.track_names").alias("track_name"))
+
+    def match_catalog(self, prefs):
+        """Fallback tanpa index: join exact dengan katalog yang di-broadcast."""
+        extra = [name for name in prefs.columns if name not in PREFERENCE_KEYS]
+        return prefs \
+            .join(broadcast(self.song_df), on=list(PREFERENCE_KEYS), how="inner") \
+            .select(*extra, *PREFERENCE_KEYS, "track_id", "track_name") \
+            .withColumn("key_rank", lit(0))
+
+    def score_catalog(self, prefs):
+        """Ranker scored: top-N berbobot per kunci preferensi, di-join kembali ke preferensi."""
+        extra = [name for name in prefs.columns if name not in PREFERENCE_KEYS]
+        prefs = normalize_preferences(prefs)
+        keys = [tuple(row) for row in prefs.select(*PREFERENCE_KEYS).distinct().collect()]
+        return score_keys(self.spark, self.song_df, keys, self.top_n, broadcasts=self.broadcasts) \
+            .join(broadcast(prefs), on=list(PREFERENCE_KEYS), how="inner") \
+            .select(*extra, *PREFERENCE_KEYS, "key_rank", "track_id", "track_name")
+
+    def candidates(self, prefs):
+        if self.ranker == "scored":
+            return self.score_catalog(prefs)
+        return self.lookup_index(prefs) if self.index_df is not None else self.match_catalog(prefs)
+
+    def preferences(self, batch_df):
+        return batch_df \
+            .select("user_id", "genre", col("artist").alias("artist_name"), "language") \
+            .dropDuplicates()
+
+    def recommend(self, batch_df):
+        """Top-N rekomendasi per user untuk satu batch preferensi (DataFrame)."""
+        return self.candidates(self.preferences(batch_df)) \
+            .dropDuplicates(["user_id", "track_id"]) \
+            .withColumn("rank", row_number().over(Window.partitionBy("user_id").orderBy(*self.rank_order))) \
+            .filter(col("rank") <= self.top_n) \
+            .select(*RECOMMENDATION_COLUMNS)
+
+    def rank_keys(self, keys):
+        """Top-N (key_rank, track_id, track_name) per kunci preferensi yang sudah dinormalisasi."""
+        ranked = {key: [] for key in keys}
+        if self.ranker == "scored":
+            # Kunci sudah ada di driver; score_keys sudah memberi top-N per kunci
+            rows = score_keys(self.spark, self.song_df, keys, self.top_n, broadcasts=self.broadcasts) \
+                .withColumn("rank", col("key_rank") + 1) \
+                .collect()
+        else:
+            window = Window.partitionBy(*PREFERENCE_KEYS).orderBy(*self.rank_order)
+            rows = self.candidates(self.spark.createDataFrame(keys, KEY_SCHEMA)) \
+                .dropDuplicates([*PREFERENCE_KEYS, "track_id"]) \
+                .withColumn("rank", row_number().over(window)) \
+                .filter(col("rank") <= self.top_n) \
+                .collect()
+        for row in sorted(rows, key=lambda row: row["rank"]):
+            ranked[tuple(row[key] for key in PREFERENCE_KEYS)].append(
+                (row["key_rank"], row["track_id"], row["track_name"]))
+        return ranked
+
+    def recommend_cached(self, batch_df, batch_id):
+        """
+        Top-N per user dari cache hasil; hanya kunci yang belum ada di cache
+        dihitung dengan Spark (satu job untuk semua kunci tersebut). Mengembalikan
+        tuple berurutan RECOMMENDATION_COLUMNS.
+        """
+        user_keys = {}
+        for row in self.preferences(batch_df).collect():
+            user_keys.setdefault(row["user_id"], set()).add(
+                normalize_key(row["genre"], row["artist_name"], row["language"]))
+
+        keys = set().union(*user_keys.values())
+        ranked, missing = self.result_cache.lookup(self.version, keys)
+        if missing:
+            computed = self.rank_keys(missing)
+            for key, tracks in computed.items():
+                self.result_cache.put(self.version, key, tracks)
+            ranked.update(computed)
+
+        print(json.dumps({"batch_id": batch_id, "result_cache_keys": len(keys),
+                          "result_cache_batch_hits": len(keys) - len(missing),
+                          **{f"result_cache_{name}": value for name, value in self.result_cache.stats().items()}}))
+
+        rows = []
+        for user_id, user_key_set in user_keys.items():
+            candidates = sorted(
+                ((key_rank, track_name or "", track_id or "", track_id, track_name, key)
+                 for key in user_key_set for key_rank, track_id, track_name in ranked[key]),
+                key=lambda candidate: candidate[:3])
+            seen = set()
+            for *_, track_id, track_name, (genre, artist_name, language) in candidates:
+                if track_id in seen:
+                    continue
+                seen.add(track_id)
+                rows.append((user_id, len(seen), track_id, track_name, artist_name, genre, language))
+                if len(seen) == self.top_n:
+                    break
+        return rows
+
+    def release_broadcasts(self):
+        """Menghapus broadcast kunci batch ini dari driver dan executor setelah hasilnya dikumpulkan."""
+        for keys_bc in self.broadcasts:
+            keys_bc.destroy()
+        self.broadcasts.clear()
+
+    def generate_recommendation(self, batch_df, batch_id):
+        print(f"Processing batch {batch_id}...")
+        if self.sink.is_applied(batch_id):
+            print(f"Batch {batch_id} already written to sink, skipping replay")
+            # Crash setelah penulisan sink: rollup disusulkan dari sink
+            if self.served is not None:
+                self.served.refresh(self.sink)
+            return
+        started = time.perf_counter()
+        self.refresh_storage()
+
+        # Satu penulisan bulk per batch ke sink (idempotent pada batch_id)
+        try:
+            if self.result_cache is not None:
+                rows = self.recommend_cached(batch_df, batch_id)
+            else:
+                rows = [tuple(row) for row in self.recommend(batch_df).collect()]
+        finally:
+            self.release_broadcasts()
+        self.sink.write_batch(batch_id, rows)
+        if self.served is not None:
+            self.served.refresh(self.sink)
+        elapsed = time.perf_counter() - started
+
+        users = len({row[0] for row in rows})
+        print(f"Batch {batch_id}: {len(rows)} recommendations for {users} users in {elapsed * 1000:.1f} ms")
+
+
+def read_preferences(spark, args):
+    """Stream event preferensi dari Kafka, dibatasi maxOffsetsPerTrigger per batch."""
+    kafka_df = spark.readStream \
+        .format("kafka") \
+        .option("kafka.bootstrap.servers", KAFKA_BOOTSTRAP_SERVERS) \
+        .option("subscribe", PREFERENCE_TOPIC) \
+        .option("startingOffsets", args.starting_offsets) \
+        .option("maxOffsetsPerTrigger", args.max_offsets_per_trigger) \
+        .option("failOnDataLoss", "false") \
+        .load()
+
+    # Parse nilai JSON dari Kafka (schema di spark_utils.EVENT_SCHEMA); waktu
+    # kedatangan di Kafka (kafka_ts) dipakai untuk rollup
+    return kafka_df.selectExpr("CAST(value AS STRING)", "timestamp AS kafka_ts") \
+        .select(from_json(col("value"), EVENT_SCHEMA).alias("data"), "kafka_ts") \
+        .select("data.*", "kafka_ts") \
+        .filter(col("user_id").isNotNull())
+
+
+def aggregate_profiles(user_pref_df, watermark_delay):
+    """
+    Profil preferensi per user (stateful). timestamp di-parse menjadi event time;
+    watermark membatasi berapa lama event terlambat diterima dan kapan state
+    user yang tidak aktif dihapus.
+    """
+    return user_pref_df \
+        .withColumn("event_time", coalesce(to_timestamp(col("timestamp")), current_timestamp())) \
+        .withWatermark("event_time", watermark_delay) \
+        .select("user_id", "genre", "artist", "language", "event_time",
+                unix_millis(col("event_time")).alias("event_ms")) \
+        .groupBy("user_id") \
+        .applyInPandasWithState(
+            update_profile,
+            outputStructType=PROFILE_OUTPUT_SCHEMA,
+            stateStructType=PROFILE_STATE_SCHEMA,
+            outputMode="update",
+            timeoutConf=GroupStateTimeout.EventTimeTimeout,
         )
 
-        print(f"User {user_id} Preference: {genre}, {artist}, {language}")
-        filtered.show(5, truncate=False)
 
-# 7. Jalankan streaming
-query = user_pref_df.writeStream \
-    .foreachBatch(generate_recommendation) \
-    .outputMode("append") \
-    .start()
+def report_state_metrics(progress):
+    """Mencetak ukuran state profil dan latensi update state dari progress terakhir."""
+    if not progress or not progress.get("stateOperators"):
+        return
+    for operator in progress["stateOperators"]:
+        print(json.dumps({
+            "batch_id": progress["batchId"],
+            "state_rows": operator.get("numRowsTotal"),
+            "state_rows_updated": operator.get("numRowsUpdated"),
+            "state_rows_removed": operator.get("numRowsRemoved"),
+            "state_memory_bytes": operator.get("memoryUsedBytes"),
+            "state_update_ms": operator.get("allUpdatesTimeMs"),
+            "state_remove_ms": operator.get("allRemovalsTimeMs"),
+        }))
+
+
+def apply_trigger(writer, args):
+    if args.available_now:
+        return writer.trigger(availableNow=True)
+    return writer.trigger(processingTime=args.trigger_interval)
+
+
+def add_executor_files(spark, ranker="exact"):
+    """Modul yang diimpor di executor: profil (applyInPandasWithState) dan scoring (ranker scored)."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    names = ["user_profile.py"] + (["preferences.py", "scoring.py"] if ranker == "scored" else [])
+    for name in names:
+        spark.sparkContext.addPyFile(os.path.join(here, name))
+
+
+def start_query(spark, args):
+    add_executor_files(spark, args.ranker)
+
+    # Nama stream sink = lokasi checkpoint: batch_id hanya bermakna di dalam satu checkpoint
+    sink = RecommendationSink(args.sink_db, stream=args.checkpoint)
+    served = ServedRollup(spark, stream=args.checkpoint) if args.rollups else None
+    result_cache = ResultCache(args.result_cache_size) if args.result_cache_size > 0 else None
+    job = RecommendationJob.from_storage(spark, sink, args.top_n, served, result_cache, args.ranker)
+    profile_df = aggregate_profiles(read_preferences(spark, args), args.watermark_delay)
+
+    writer = profile_df.writeStream \
+        .queryName("song_recommender") \
+        .foreachBatch(job.generate_recommendation) \
+        .outputMode("update") \
+        .option("checkpointLocation", args.checkpoint)
+    return apply_trigger(writer, args).start()
+
+
+def start_rollup_queries(spark, args):
+    """Satu query agregasi per grain rollup, masing-masing dengan checkpoint sendiri."""
+    events = read_preferences(spark, args)
+    queries = []
+    for grain in ROLLUP_GRAINS:
+        table = events_table(spark, grain)
+        writer = aggregate_events(events, grain).writeStream \
+            .queryName(f"rollup_{grain}") \
+            .foreachBatch(table.write_batch) \
+            .outputMode("update") \
+            .option("checkpointLocation", f"{args.checkpoint}_rollup_{grain}")
+        queries.append(apply_trigger(writer, args).start())
+    return queries
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    spark = build_spark("SongRecommender", spark_conf(args))
+    # Metrik per batch untuk halaman System Monitoring (app.py)
+    spark.streams.addListener(StreamingMetricsListener(MetricsStore(args.metrics_db)))
+    query = start_query(spark, args)
+    rollup_queries = start_rollup_queries(spark, args) if args.rollups else []
+
+    while not query.awaitTermination(METRICS_INTERVAL_S):
+        report_state_metrics(query.lastProgress)
+    report_state_metrics(query.lastProgress)
+    for rollup_query in rollup_queries:
+        rollup_query.awaitTermination()
+
 
-query.awaitTermination()
+if __name__ == "__main__":
+    main()
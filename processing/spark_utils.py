@@ -0,0 +1,178 @@
+import csv
+import os
+
+from pyspark.sql import SparkSession
+from pyspark.sql.functions import coalesce, col, concat_ws, lit, nullif, trim, when
+from pyspark.sql.types import DoubleType, IntegerType, LongType, StringType, StructField, StructType
+
+from preferences import PREFERENCE_KEYS, RANK_ORDER, SONG_COLUMNS, WILDCARD  # noqa: F401
+
+# Lokasi data di MinIO (bucket "music-data")
+MUSIC_BUCKET = os.environ.get("MUSIC_BUCKET", "s3a://music-data")
+CATALOG_CSV_PATH = f"{MUSIC_BUCKET}/Music Info.csv"
+CATALOG_PARQUET_PATH = f"{MUSIC_BUCKET}/catalog/music_info"
+PREFERENCE_INDEX_PATH = f"{MUSIC_BUCKET}/index/preference_topk"
+SIMILARITY_PATH = f"{MUSIC_BUCKET}/similarity/neighbours"
+ALS_PATH = f"{MUSIC_BUCKET}/models/als"
+ROLLUP_PATH = f"{MUSIC_BUCKET}/rollups"
+
+# Kafka
+KAFKA_BOOTSTRAP_SERVERS = os.environ.get("KAFKA_BOOTSTRAP_SERVERS", "kafka:9092")
+PREFERENCE_TOPIC = os.environ.get("PREFERENCE_TOPIC", "user-preference")
+
+# Kredensial & endpoint MinIO, default mengikuti Docker-compose.yml
+MINIO_ENDPOINT = os.environ.get("MINIO_ENDPOINT", "http://minio:9000")
+MINIO_ACCESS_KEY = os.environ.get("MINIO_ACCESS_KEY", "minioadmin")
+MINIO_SECRET_KEY = os.environ.get("MINIO_SECRET_KEY", "minioadmin")
+
+# Schema JSON event di topik user-preference. track_id opsional: diisi jika
+# event berasal dari lagu yang benar-benar diputar user.
+EVENT_SCHEMA = StructType() \
+    .add("user_id", StringType()) \
+    .add("genre", StringType()) \
+    .add("artist", StringType()) \
+    .add("language", StringType()) \
+    .add("timestamp", StringType()) \
+    .add("track_id", StringType())
+
+# Format katalog yang dibaca pipeline: "parquet" (hasil convert_catalog.py) atau "csv"
+CATALOG_FORMAT = os.environ.get("CATALOG_FORMAT", "parquet")
+
+# Tipe kolom katalog yang sudah diketahui; kolom lain di header dibaca sebagai string
+CATALOG_COLUMN_TYPES = {
+    "year": IntegerType(),
+    "duration_ms": LongType(),
+    "popularity": IntegerType(),
+    "danceability": DoubleType(),
+    "energy": DoubleType(),
+    "key": IntegerType(),
+    "loudness": DoubleType(),
+    "mode": IntegerType(),
+    "speechiness": DoubleType(),
+    "acousticness": DoubleType(),
+    "instrumentalness": DoubleType(),
+    "liveness": DoubleType(),
+    "valence": DoubleType(),
+    "tempo": DoubleType(),
+    "time_signature": IntegerType(),
+}
+
+
+def build_spark(app_name, conf=None):
+    """Membuat SparkSession dengan konfigurasi S3A untuk MinIO."""
+    builder = SparkSession.builder.appName(app_name) \
+        .config("spark.hadoop.fs.s3a.access.key", MINIO_ACCESS_KEY) \
+        .config("spark.hadoop.fs.s3a.secret.key", MINIO_SECRET_KEY) \
+        .config("spark.hadoop.fs.s3a.endpoint", MINIO_ENDPOINT) \
+        .config("spark.hadoop.fs.s3a.path.style.access", "true") \
+        .config("spark.hadoop.fs.s3a.impl", "org.apache.hadoop.fs.s3a.S3AFileSystem")
+    for key, value in (conf or {}).items():
+        builder = builder.config(key, value)
+
+    spark = builder.getOrCreate()
+    spark.sparkContext.setLogLevel("WARN")
+    return spark
+
+
+def catalog_schema(spark, path=CATALOG_CSV_PATH):
+    """
+    Schema eksplisit untuk CSV katalog, disusun dari baris header saja.
+    Menghindari inferSchema yang membaca seluruh CSV dua kali.
+    """
+    header_line = spark.read.text(path).limit(1).first()[0]
+    columns = next(csv.reader([header_line]))
+    return StructType([
+        StructField(name, CATALOG_COLUMN_TYPES.get(name, StringType()), True)
+        for name in columns
+    ])
+
+
+def read_catalog_csv(spark, path=CATALOG_CSV_PATH):
+    """Membaca CSV katalog lengkap (semua kolom) dengan schema eksplisit."""
+    return spark.read.csv(path, header=True, schema=catalog_schema(spark, path))
+
+
+def load_catalog(spark, fmt=None):
+    """Membaca katalog lengkap dalam format CATALOG_FORMAT (default Parquet)."""
+    fmt = fmt or CATALOG_FORMAT
+    if fmt == "parquet":
+        return spark.read.parquet(CATALOG_PARQUET_PATH)
+    if fmt == "csv":
+        return read_catalog_csv(spark)
+    raise ValueError(f"Unknown catalog format: {fmt}")
+
+
+def load_songs(spark, fmt=None):
+    """Membaca katalog lagu dari MinIO dan memilih kolom yang dipakai pipeline."""
+    return load_catalog(spark, fmt).select(*SONG_COLUMNS)
+
+
+def normalize_preferences(df):
+    """Mengganti field preferensi yang kosong/null dengan WILDCARD."""
+    for key in PREFERENCE_KEYS:
+        df = df.withColumn(key, coalesce(nullif(trim(col(key)), lit("")), lit(WILDCARD)))
+    return df
+
+
+def key_pattern_column():
+    """
+    Pola kunci dari nilai kunci yang sudah dinormalisasi (mis. "genre.any.language"):
+    field WILDCARD menjadi "any", termasuk field lagu yang kosong di katalog.
+    """
+    return concat_ws(".", *[when(col(key) == WILDCARD, lit("any")).otherwise(lit(key)) for key in PREFERENCE_KEYS])
+
+
+def _hadoop_path(spark, path):
+    jvm_path = spark._jvm.org.apache.hadoop.fs.Path(path)
+    fs = jvm_path.getFileSystem(spark._jsc.hadoopConfiguration())
+    return fs, jvm_path
+
+
+def read_text_file(spark, path):
+    """Membaca file teks kecil (mis. pointer versi) atau None jika tidak ada."""
+    fs, jvm_path = _hadoop_path(spark, path)
+    if not fs.exists(jvm_path):
+        return None
+    stream = fs.open(jvm_path)
+    try:
+        reader = spark._jvm.java.io.BufferedReader(
+            spark._jvm.java.io.InputStreamReader(stream, "UTF-8"))
+        line = reader.readLine()
+    finally:
+        stream.close()
+    return line.strip() if line else None
+
+
+def read_bytes_file(spark, path):
+    """Membaca isi file kecil (mis. tabel rollup) sebagai bytes, atau None jika tidak ada."""
+    fs, jvm_path = _hadoop_path(spark, path)
+    if not fs.exists(jvm_path):
+        return None
+    stream = fs.open(jvm_path)
+    try:
+        return bytes(spark._jvm.org.apache.commons.io.IOUtils.toByteArray(stream))
+    finally:
+        stream.close()
+
+
+def write_bytes_file(spark, path, data):
+    """Menulis bytes sebagai satu objek (ditimpa jika sudah ada); di S3 objek baru terlihat utuh saat close."""
+    fs, jvm_path = _hadoop_path(spark, path)
+    stream = fs.create(jvm_path, True)
+    try:
+        stream.write(bytearray(data))
+    finally:
+        stream.close()
+
+
+def write_text_file(spark, path, text):
+    """Menulis file teks kecil sebagai satu objek (ditimpa jika sudah ada)."""
+    write_bytes_file(spark, path, text.encode("utf-8"))
+
+
+def current_index_path(spark):
+    """Path versi index preferensi yang aktif, atau None jika belum dibangun."""
+    version = read_text_file(spark, f"{PREFERENCE_INDEX_PATH}/_CURRENT")
+    if version is None:
+        return None
+    return f"{PREFERENCE_INDEX_PATH}/v={version}"
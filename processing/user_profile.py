@@ -0,0 +1,135 @@
+"""
+Profil preferensi per user yang diakumulasi dari stream user-preference.
+
+Profil berisi bobot per nilai genre, artist dan language, serta bobot per
+kombinasi (genre, artist, language) yang benar-benar muncul di event. Bobot
+meluruh secara eksponensial terhadap event time (half-life
+PROFILE_HALF_LIFE_MS), jadi klik lama makin kecil pengaruhnya, dan setiap
+dimensi hanya menyimpan PROFILE_MAX_ENTRIES nilai teratas supaya state tetap kecil.
+
+Preferensi yang di-emit adalah kombinasi teramati dengan bobot terbesar, bukan
+nilai teratas tiap dimensi secara terpisah: gabungan argmax per dimensi bisa
+berupa kombinasi yang tidak ada di katalog (mis. genre Pop dengan artist Queen)
+sehingga join exact tidak menghasilkan rekomendasi sama sekali.
+
+update_profile dipakai dengan applyInPandasWithState di spark_train.py.
+State user yang tidak aktif dihapus lewat event-time timeout setelah
+PROFILE_TTL_MS melewati watermark.
+"""
+import json
+import os
+
+import pandas as pd
+from pyspark.sql.types import DoubleType, IntegerType, LongType, StringType, StructField, StructType
+
+PROFILE_HALF_LIFE_MS = int(os.environ.get("PROFILE_HALF_LIFE_MS", 6 * 3600 * 1000))
+PROFILE_TTL_MS = int(os.environ.get("PROFILE_TTL_MS", 7 * 24 * 3600 * 1000))
+PROFILE_MAX_ENTRIES = int(os.environ.get("PROFILE_MAX_ENTRIES", 10))
+
+# Kolom event -> dimensi profil
+PROFILE_DIMENSIONS = ("genre", "artist", "language")
+# Entri profil untuk kombinasi dimensi yang teramati; kuncinya JSON list [genre, artist, language]
+PROFILE_COMBINATIONS = "combinations"
+
+PROFILE_STATE_SCHEMA = StructType([
+    StructField("profile", StringType()),
+    StructField("last_event_ms", LongType()),
+])
+
+# Output sama bentuknya dengan event preferensi, ditambah ukuran profil
+PROFILE_OUTPUT_SCHEMA = StructType([
+    StructField("user_id", StringType()),
+    StructField("genre", StringType()),
+    StructField("artist", StringType()),
+    StructField("language", StringType()),
+    StructField("profile_weight", DoubleType()),
+    StructField("profile_entries", IntegerType()),
+])
+
+
+def decay_profile(profile, last_event_ms, events):
+    """
+    Menggabungkan events (kolom event_ms + PROFILE_DIMENSIONS) ke profil.
+
+    Semua bobot dinyatakan relatif terhadap event time terbaru, sehingga hasilnya
+    tidak bergantung pada urutan kedatangan event (event terlambat tetap benar).
+    """
+    newest_ms = int(events["event_ms"].max())
+    if last_event_ms is not None:
+        newest_ms = max(newest_ms, last_event_ms)
+        factor = 0.5 ** ((newest_ms - last_event_ms) / PROFILE_HALF_LIFE_MS)
+        profile = {dim: {k: w * factor for k, w in weights.items()} for dim, weights in profile.items()}
+
+    event_weights = 0.5 ** ((newest_ms - events["event_ms"]) / PROFILE_HALF_LIFE_MS)
+    for dim in PROFILE_DIMENSIONS:
+        present = events[dim].notna() & (events[dim] != "")
+        sums = event_weights[present].groupby(events[dim][present]).sum()
+        _add_weights(profile, dim, sums.items())
+
+    # Field kosong tetap "" di kombinasi (menjadi WILDCARD saat normalisasi)
+    values = events[list(PROFILE_DIMENSIONS)].fillna("")
+    observed = (values != "").any(axis=1)
+    sums = event_weights[observed].groupby([values[dim][observed] for dim in PROFILE_DIMENSIONS]).sum()
+    _add_weights(profile, PROFILE_COMBINATIONS, ((json.dumps(list(combo)), w) for combo, w in sums.items()))
+    return profile, newest_ms
+
+
+def _add_weights(profile, dim, items):
+    weights = profile.setdefault(dim, {})
+    for value, weight in items:
+        weights[value] = weights.get(value, 0.0) + float(weight)
+    # Simpan hanya nilai teratas supaya state tetap ringkas
+    if len(weights) > PROFILE_MAX_ENTRIES:
+        top = sorted(weights.items(), key=lambda item: -item[1])[:PROFILE_MAX_ENTRIES]
+        profile[dim] = dict(top)
+
+
+def top_preferences(profile):
+    """
+    Kombinasi (genre, artist, language) teramati dengan bobot terbesar. State
+    lama tanpa kombinasi memakai nilai teratas per dimensi.
+    """
+    combinations = profile.get(PROFILE_COMBINATIONS) or {}
+    if combinations:
+        values = json.loads(max(combinations, key=combinations.get))
+        return {dim: value or None for dim, value in zip(PROFILE_DIMENSIONS, values)}
+    top = {}
+    for dim in PROFILE_DIMENSIONS:
+        weights = profile.get(dim) or {}
+        top[dim] = max(weights, key=weights.get) if weights else None
+    return top
+
+
+def update_profile(key, pdf_iter, state):
+    """Fungsi applyInPandasWithState: perbarui profil satu user dan emit preferensi dominannya."""
+    if state.hasTimedOut:
+        state.remove()
+        return
+
+    if state.exists:
+        profile_json, last_event_ms = state.get
+        profile = json.loads(profile_json)
+    else:
+        profile, last_event_ms = {}, None
+
+    for pdf in pdf_iter:
+        events = pdf.dropna(subset=["event_ms"])
+        if events.empty:
+            continue
+        profile, last_event_ms = decay_profile(profile, last_event_ms, events)
+
+    if last_event_ms is None:
+        return
+
+    state.update((json.dumps(profile), last_event_ms))
+    state.setTimeoutTimestamp(max(last_event_ms, state.getCurrentWatermarkMs()) + PROFILE_TTL_MS)
+
+    top = top_preferences(profile)
+    yield pd.DataFrame({
+        "user_id": [key[0]],
+        "genre": [top["genre"]],
+        "artist": [top["artist"]],
+        "language": [top["language"]],
+        "profile_weight": [sum(profile.get("genre", {}).values())],
+        "profile_entries": [sum(len(weights) for weights in profile.values())],
+    })
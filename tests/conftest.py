@@ -0,0 +1,7 @@
+"""Modul di web/, processing/ dan ingestion/ saling mengimpor secara flat, jadi direktorinya dimasukkan ke sys.path."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("web", "processing", "ingestion"):
+    sys.path.insert(0, os.path.join(ROOT, directory))
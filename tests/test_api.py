@@ -0,0 +1,49 @@
+import asyncio
+import time
+
+import pandas as pd
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import api
+from cache import TTLCache
+
+
+def _app():
+    # Tanpa _catalog_lifecycle: tabel tidak dimuat dari MinIO
+    app = web.Application()
+    app[api.CACHE_KEY] = TTLCache(maxsize=16, ttl=60)
+    app[api.NEIGHBOUR_TABLE_LOADED_KEY] = True
+    app[api.CATALOG_VERSION_KEY] = "test"
+    app.add_routes(api.routes)
+    return app
+
+
+def test_slow_recommendation_does_not_block_event_loop(monkeypatch):
+    def slow_recommendations(song, n):
+        time.sleep(0.5)  # ranking CPU / read_parquet pertama
+        return pd.DataFrame({"Title": [f"{song} (live)"]})
+
+    monkeypatch.setattr(api, "get_recommendations", slow_recommendations)
+
+    async def scenario():
+        async with TestClient(TestServer(_app())) as client:
+            finished = {}
+
+            async def get(name, path, **params):
+                response = await client.get(path, params=params)
+                body = await response.json()
+                finished[name] = time.perf_counter()
+                return response.status, body
+
+            recommend = asyncio.ensure_future(get("recommend", "/recommend", song="Imagine"))
+            await asyncio.sleep(0.1)
+            (status, _), (_, body) = await asyncio.gather(get("health", "/health"), recommend)
+            _, cached = await get("cached", "/recommend", song="Imagine")
+            return status, finished["health"] < finished["recommend"], body, cached
+
+    status, health_first, body, cached = asyncio.run(scenario())
+    # /health dijawab selagi rekomendasi masih dihitung
+    assert status == 200 and health_first
+    assert body["items"] == [{"Title": "Imagine (live)"}]
+    assert cached["items"] == body["items"] and cached["took_ms"] < 100
@@ -0,0 +1,38 @@
+import shutil
+
+import pytest
+
+SONGS = [
+    ("t1", "Bohemian Rhapsody", "Queen", "Rock", "English"),
+    ("t2", "Don't Stop Me Now", "Queen", "", "English"),
+    ("t3", "Another One Bites the Dust", "Queen", "Rock", "English"),
+    ("t4", "Bad Guy", "Billie Eilish", "Pop", "English"),
+]
+
+
+@pytest.mark.skipif(shutil.which("java") is None, reason="Spark needs a Java runtime")
+def test_blank_catalog_fields_share_the_partial_key(tmp_path):
+    pyspark = pytest.importorskip("pyspark")
+    from build_index import catalog_snapshot, rank_keys
+    from preferences import SONG_COLUMNS
+    from recommendation_sink import RecommendationSink
+    from spark_train import RecommendationJob
+
+    spark = pyspark.sql.SparkSession.builder.master("local[1]") \
+        .config("spark.sql.shuffle.partitions", "1") \
+        .config("spark.ui.enabled", "false") \
+        .getOrCreate()
+    index = rank_keys(catalog_snapshot(spark.createDataFrame(SONGS, list(SONG_COLUMNS))), top_k=10).cache()
+
+    keys = [(row["key_pattern"], row["genre"], row["artist_name"], row["language"]) for row in index.collect()]
+    assert len(keys) == len(set(keys))
+    # Genre kosong t2 dinormalisasi ke "*": masuk ke pola "any", bukan pola lengkap
+    assert all(key_pattern.startswith("any.") for key_pattern, genre, *_ in keys if genre == "*")
+    queen = index.filter("key_pattern = 'any.artist_name.language' AND artist_name = 'Queen'").first()
+    assert queen["track_ids"] == ["t3", "t1", "t2"]
+
+    job = RecommendationJob(spark, RecommendationSink(str(tmp_path / "rec.db"), stream="test"), index_df=index)
+    events = spark.createDataFrame([("u1", "", "Queen", "English")],
+                                   "user_id string, genre string, artist string, language string")
+    job.generate_recommendation(events, 0)
+    assert [row["track_id"] for row in job.sink.get("u1")] == ["t3", "t1", "t2"]
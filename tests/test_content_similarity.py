@@ -0,0 +1,84 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from content_similarity import FEATURE_WEIGHTS, CatalogFeatures, neighbour_partition
+
+NUMERIC = ("danceability", "energy")
+
+
+def _songs(n=60, seed=3):
+    rng = np.random.default_rng(seed)
+    songs = pd.DataFrame({
+        "track_id": [f"t{i:03d}" for i in rng.permutation(n)],
+        "genre": rng.choice(["Pop", "Rock", "Jazz", None], n),
+        "language": rng.choice(["English", "Indonesian"], n),
+        "artist_name": rng.choice([f"Artist {i}" for i in range(8)], n),
+        "danceability": rng.random(n),
+        "energy": rng.random(n),
+    })
+    # Dua lagu identik: similarity 1.0, urutan sama skor berdasarkan neighbor_id
+    columns = ["genre", "language", "artist_name", *NUMERIC]
+    songs.loc[1, columns] = songs.loc[0, columns].to_numpy()
+    return songs
+
+
+def _full_vectors(songs):
+    """Vektor one-hot lengkap yang dinormalisasi L2, seperti pipeline MLlib sebelumnya."""
+    songs = songs.sort_values("track_id", ignore_index=True)
+    blocks = []
+    for name in ("genre", "language", "artist_name"):
+        blocks.append(pd.get_dummies(songs[name].fillna("unknown")).to_numpy(dtype=float) * FEATURE_WEIGHTS[name])
+    numeric = songs[list(NUMERIC)]
+    blocks.append(((numeric - numeric.mean()) / numeric.std()).to_numpy() * FEATURE_WEIGHTS["numeric"])
+    vectors = np.hstack(blocks)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_similarities_match_full_one_hot_cosine():
+    songs = _songs()
+    features = CatalogFeatures(songs, NUMERIC)
+    expected = _full_vectors(songs) @ _full_vectors(songs).T
+    np.fill_diagonal(expected, -np.inf)
+    np.testing.assert_allclose(features.similarities(np.arange(len(songs))), expected, atol=1e-5)
+
+
+def test_blocked_top_k_matches_brute_force():
+    songs = _songs()
+    features = CatalogFeatures(songs, NUMERIC)
+    vectors = _full_vectors(songs)
+    # block_cells kecil: beberapa blok query per partisi
+    result = neighbour_partition(features, np.arange(len(songs)), top_k=5, min_similarity=0.2, block_cells=200)
+
+    for row, track_id in enumerate(features.track_ids):
+        sims = vectors @ vectors[row]
+        sims[row] = -np.inf
+        order = np.lexsort((np.arange(len(sims)), -np.round(sims, 5)))[:5]
+        expected = [features.track_ids[i] for i in order if sims[i] >= 0.2]
+        got = result[result["track_id"] == track_id]
+        assert got["neighbor_id"].tolist() == expected
+        assert got["rank"].tolist() == list(range(1, len(expected) + 1))
+    first = result[result["track_id"] == songs.loc[0, "track_id"]].iloc[0]
+    assert first["neighbor_id"] == songs.loc[1, "track_id"]
+    assert first["similarity"] == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.skipif(shutil.which("java") is None, reason="Spark needs a Java runtime")
+def test_spark_neighbours_match_partition():
+    pyspark = pytest.importorskip("pyspark")
+    from content_similarity import add_executor_files, nearest_neighbours
+
+    spark = pyspark.sql.SparkSession.builder.master("local[2]") \
+        .config("spark.sql.shuffle.partitions", "1") \
+        .config("spark.ui.enabled", "false") \
+        .getOrCreate()
+    add_executor_files(spark)
+    songs = _songs()
+    rows = nearest_neighbours(spark, spark.createDataFrame(songs), top_k=5, min_similarity=0.2, block_cells=100).toPandas()
+
+    expected = neighbour_partition(CatalogFeatures(songs, NUMERIC), np.arange(len(songs)), 5, 0.2)
+    key = ["track_id", "rank"]
+    pd.testing.assert_frame_equal(rows.sort_values(key, ignore_index=True)[["track_id", "rank", "neighbor_id"]],
+                                  expected.sort_values(key, ignore_index=True)[["track_id", "rank", "neighbor_id"]])
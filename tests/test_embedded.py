@@ -0,0 +1,84 @@
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from embedded import EVENT_ARROW_SCHEMA, file_events, input_stream_name, make_engine, run
+from recommendation_sink import RecommendationSink
+
+
+class EchoEngine:
+    """Engine tiruan: satu rekomendasi per event, tanpa DuckDB/Polars."""
+
+    def recommend(self, events):
+        return [(user_id, 1, f"t-{user_id}", None, None, None, None)
+                for user_id in events.column("user_id").to_pylist()]
+
+
+def _write_events(path, users):
+    with open(path, "w") as f:
+        for user_id in users:
+            f.write(json.dumps({"user_id": user_id, "genre": "Pop", "artist": "Queen", "language": "English"}) + "\n")
+    return str(path)
+
+
+def test_different_inputs_into_same_sink_are_not_skipped(tmp_path):
+    first = _write_events(tmp_path / "a.jsonl", ["u1", "u2", "u3"])
+    second = _write_events(tmp_path / "b.jsonl", ["u4", "u5", "u6"])
+    db = str(tmp_path / "rec.db")
+
+    def process(path):
+        sink = RecommendationSink(db, stream=input_stream_name([path], batch_rows=2))
+        return run(EchoEngine(), file_events([path], batch_rows=2), sink)
+
+    assert process(first)["events"] == 3
+    assert process(second)["events"] == 3
+    rerun = process(first)
+    assert rerun["events"] == 0 and rerun["skipped_batches"] == 2
+    assert RecommendationSink(db).get("u5")[0]["track_id"] == "t-u5"
+
+
+def test_stream_name_depends_on_content_and_batch_size(tmp_path):
+    first = _write_events(tmp_path / "a.jsonl", ["u1"])
+    copy = _write_events(tmp_path / "copy.jsonl", ["u1"])
+    assert input_stream_name([first]) == input_stream_name([copy])
+    assert input_stream_name([first], batch_rows=10) != input_stream_name([first], batch_rows=20)
+
+
+def _blank_field_catalog(path):
+    # t3 berjudul "n3" (urutan pertama) tetapi dengan genre kosong; t0..t11 lainnya Pop/Rock
+    rows = [{"track_id": f"t{i}", "track_name": f"song {i:02d}", "artist_name": f"Artist {i % 3}",
+             "genre": "Pop" if i % 2 == 0 else "Rock", "language": "English" if i < 8 else "Indonesian"}
+            for i in range(12)]
+    rows[3].update(track_name="n3", genre="")
+    rows[7].update(genre="  ", artist_name="")
+    pq.write_table(pa.Table.from_pylist(rows), path)
+    return str(path)
+
+
+@pytest.mark.parametrize("ranker", ["exact", "scored"])
+def test_engines_agree_on_catalog_with_blank_fields(tmp_path, ranker):
+    pytest.importorskip("duckdb")
+    pytest.importorskip("polars")
+    catalog = _blank_field_catalog(tmp_path / "catalog.parquet")
+    events = pa.Table.from_pylist([
+        {"user_id": "u1", "genre": "", "artist": None, "language": "English"},
+        {"user_id": "u2", "genre": "Rock", "artist": "Artist 1", "language": "English"},
+        {"user_id": "u3", "genre": None, "artist": "", "language": "English"},
+    ], schema=EVENT_ARROW_SCHEMA)
+
+    results = {}
+    for name in ("duckdb", "polars"):
+        engine = make_engine(name, top_n=4, ranker=ranker)
+        engine.load_catalog(catalog)
+        results[name] = engine.recommend(events)
+
+    assert results["duckdb"] == results["polars"]
+    recommended = {}
+    for user_id, rank, track_id, *_ in results["duckdb"]:
+        recommended.setdefault(user_id, []).append(track_id)
+    assert all(len(tracks) == len(set(tracks)) for tracks in recommended.values())
+    if ranker == "exact":
+        # Semua lagu English diurutkan berdasarkan judul; t3 ("n3") di antara "song ..."
+        assert recommended["u1"] == ["t3", "t0", "t1", "t2"]
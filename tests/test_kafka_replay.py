@@ -0,0 +1,22 @@
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from kafka_replay import iter_log_batches, replay
+from preference_producer import InMemoryPreferenceProducer
+
+
+def test_numeric_user_id_is_sent_as_string_key(tmp_path):
+    jsonl = tmp_path / "events.jsonl"
+    jsonl.write_text(json.dumps({"user_id": 42, "genre": "Pop"}) + "\n")
+    parquet = tmp_path / "events.parquet"
+    pq.write_table(pa.table({"user_id": [7], "genre": ["Rock"]}), parquet)
+
+    producer = InMemoryPreferenceProducer()
+    stats = replay(producer, iter_log_batches([str(jsonl), str(parquet)]))
+
+    assert stats["delivered"] == 2 and stats["failed"] == 0
+    keys = sorted(key for partition in producer.broker.topics[producer.topic] for key, _ in partition)
+    assert keys == [b"42", b"7"]
+    assert sorted(event["user_id"] for event in producer.broker.messages(producer.topic)) == ["42", "7"]
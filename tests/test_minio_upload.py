@@ -0,0 +1,75 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from minio_upload import MIN_PART_SIZE, ensure_bucket, make_s3_client, upload_stream
+
+moto_server = pytest.importorskip("moto.server")
+
+BUCKET = "music-data"
+
+
+@pytest.fixture(scope="module")
+def endpoint():
+    """moto sebagai stand-in S3 lokal (sama seperti `moto_server` di docstring minio_upload.py)."""
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def client(endpoint):
+    client = make_s3_client(endpoint, access_key="test", secret_key="test", max_connections=4)
+    ensure_bucket(client, BUCKET)
+    return client
+
+
+def test_multipart_upload_matches_local_etag_and_content(client):
+    data = os.urandom(2 * MIN_PART_SIZE + 123_456)
+    progress = []
+    summary = upload_stream(io.BytesIO(data), "uploads/log.csv", BUCKET, client, part_size=MIN_PART_SIZE,
+                            concurrency=2, progress=lambda done, total: progress.append((done, total)))
+
+    assert summary["parts"] == 3 and summary["bytes"] == len(data)
+    assert summary["sha256"] == hashlib.sha256(data).hexdigest()
+    # ETag multipart: MD5 dari gabungan MD5 per part, "-<jumlah part>"
+    digests = b"".join(hashlib.md5(data[i:i + MIN_PART_SIZE]).digest() for i in range(0, len(data), MIN_PART_SIZE))
+    assert summary["etag"] == f"{hashlib.md5(digests).hexdigest()}-3"
+    obj = client.get_object(Bucket=BUCKET, Key="uploads/log.csv")
+    assert obj["ETag"].strip('"') == summary["etag"]
+    assert obj["Body"].read() == data
+    assert progress[-1] == (len(data), len(data))
+
+
+def test_small_file_uses_single_put(client):
+    summary = upload_stream(io.BytesIO(b"user_id,genre\nu1,Pop\n"), "uploads/small.csv", BUCKET, client)
+    assert summary["parts"] == 1
+    assert summary["etag"] == hashlib.md5(b"user_id,genre\nu1,Pop\n").hexdigest()
+
+
+def test_failed_part_is_retried_then_aborts_without_orphan_parts(client, monkeypatch):
+    monkeypatch.setattr("minio_upload.RETRY_BACKOFF_S", 0.0)
+    real_upload_part = client.upload_part
+    failures = {"count": 0}
+
+    def flaky_upload_part(**kwargs):
+        if kwargs["PartNumber"] == 2 and failures["count"] < 1:
+            failures["count"] += 1
+            raise ConnectionError("connection reset")
+        return real_upload_part(**kwargs)
+
+    monkeypatch.setattr(client, "upload_part", flaky_upload_part)
+    data = os.urandom(MIN_PART_SIZE + 10)
+    summary = upload_stream(io.BytesIO(data), "uploads/retry.csv", BUCKET, client, part_size=MIN_PART_SIZE)
+    assert summary["retried_parts"] == 1
+    assert client.get_object(Bucket=BUCKET, Key="uploads/retry.csv")["Body"].read() == data
+
+    # Part yang terus gagal: upload dibatalkan, tidak ada multipart upload yang tertinggal
+    failures["count"] = -10
+    with pytest.raises(ConnectionError):
+        upload_stream(io.BytesIO(data), "uploads/broken.csv", BUCKET, client, part_size=MIN_PART_SIZE, retries=1)
+    assert not client.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
@@ -0,0 +1,59 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from preference_producer import InMemoryBroker, InMemoryPreferenceProducer, iter_shard_events
+
+
+def _events(count, users=7):
+    return [{"user_id": f"user_{i % users}", "genre": "Pop", "artist": f"Artist {i}", "language": "English",
+             "timestamp": "2024-01-01 00:00:00", "track_id": None} for i in range(count)]
+
+
+def test_publish_batches_flushes_and_reports_stats():
+    broker = InMemoryBroker(num_partitions=3)
+    producer = InMemoryPreferenceProducer(broker, topic="prefs", batch_bytes=1024)
+    reports = []
+    stats = producer.publish(_events(500), progress=reports.append)
+
+    assert stats["sent"] == stats["delivered"] == 500
+    assert stats["failed"] == 0 and stats["bytes"] > 500 * 50
+    assert reports[-1] == stats
+    assert len(broker.messages("prefs")) == 500
+    assert producer.latency_percentiles()["p99_ms"] is not None
+
+    # Key user_id: semua event satu user di satu partisi, dengan urutan kirim
+    for number, partition in enumerate(broker.topics["prefs"]):
+        assert all(broker.partition_for(key) == number for key, _ in partition)
+    artists = [event["artist"] for event in broker.messages("prefs") if event["user_id"] == "user_3"]
+    assert artists == [f"Artist {i}" for i in range(3, 500, 7)]
+
+
+def test_events_stay_buffered_until_flush():
+    broker = InMemoryBroker()
+    producer = InMemoryPreferenceProducer(broker, batch_bytes=1 << 20)
+    for event in _events(10):
+        producer.send(event)
+    assert broker.messages(producer.topic) == [] and producer.delivered == 0
+    producer.flush()
+    assert len(broker.messages(producer.topic)) == 10 and producer.delivered == 10
+
+
+def test_failed_batch_is_counted_as_failed():
+    class BrokenBroker(InMemoryBroker):
+        def append(self, topic, records):
+            raise ConnectionError("broker down")
+
+    producer = InMemoryPreferenceProducer(BrokenBroker())
+    stats = producer.publish(_events(20))
+    assert stats["delivered"] == 0 and stats["failed"] == 20
+    assert isinstance(producer.last_error, ConnectionError)
+
+
+def test_shard_events_fill_missing_fields(tmp_path):
+    path = tmp_path / "shard.parquet"
+    pq.write_table(pa.table({"user_id": ["u1", None], "artist_name": ["Queen", "Adele"], "song_id": ["t1", "t2"]}),
+                   path)
+    events = list(iter_shard_events([str(path)]))
+    assert len(events) == 1
+    assert events[0]["artist"] == "Queen" and events[0]["track_id"] == "t1"
+    assert events[0]["genre"] is None and events[0]["timestamp"]
@@ -0,0 +1,56 @@
+import shutil
+
+import pandas as pd
+import pytest
+
+from preferences import WILDCARD
+from scoring import score_partition
+
+SONGS = pd.DataFrame([
+    ("t1", "Bohemian Rhapsody", "Queen", "Rock", "English"),
+    ("t2", "Don't Stop Me Now", "Queen", "Rock", "English"),
+    ("t3", "Bad Guy", "Billie Eilish", "Pop", "English"),
+    ("t4", "Bergema Sampai Selamanya", "Nadhif Basalamah", "Pop", "Indonesian"),
+], columns=["track_id", "track_name", "artist_name", "genre", "language"])
+
+
+def test_score_partition_ranks_partial_matches_by_weight():
+    scored = score_partition(SONGS, [("Pop", "Queen", WILDCARD)], top_k=3)
+    # genre (0.5) > artist_name (0.35); sama skor diurutkan berdasarkan judul
+    assert scored["track_id"].tolist() == ["t3", "t4", "t1"]
+    assert scored["key_rank"].tolist() == [0, 1, 2]
+
+
+@pytest.mark.skipif(shutil.which("java") is None, reason="Spark needs a Java runtime")
+@pytest.mark.parametrize("cache_size", [0, 16])
+def test_scored_batches_destroy_their_key_broadcasts(tmp_path, cache_size):
+    pyspark = pytest.importorskip("pyspark")
+    from recommendation_sink import RecommendationSink
+    from result_cache import ResultCache
+    from spark_train import RecommendationJob, add_executor_files
+
+    spark = pyspark.sql.SparkSession.builder.master("local[1]") \
+        .config("spark.sql.shuffle.partitions", "1") \
+        .config("spark.ui.enabled", "false") \
+        .getOrCreate()
+    add_executor_files(spark, "scored")
+    created = []
+    job = RecommendationJob(spark, RecommendationSink(str(tmp_path / "rec.db"), stream="test"),
+                            song_df=spark.createDataFrame(SONGS), ranker="scored",
+                            result_cache=ResultCache(cache_size) if cache_size else None)
+    original_release = job.release_broadcasts
+
+    def release():
+        created.extend(job.broadcasts)
+        original_release()
+
+    job.release_broadcasts = release
+    for batch_id, (user_id, genre) in enumerate([("u1", "Pop"), ("u2", "Rock")]):
+        events = spark.createDataFrame([(user_id, genre, "Queen", None)], "user_id string, genre string, "
+                                                                          "artist string, language string")
+        job.generate_recommendation(events, batch_id)
+
+    assert len(created) == 2 and job.broadcasts == []
+    assert not any(keys_bc._jbroadcast.isValid() for keys_bc in created)
+    assert [row["track_id"] for row in job.sink.get("u1")] == ["t3", "t4", "t1", "t2"]
+    assert [row["track_id"] for row in job.sink.get("u2")] == ["t1", "t2"]
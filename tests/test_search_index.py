@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from search_index import BITMAP_RATIO, FUZZY_MIN_SCORE, TrigramIndex, _normalize, _trigram_codes
+from utils import MusicCatalog, search_catalog
+
+
+def _catalog(rows):
+    return MusicCatalog(pd.DataFrame({
+        "Title": [f"Track {i}" for i in range(rows)],
+        "Artist": [f"Artist {i % 97}" for i in range(rows)],
+        "Genre": ["Pop", "Rock", "Jazz"] * (rows // 3) + ["Pop"] * (rows % 3),
+        "Year": [2000 + i % 20 for i in range(rows)],
+    }))
+
+
+def test_search_with_absent_trigram_is_fuzzy_match():
+    # "5x" dan "x " tidak ada di index; dulu posting list kosong membuat IndexError
+    page, total = search_catalog("Track 12345x", limit=5, catalog=_catalog(20_000))
+    assert total > 0
+    assert page["Title"].iloc[0] == "Track 12345"
+
+
+def test_search_with_only_absent_trigrams_returns_nothing():
+    ids, scores, total = TrigramIndex(["Bohemian Rhapsody", "Imagine"]).search("qqqzzz", limit=10)
+    assert total == 0
+    assert len(ids) == 0 and len(scores) == 0
+
+
+def test_single_character_prefix():
+    ids, _, total = TrigramIndex(["Bohemian Rhapsody", "Imagine", "Billie Jean"]).search("b")
+    assert total == 2
+    assert sorted(ids.tolist()) == [0, 2]
+
+
+def _texts(rows, seed=7):
+    """Judul dari beberapa kata umum (trigram dengan bitmap) dan kata acak (posting list saja)."""
+    rng = np.random.default_rng(seed)
+    common = ["love", "night", "dance", "the", "heart", "rain"]
+    rare = ["".join(rng.choice(list("bcdfgkmprstz"), 3)) + "a" for _ in range(300)]
+    return [" ".join(rng.choice(common if rng.random() < 0.6 else rare, rng.integers(1, 4))) for _ in range(rows)]
+
+
+def _brute_force(texts, query, fuzzy):
+    """Skor setiap dokumen dihitung langsung dari himpunan trigram; urutan: skor, panjang, doc id."""
+    docs = [set(_trigram_codes(_normalize(text).encode("utf-8")).tolist()) for text in texts]
+    codes = np.unique(_trigram_codes(_normalize(query)[:-1].encode("utf-8"))).tolist()
+    df = np.array([sum(code in doc for doc in docs) for code in codes], dtype=np.float64)
+    order = np.argsort(df, kind="stable")
+    codes, df = [codes[i] for i in order], df[order]
+    weights = np.log1p(len(docs) / np.maximum(df, 1.0))
+    if (df == 0).any() and not (df == 0).all():
+        weights[df == 0] = weights[df > 0].mean()
+    scores = np.zeros(len(docs))
+    for code, weight in zip(codes, weights):
+        scores += weight * np.array([code in doc for doc in docs])
+    needed = weights.sum() * (1 - 1e-9)
+    if fuzzy and len(codes) > 1:
+        needed = weights.sum() * FUZZY_MIN_SCORE
+    ids = np.flatnonzero(scores >= needed)
+    lengths = np.array([len(_normalize(text).encode("utf-8")) for text in texts])
+    ids = ids[np.lexsort((ids, lengths[ids], -scores[ids]))]
+    return ids, scores[ids] / weights.sum()
+
+
+@pytest.mark.parametrize("query", ["love", "the night", "dance rain heart", "lov", "nigth", "bka love", "zzq"])
+@pytest.mark.parametrize("fuzzy", [False, True])
+def test_search_matches_brute_force(query, fuzzy):
+    texts = _texts(3000)
+    index = TrigramIndex(texts)
+    # Korpus harus memuat trigram dengan bitmap dan trigram yang hanya punya posting list
+    assert 0 < len(index.bitmaps) < len(index.trigrams)
+    assert (np.diff(index.offsets)[index.bitmap_rows >= 0] * BITMAP_RATIO >= len(texts)).all()
+
+    expected_ids, expected_scores = _brute_force(texts, query, fuzzy)
+    ids, scores, total = index.search(query, fuzzy=fuzzy)
+    assert total == len(expected_ids)
+    assert ids.tolist() == expected_ids.tolist()
+    np.testing.assert_allclose(scores, expected_scores)
+
+    # Dengan limit, hasil adalah awalan dari hasil lengkap (fuzzy hanya jika hasil penuh < limit)
+    ids, _, _ = index.search(query, limit=5, fuzzy=False)
+    assert ids.tolist() == _brute_force(texts, query, fuzzy=False)[0][:5].tolist()
+
+
+def test_from_artifact_rebuilds_index_of_old_format():
+    catalog = _catalog(500)
+    arrays, tables = catalog.to_artifact()
+    old = {key: array for key, array in arrays.items() if not key.startswith("index_")}
+    old["index_doc_lengths"] = np.zeros(len(catalog), dtype=np.int64)
+    loaded = MusicCatalog.from_artifact(SimpleNamespace(arrays=old, tables=tables))
+    rows, total = loaded.search("track 12", limit=5)
+    expected_rows, expected_total = catalog.search("track 12", limit=5)
+    assert rows.tolist() == expected_rows.tolist() and total == expected_total
@@ -0,0 +1,103 @@
+"""
+Exactly-once spark_train.py ke RecommendationSink: driver dibunuh (SIGKILL) di
+tengah batch setelah sink menulis tetapi sebelum Spark meng-commit batch ke
+checkpoint, lalu query dijalankan ulang dari checkpoint yang sama.
+
+Butuh Java dan PySpark; dilewati jika tidak tersedia.
+"""
+import json
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+PROCESSING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "processing")
+
+SONGS = [
+    ("t1", "Bohemian Rhapsody", "Queen", "Rock", "English"),
+    ("t2", "Don't Stop Me Now", "Queen", "Rock", "English"),
+    ("t3", "Bad Guy", "Billie Eilish", "Pop", "English"),
+    ("t4", "Bergema Sampai Selamanya", "Nadhif Basalamah", "Pop", "Indonesian"),
+]
+# Satu file event = satu micro-batch (maxFilesPerTrigger=1)
+EVENT_FILES = [
+    [("u1", "Rock", "Queen", "English"), ("u2", "Pop", "Billie Eilish", "English")],
+    [("u3", "Pop", "Nadhif Basalamah", "Indonesian"), ("u4", "Rock", "Queen", "English")],
+    [("u5", "Pop", "Billie Eilish", "English"), ("u1", "Pop", "Nadhif Basalamah", "Indonesian")],
+]
+CRASH_BATCH = 1
+
+
+def run_query(workdir, crash_batch):
+    """Proses anak: satu query availableNow dari file event ke sink SQLite."""
+    from pyspark.sql import SparkSession
+
+    from recommendation_sink import RecommendationSink
+    from spark_train import RecommendationJob
+    from spark_utils import EVENT_SCHEMA, SONG_COLUMNS
+
+    spark = SparkSession.builder.master("local[1]") \
+        .config("spark.sql.shuffle.partitions", "1") \
+        .config("spark.ui.enabled", "false") \
+        .getOrCreate()
+    checkpoint = os.path.join(workdir, "checkpoint")
+    sink = RecommendationSink(os.path.join(workdir, "rec.db"), stream=checkpoint)
+    job = RecommendationJob(spark, sink, song_df=spark.createDataFrame(SONGS, list(SONG_COLUMNS)))
+
+    def write_batch(batch_df, batch_id):
+        job.generate_recommendation(batch_df, batch_id)
+        if batch_id == crash_batch:
+            # Sink sudah commit, checkpoint Spark belum: batch ini diputar ulang saat restart
+            os.kill(os.getpid(), signal.SIGKILL)
+
+    spark.readStream.schema(EVENT_SCHEMA).option("maxFilesPerTrigger", 1).json(os.path.join(workdir, "events")) \
+        .writeStream \
+        .foreachBatch(write_batch) \
+        .option("checkpointLocation", checkpoint) \
+        .trigger(availableNow=True) \
+        .start() \
+        .awaitTermination()
+    spark.stop()
+
+
+@pytest.mark.skipif(shutil.which("java") is None, reason="Spark needs a Java runtime")
+def test_kill_mid_batch_and_restart_writes_each_batch_once(tmp_path):
+    pytest.importorskip("pyspark")
+    events_dir = tmp_path / "events"
+    events_dir.mkdir()
+    for i, events in enumerate(EVENT_FILES):
+        with open(events_dir / f"events_{i}.json", "w") as f:
+            for user_id, genre, artist, language in events:
+                f.write(json.dumps({"user_id": user_id, "genre": genre, "artist": artist, "language": language,
+                                    "timestamp": "2024-01-01 00:00:00"}) + "\n")
+        # File source mengurutkan file berdasarkan waktu modifikasi
+        os.utime(events_dir / f"events_{i}.json", (1_700_000_000 + i, 1_700_000_000 + i))
+
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([PROCESSING_DIR, os.path.dirname(__file__)])}
+
+    def start(crash_batch):
+        return subprocess.run([sys.executable, __file__, str(tmp_path), str(crash_batch)], env=env, timeout=600)
+
+    assert start(CRASH_BATCH).returncode == -signal.SIGKILL
+    assert start(-1).returncode == 0
+
+    with sqlite3.connect(tmp_path / "rec.db") as conn:
+        applied = conn.execute("SELECT batch_id FROM applied_batches ORDER BY batch_id").fetchall()
+        recommendations = conn.execute("SELECT user_id, track_id, batch_id FROM recommendations").fetchall()
+
+    # Setiap batch tepat satu kali, termasuk batch yang diputar ulang setelah kill
+    assert [batch_id for batch_id, in applied] == list(range(len(EVENT_FILES)))
+    # Tidak ada baris ganda, dan tidak ada user yang hilang
+    assert len(recommendations) == len({(user_id, track_id) for user_id, track_id, _ in recommendations})
+    assert {user_id for user_id, _, _ in recommendations} == {user for events in EVENT_FILES for user, *_ in events}
+    # u1 muncul lagi di batch terakhir: rekomendasinya diganti, bukan ditambahkan
+    assert {(track_id, batch_id) for user_id, track_id, batch_id in recommendations if user_id == "u1"} == {("t4", 2)}
+    assert {track_id for user_id, track_id, _ in recommendations if user_id == "u4"} == {"t1", "t2"}
+
+
+if __name__ == "__main__":
+    run_query(sys.argv[1], int(sys.argv[2]))
@@ -0,0 +1,27 @@
+import io
+
+import pandas as pd
+import pytest
+
+from upload_ingest import UploadSchemaError, ingest_csv, read_preview
+
+
+def test_header_with_spaces_is_ingested(tmp_path):
+    data = b"user_id , rating,genre\nu1, 4.5,Pop\nu2,oops,Rock\n,3,Jazz\nu3,5,Pop\n"
+    summary = ingest_csv(io.BytesIO(data), str(tmp_path / "out"), chunk_rows=2)
+
+    assert summary["columns"] == ["user_id", "rating", "genre"]
+    # Baris "oops" (rating tidak valid) dan baris tanpa user_id dibuang
+    assert summary["rows"] == 2 and summary["invalid_rows"] == 2
+    shards = pd.concat(pd.read_parquet(path) for path in summary["shards"])
+    assert shards["user_id"].tolist() == ["u1", "u3"]
+    assert shards["rating"].tolist() == [4.5, 5.0]
+    assert read_preview(io.BytesIO(data)).columns.tolist() == ["user_id", "rating", "genre"]
+
+
+def test_columns_equal_after_stripping_are_rejected(tmp_path):
+    data = b"user_id,rating, rating\nu1,1,2\n"
+    with pytest.raises(UploadSchemaError):
+        read_preview(io.BytesIO(data))
+    with pytest.raises(UploadSchemaError):
+        ingest_csv(io.BytesIO(data), str(tmp_path / "out"))
@@ -0,0 +1,31 @@
+import pandas as pd
+
+from user_profile import PROFILE_HALF_LIFE_MS, decay_profile, top_preferences
+
+
+def _events(rows, event_ms=0):
+    return pd.DataFrame(rows, columns=["genre", "artist", "language"]).assign(event_ms=event_ms)
+
+
+def test_top_preferences_is_an_observed_combination():
+    # Pop paling sering, tapi tersebar di banyak artist; Queen hanya muncul dengan Rock
+    events = _events([("Pop", f"Artist {i}", "English") for i in range(4)] + [("Rock", "Queen", "English")] * 3)
+    profile, _ = decay_profile({}, None, events)
+    assert top_preferences(profile) == {"genre": "Rock", "artist": "Queen", "language": "English"}
+
+
+def test_combination_weights_decay_with_event_time():
+    profile, last_ms = decay_profile({}, None, _events([("Rock", "Queen", "English")] * 3, event_ms=0))
+    # Satu event jauh lebih baru mengalahkan tiga event lama
+    profile, _ = decay_profile(profile, last_ms, _events([("Pop", "Adele", None)], event_ms=4 * PROFILE_HALF_LIFE_MS))
+    assert top_preferences(profile) == {"genre": "Pop", "artist": "Adele", "language": None}
+
+
+def test_state_without_combinations_uses_top_value_per_dimension():
+    profile = {"genre": {"Pop": 2.0, "Rock": 1.0}, "artist": {"Queen": 1.0}, "language": {}}
+    assert top_preferences(profile) == {"genre": "Pop", "artist": "Queen", "language": None}
+
+
+def test_events_without_any_preference_are_ignored():
+    profile, _ = decay_profile({}, None, _events([(None, "", None)]))
+    assert top_preferences(profile) == {"genre": None, "artist": None, "language": None}
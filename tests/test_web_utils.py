@@ -0,0 +1,47 @@
+import pytest
+
+import utils
+
+
+@pytest.fixture
+def missing_tables(monkeypatch):
+    """Katalog Parquet dan tabel tetangga belum ada; artifact katalog belum dipublikasikan."""
+    calls = {"catalog": 0, "neighbours": 0}
+
+    def missing(name):
+        def load(*args, **kwargs):
+            calls[name] += 1
+            raise FileNotFoundError(name)
+        return load
+
+    monkeypatch.setattr(utils.MusicCatalog, "from_parquet", missing("catalog"))
+    monkeypatch.setattr(utils.NeighbourTable, "load", missing("neighbours"))
+    monkeypatch.setattr(utils._catalog_artifact, "get", lambda: None)
+    monkeypatch.setattr(utils, "_catalog", None)
+    monkeypatch.setattr(utils, "_neighbour_table", None)
+    monkeypatch.setattr(utils, "_load_failed_at", {})
+    return calls
+
+
+def test_failed_loads_are_not_retried_on_every_request(missing_tables):
+    for _ in range(5):
+        assert utils.get_catalog() is utils._dummy_catalog
+        assert utils.get_neighbour_table() is None
+        assert len(utils.get_recommendations("Bohemian Rhapsody", 3)) > 0
+    assert missing_tables == {"catalog": 1, "neighbours": 1}
+
+
+def test_failed_loads_are_retried_after_interval(missing_tables, monkeypatch):
+    utils.get_catalog()
+    utils.get_neighbour_table()
+    monkeypatch.setattr(utils, "LOAD_RETRY_INTERVAL_S", 0.0)
+    utils.get_catalog()
+    utils.get_neighbour_table()
+    assert missing_tables == {"catalog": 2, "neighbours": 2}
+
+
+def test_reload_catalog_retries_immediately(missing_tables):
+    utils.get_catalog()
+    utils.reload_catalog()
+    utils.get_catalog()
+    assert missing_tables["catalog"] == 2
@@ -0,0 +1,164 @@
+"""
+Layanan rekomendasi asyncio (aiohttp) untuk aplikasi Streamlit.
+
+Tabel tetangga content-based dan katalog dimuat sekali saat startup, lalu
+setiap request dijawab dari memori. Hasil disimpan di cache LRU dengan TTL
+sehingga judul lagu yang sering dicari tidak dihitung ulang. Versi katalog
+diperiksa berkala; jika berubah, cache dikosongkan dan tabel dimuat ulang.
+
+Endpoint:
+    GET /recommend?song=<judul>&n=<jumlah>
+    GET /catalog/search?q=<kata kunci>&limit=<jumlah>&offset=<posisi>
+    GET /health
+
+Jalankan (dari folder web/):
+    python api.py [--host 0.0.0.0] [--port 8080]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+
+from aiohttp import web
+
+from cache import TTLCache
+from utils import (
+    get_catalog, get_catalog_version, get_neighbour_table, get_recommendations, reload_catalog, search_catalog
+)
+
+CACHE_SIZE = int(os.environ.get("API_CACHE_SIZE", 10_000))
+CACHE_TTL_S = float(os.environ.get("API_CACHE_TTL_S", 300))
+CATALOG_VERSION_TTL_S = float(os.environ.get("CATALOG_VERSION_TTL_S", 60))
+MAX_RESULTS = 100
+
+_MISSING = object()
+
+# Kunci state aplikasi bertipe (web.AppKey), bukan string
+CACHE_KEY = web.AppKey("cache", TTLCache)
+CATALOG_VERSION_KEY = web.AppKey("catalog_version", str)
+NEIGHBOUR_TABLE_LOADED_KEY = web.AppKey("neighbour_table_loaded", bool)
+
+routes = web.RouteTableDef()
+
+
+def _records(df):
+    """DataFrame -> list of dict yang aman untuk JSON (NaN menjadi None)."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+async def _cached(request, key, compute):
+    """
+    Nilai dari cache; jika belum ada, compute dijalankan di thread pool supaya
+    pencarian/ranking (CPU) dan read_parquet pertama tidak memblokir event loop.
+    """
+    cache = request.app[CACHE_KEY]
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = await asyncio.get_running_loop().run_in_executor(None, compute)
+        cache.set(key, value)
+    return value
+
+
+def _int_param(request, name, default, minimum=1, maximum=MAX_RESULTS):
+    try:
+        return max(minimum, min(maximum, int(request.query.get(name, default))))
+    except ValueError:
+        raise web.HTTPBadRequest(text=f"'{name}' must be an integer")
+
+
+@routes.get("/recommend")
+async def recommend(request):
+    song = request.query.get("song", "").strip()
+    if not song:
+        raise web.HTTPBadRequest(text="'song' is required")
+    n = _int_param(request, "n", 10)
+
+    started = time.perf_counter()
+    key = ("recommend", song.lower(), n)
+    items = await _cached(request, key, lambda: _records(get_recommendations(song, n)))
+    return web.json_response({
+        "song": song,
+        "items": items,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    })
+
+
+@routes.get("/catalog/search")
+async def catalog_search(request):
+    term = request.query.get("q", "").strip()
+    limit = _int_param(request, "limit", 50)
+    offset = _int_param(request, "offset", 0, minimum=0, maximum=2 ** 31)
+
+    def compute():
+        page, total = search_catalog(term, limit, offset)
+        return _records(page), total
+
+    started = time.perf_counter()
+    key = ("search", term.lower(), limit, offset)
+    items, total = await _cached(request, key, compute)
+    return web.json_response({
+        "q": term,
+        "offset": offset,
+        "total": total,
+        "items": items,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    })
+
+
+@routes.get("/health")
+async def health(request):
+    return web.json_response({
+        "status": "ok",
+        "neighbour_table": request.app[NEIGHBOUR_TABLE_LOADED_KEY],
+        "catalog_version": request.app[CATALOG_VERSION_KEY],
+        "cache": request.app[CACHE_KEY].stats(),
+    })
+
+
+def _load_tables(app):
+    # Muat tabel sekali di awal supaya request pertama tidak membayar biaya load
+    app[CATALOG_VERSION_KEY] = get_catalog_version()
+    get_catalog()
+    app[NEIGHBOUR_TABLE_LOADED_KEY] = get_neighbour_table() is not None
+
+
+async def _watch_catalog_version(app):
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(CATALOG_VERSION_TTL_S)
+        version = await loop.run_in_executor(None, get_catalog_version)
+        if version != app[CATALOG_VERSION_KEY]:
+            print(f"Catalog version changed {app[CATALOG_VERSION_KEY]} -> {version}, reloading")
+            reload_catalog()
+            await loop.run_in_executor(None, _load_tables, app)
+            app[CACHE_KEY].clear()
+
+
+async def _catalog_lifecycle(app):
+    await asyncio.get_running_loop().run_in_executor(None, _load_tables, app)
+    watcher = asyncio.create_task(_watch_catalog_version(app))
+    yield
+    watcher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await watcher
+
+
+def create_app():
+    app = web.Application()
+    app[CACHE_KEY] = TTLCache(maxsize=CACHE_SIZE, ttl=CACHE_TTL_S)
+    app.cleanup_ctx.append(_catalog_lifecycle)
+    app.add_routes(routes)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommendation serving API")
+    parser.add_argument("--host", default=os.environ.get("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("API_PORT", 8080)))
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
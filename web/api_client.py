@@ -0,0 +1,32 @@
+import os
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+RECOMMENDER_API_URL = os.environ.get("RECOMMENDER_API_URL", "http://localhost:8080")
+
+
+class RecommenderClient:
+    """Klien HTTP untuk web/api.py dengan connection pool yang dipakai ulang antar request."""
+
+    def __init__(self, base_url: str = RECOMMENDER_API_URL, pool_size: int = 16, timeout: float = 2.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _get(self, path: str, **params) -> dict:
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def recommend(self, song: str, num_recs: int = 10) -> pd.DataFrame:
+        return pd.DataFrame(self._get("/recommend", song=song, n=num_recs)["items"])
+
+    def search(self, search_term: str, limit: int = 50, offset: int = 0) -> tuple:
+        """Satu halaman hasil pencarian: (DataFrame, total lagu yang cocok)."""
+        body = self._get("/catalog/search", q=search_term, limit=limit, offset=offset)
+        return pd.DataFrame(body["items"]), body["total"]
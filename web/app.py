@@ -1,8 +1,12 @@
+import html
+import math
+import os
 import streamlit as st
 import pandas as pd
-import time
-# Mengimpor fungsi dummy dari utils.py
-from utils import get_recommendations_dummy, get_music_info_dummy
+import requests
+from api_client import RecommenderClient
+# Fallback in-process jika layanan API (api.py) tidak berjalan
+from utils import get_catalog, get_catalog_version, get_recommendations, reload_catalog, search_catalog
 
 # --- Konfigurasi Halaman Streamlit ---
 # Mengatur judul halaman, ikon, layout lebar, dan sidebar terbuka secara default
@@ -25,6 +29,13 @@ st.markdown("""
         padding-bottom: 2rem; /* Padding bawah */
     }
 
+    /* Grid kartu: satu halaman hasil dirender sebagai satu blok HTML */
+    .music-grid {
+        display: grid;
+        grid-template-columns: repeat(auto-fill, minmax(200px, 1fr)); /* Jumlah kolom mengikuti lebar layar */
+        gap: 20px;
+    }
+
     /* Gaya dasar untuk kartu musik */
     .music-card {
         background-color: #262730; /* Warna latar belakang kartu, sesuai secondaryBackgroundColor dari config.toml */
@@ -139,6 +150,116 @@ st.markdown("""
 
 st.write("---") # Garis pemisah visual
 
+
+# --- Akses ke layanan rekomendasi (api.py) dan cache hasil ---
+# Hasil dibagi antar rerun dan sesi; entri kedaluwarsa setelah TTL dan jumlahnya dibatasi
+CACHE_TTL_S = int(os.environ.get("WEB_CACHE_TTL_S", 600))
+CACHE_MAX_ENTRIES = int(os.environ.get("WEB_CACHE_MAX_ENTRIES", 1000))
+# Seberapa sering versi katalog di MinIO diperiksa
+CATALOG_VERSION_TTL_S = int(os.environ.get("CATALOG_VERSION_TTL_S", 60))
+# Jumlah kartu per halaman katalog (bisa diubah pengguna di halaman katalog)
+PAGE_SIZE = int(os.environ.get("WEB_PAGE_SIZE", 24))
+PAGE_SIZE_OPTIONS = sorted({12, 24, 48, 96, PAGE_SIZE})
+
+
+@st.cache_resource
+def get_api_client():
+    # Satu klien (dan connection pool) untuk semua sesi Streamlit
+    return RecommenderClient()
+
+
+@st.cache_data(ttl=CATALOG_VERSION_TTL_S, show_spinner=False)
+def current_catalog_version() -> str:
+    return get_catalog_version()
+
+
+@st.cache_resource(max_entries=1, show_spinner="Memuat katalog musik...")
+def load_catalog(catalog_version: str):
+    # Satu katalog per versi; versi baru menggantikan yang lama
+    return get_catalog()
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_recommendations(song: str, num_recs: int, catalog_version: str) -> pd.DataFrame:
+    try:
+        return get_api_client().recommend(song, num_recs)
+    except requests.RequestException:
+        return get_recommendations(song, num_recs)
+
+
+@st.cache_data(ttl=CACHE_TTL_S, max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def fetch_catalog_page(search_term: str, page: int, page_size: int, catalog_version: str) -> tuple:
+    # Hanya satu halaman yang diambil; halaman berikutnya diambil saat dibuka
+    try:
+        return get_api_client().search(search_term, page_size, page * page_size)
+    except requests.RequestException:
+        return search_catalog(search_term, page_size, page * page_size, catalog=load_catalog(catalog_version))
+
+
+@st.cache_resource
+def _catalog_state() -> dict:
+    return {}
+
+
+def sync_catalog_version() -> str:
+    """
+    Hook invalidasi: jika versi katalog berubah, kosongkan semua cache hasil dan
+    muat ulang katalog. Versi juga menjadi bagian kunci cache, jadi entri lama
+    tidak pernah terbaca lagi meski belum kedaluwarsa.
+    """
+    version = current_catalog_version()
+    state = _catalog_state()
+    if state.get("version") not in (None, version):
+        reload_catalog()
+        load_catalog.clear()
+        fetch_recommendations.clear()
+        fetch_catalog_page.clear()
+    state["version"] = version
+    return version
+
+
+catalog_version = sync_catalog_version()
+
+
+# --- Render kartu musik ---
+NO_IMAGE_URL = "https://via.placeholder.co/200x200/808080/ffffff?text=No+Image"
+CARD_TEMPLATE = (
+    '<div class="music-card"><img src="{image_url}" alt="Album Art for {title}">'
+    '<h5>{title}</h5><p>Oleh: {artist}</p>'
+    '<div class="genre-year"><p>{genre} | {year}</p></div></div>'
+)
+
+
+def render_card_grid(df: pd.DataFrame):
+    """Merender semua kartu dalam satu st.markdown (satu delta ke browser per halaman)."""
+    cards = "".join(
+        CARD_TEMPLATE.format(
+            image_url=html.escape(row.get("Image_URL") or NO_IMAGE_URL),
+            title=html.escape(str(row["Title"])),
+            artist=html.escape(str(row["Artist"])),
+            genre=html.escape(str(row["Genre"])),
+            year=html.escape(str(row["Year"])),
+        )
+        for row in df.to_dict("records")
+    )
+    st.markdown(f'<div class="music-grid">{cards}</div>', unsafe_allow_html=True)
+
+
+def _set_page(key: str, page: int):
+    st.session_state[key] = max(0, page)
+
+
+def pagination_controls(key: str, page: int, pages: int):
+    """Tombol sebelumnya/berikutnya; nomor halaman disimpan di session_state[key]."""
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    prev_col.button("⬅️ Sebelumnya", key=f"{key}_prev", disabled=page <= 0,
+                    on_click=_set_page, args=(key, page - 1), use_container_width=True)
+    info_col.markdown(f"<p style='text-align:center'>Halaman {page + 1} dari {pages}</p>",
+                      unsafe_allow_html=True)
+    next_col.button("Berikutnya ➡️", key=f"{key}_next", disabled=page >= pages - 1,
+                    on_click=_set_page, args=(key, page + 1), use_container_width=True)
+
+
 # --- SIDEBAR UNTUK NAVIGASI ---
 st.sidebar.header("Pilih Menu 🎼") # Judul sidebar
 st.sidebar.markdown("Navigasikan melalui fitur utama aplikasi kami.") # Deskripsi sidebar
@@ -192,34 +313,15 @@ if page_selection == "Dapatkan Rekomendasi 🎶":
             if user_song_input:
                 # Menampilkan spinner saat proses loading
                 with st.spinner(f"Mencari rekomendasi untuk '{user_song_input}'..."):
-                    time.sleep(2) # Simulasi waktu loading backend
-
-                    # Memanggil fungsi dummy untuk mendapatkan rekomendasi
-                    recommendations_df = get_recommendations_dummy(user_song_input, num_recommendations)
+                    # Lookup ke tabel tetangga content-based yang sudah dihitung (fallback ke data dummy)
+                    recommendations_df = fetch_recommendations(user_song_input, num_recommendations, catalog_version)
 
                     if not recommendations_df.empty:
                         st.success(f"Ditemukan {len(recommendations_df)} rekomendasi untuk '{user_song_input}'!")
                         st.markdown("<br>", unsafe_allow_html=True) # Spasi visual
 
                         # --- Menampilkan Rekomendasi dalam Format Kartu ---
-                        num_cols = 4 # Jumlah kolom untuk tampilan desktop
-                        # st.columns akan secara otomatis menyesuaikan jumlah kolom berdasarkan lebar layar
-                        cols = st.columns(num_cols)
-                        
-                        for i, row in recommendations_df.iterrows():
-                            # Mendapatkan URL gambar dari data dummy, dengan fallback jika tidak ada
-                            image_url = row.get('Image_URL', 'https://via.placeholder.co/200x200/808080/ffffff?text=No+Image')
-                            with cols[i % num_cols]: # Mendistribusikan kartu ke kolom secara bergantian
-                                st.markdown(f"""
-                                <div class="music-card">
-                                    <img src="{image_url}" alt="Album Art for {row['Title']}">
-                                    <h5>{row['Title']}</h5>
-                                    <p>Oleh: {row['Artist']}</p>
-                                    <div class="genre-year">
-                                        <p>{row['Genre']} | {row['Year']}</p>
-                                    </div>
-                                </div>
-                                """, unsafe_allow_html=True)
+                        render_card_grid(recommendations_df)
                         st.markdown("<br>", unsafe_allow_html=True) # Spasi setelah kartu
                     else:
                         st.warning(f"Ups! Tidak dapat menemukan rekomendasi untuk '{user_song_input}'. Coba judul lagu lain atau periksa ejaannya.")
@@ -237,55 +339,39 @@ elif page_selection == "Jelajahi Katalog 🎧":
     """)
 
     with st.container(border=True):
-        # Input teks untuk pencarian musik di katalog
-        search_term = st.text_input("🔍 Cari Musik (Judul atau Artis):",
-                                    placeholder="Misalnya: Queen, Blinding Lights",
-                                    help="Ketik untuk menyaring katalog musik.")
-
-        # Mengambil semua data musik dummy yang tersedia
-        # Perhatikan: get_music_info_dummy(limit=len(get_music_info_dummy(limit=1000))) memastikan kita mendapatkan
-        # semua data dummy yang ada, bukan hanya 100 teratas dari default
-        all_music_df = get_music_info_dummy(limit=len(get_music_info_dummy(limit=1000)))
-
-        if not all_music_df.empty:
-            filtered_df = all_music_df
-            # Menyaring DataFrame jika ada term pencarian
-            if search_term:
-                filtered_df = all_music_df[
-                    all_music_df['Title'].str.contains(search_term, case=False, na=False) |
-                    all_music_df['Artist'].str.contains(search_term, case=False, na=False)
-                ]
-
-            if not filtered_df.empty:
-                st.success(f"Ditemukan {len(filtered_df)} lagu yang cocok.")
-                st.markdown("<br>", unsafe_allow_html=True) # Spasi
-
-                # --- Menampilkan Kartu Musik dalam Kolom Responsif ---
-                num_cols_desktop = 4 # Jumlah kolom yang diinginkan untuk tampilan desktop
-                # Streamlit's st.columns akan secara otomatis mengatur penumpukan kolom pada layar yang lebih kecil (mis. mobile)
-                cols = st.columns(num_cols_desktop)
-                
-                # Iterasi melalui baris DataFrame yang difilter untuk membuat kartu
-                for i, row in filtered_df.iterrows():
-                    # Mendapatkan URL gambar dari data dummy, dengan fallback jika tidak ada
-                    image_url = row.get('Image_URL', 'https://via.placeholder.co/200x200/808080/ffffff?text=No+Image')
-                    with cols[i % num_cols_desktop]: # Mendistribusikan kartu secara bergantian ke kolom
-                        st.markdown(f"""
-                        <div class="music-card">
-                            <img src="{image_url}" alt="Album Art for {row['Title']}">
-                            <h5>{row['Title']}</h5>
-                            <p>Oleh: {row['Artist']}</p>
-                            <div class="genre-year">
-                                <p>{row['Genre']} | {row['Year']}</p>
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                st.markdown("<br>", unsafe_allow_html=True) # Spasi setelah kartu
+        # Input teks untuk pencarian musik di katalog; pencarian baru kembali ke halaman pertama
+        search_col, size_col = st.columns([3, 1])
+        with search_col:
+            search_term = st.text_input("🔍 Cari Musik (Judul atau Artis):",
+                                        placeholder="Misalnya: Queen, Blinding Lights",
+                                        help="Ketik untuk menyaring katalog musik.",
+                                        on_change=_set_page, args=("catalog_page", 0))
+        with size_col:
+            page_size = st.selectbox("Kartu per halaman:", PAGE_SIZE_OPTIONS,
+                                     index=PAGE_SIZE_OPTIONS.index(PAGE_SIZE),
+                                     on_change=_set_page, args=("catalog_page", 0))
+
+        # Hanya halaman yang sedang dilihat yang diambil (lewat API atau katalog in-process),
+        # di-cache per (term, halaman, ukuran halaman, versi katalog)
+        page = st.session_state.get("catalog_page", 0)
+        page_df, total = fetch_catalog_page(search_term, page, page_size, catalog_version)
+        pages = max(1, math.ceil(total / page_size))
+        if page >= pages:
+            page = pages - 1
+            _set_page("catalog_page", page)
+            page_df, total = fetch_catalog_page(search_term, page, page_size, catalog_version)
+
+        if total:
+            st.success(f"Ditemukan {total} lagu yang cocok.")
+            st.markdown("<br>", unsafe_allow_html=True) # Spasi
+
+            # --- Menampilkan satu halaman kartu musik ---
+            render_card_grid(page_df)
+            st.markdown("<br>", unsafe_allow_html=True) # Spasi setelah kartu
+            pagination_controls("catalog_page", page, pages)
 
-            else:
-                st.info("Tidak ada musik yang cocok dengan pencarian Anda.")
         else:
-            st.error("Tidak ada data musik yang tersedia untuk ditampilkan. Mohon periksa sumber data.")
+            st.info("Tidak ada musik yang cocok dengan pencarian Anda.")
 
     st.write("---")
 
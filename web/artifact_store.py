@@ -0,0 +1,259 @@
+"""
+Registry artifact model berversi (faktor item, tabel tetangga, index katalog).
+
+Setiap artifact disimpan sebagai file datar di disk lokal:
+
+    <ARTIFACT_DIR>/<name>/v=<version>/manifest.json
+    <ARTIFACT_DIR>/<name>/v=<version>/<array>.npy     array NumPy (dibaca dengan mmap)
+    <ARTIFACT_DIR>/<name>/v=<version>/<table>.arrow   tabel Arrow IPC (dibaca dengan mmap)
+    <ARTIFACT_DIR>/<name>/CURRENT                     versi yang aktif
+
+Konsumen membuka file dengan memory map, jadi semua proses worker (Streamlit,
+API) yang memakai versi yang sama berbagi page cache yang sama alih-alih
+masing-masing menyalin data ke heap. Versi baru ditulis ke folder sementara,
+di-rename menjadi v=<version>, lalu CURRENT diganti dengan os.replace: pembaca
+selalu melihat versi lama atau versi baru yang lengkap. ArtifactHandle
+memeriksa CURRENT secara berkala dan menukar ke versi baru tanpa restart;
+versi lama tetap valid selama masih direferensikan.
+
+Jika ARTIFACT_REMOTE diisi (mis. s3://music-data/artifacts), publish juga
+mengunggah versi ke MinIO dan load mengunduh versi yang belum ada di disk
+lokal sebelum di-mmap.
+
+Jalankan:
+    python web/artifact_store.py publish-catalog [--catalog PATH]
+    python web/artifact_store.py list catalog
+    python web/artifact_store.py prune catalog [--keep 3]
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pyarrow as pa
+
+ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", "data/artifacts")
+ARTIFACT_REMOTE = os.environ.get("ARTIFACT_REMOTE")
+# Seberapa sering ArtifactHandle memeriksa pointer CURRENT
+ARTIFACT_CHECK_INTERVAL_S = float(os.environ.get("ARTIFACT_CHECK_INTERVAL_S", 30))
+ARTIFACT_KEEP = 3
+
+logger = logging.getLogger(__name__)
+
+
+def _write_text(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class Artifact:
+    """Satu versi artifact yang sudah dibuka: arrays (np.memmap) dan tables (pa.Table berbasis mmap)."""
+
+    def __init__(self, name, version, path):
+        self.name = name
+        self.version = version
+        self.path = path
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.arrays = {key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r")
+                       for key in self.manifest["arrays"]}
+        self.tables = {key: pa.ipc.open_file(pa.memory_map(os.path.join(path, f"{key}.arrow"))).read_all()
+                       for key in self.manifest["tables"]}
+
+    @property
+    def metadata(self):
+        return self.manifest.get("metadata", {})
+
+
+class ArtifactStore:
+    """Artifact berversi di folder lokal, opsional dengan mirror di MinIO/S3 (remote)."""
+
+    def __init__(self, root=ARTIFACT_DIR, remote=ARTIFACT_REMOTE, storage_options=None):
+        self.root = root
+        self.remote = remote.rstrip("/") if remote else None
+        self.storage_options = storage_options or {}
+
+    def _remote_fs(self):
+        import fsspec
+
+        return fsspec.filesystem(self.remote.split("://", 1)[0], **self.storage_options)
+
+    def _version_dir(self, name, version):
+        return os.path.join(self.root, name, f"v={version}")
+
+    def publish(self, name, arrays=None, tables=None, metadata=None, version=None):
+        """
+        Menulis versi baru (arrays: nama -> ndarray, tables: nama -> pa.Table/DataFrame)
+        lalu menjadikannya versi aktif. Mengembalikan versi.
+        """
+        arrays, tables = arrays or {}, tables or {}
+        version = version or time.strftime("%Y%m%d%H%M%S")
+        target = self._version_dir(name, version)
+        if os.path.exists(target):
+            raise FileExistsError(f"Artifact {name} v={version} already exists")
+        tmp = os.path.join(self.root, name, f".tmp-{version}-{os.getpid()}")
+        os.makedirs(tmp)
+
+        for key, array in arrays.items():
+            np.save(os.path.join(tmp, f"{key}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+        for key, table in tables.items():
+            if not isinstance(table, pa.Table):
+                table = pa.Table.from_pandas(table, preserve_index=False)
+            with pa.OSFile(os.path.join(tmp, f"{key}.arrow"), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+        manifest = {"name": name, "version": version, "created_at": time.time(),
+                    "arrays": sorted(arrays), "tables": sorted(tables), "metadata": metadata or {}}
+        with open(os.path.join(tmp, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+
+        os.rename(tmp, target)
+        if self.remote:
+            fs = self._remote_fs()
+            fs.put(target, f"{self.remote}/{name}/v={version}", recursive=True)
+            fs.pipe(f"{self.remote}/{name}/CURRENT", version.encode())
+        _write_text(os.path.join(self.root, name, "CURRENT"), version)
+        return version
+
+    def current_version(self, name):
+        """Versi aktif (dari remote jika dikonfigurasi), atau None jika belum ada."""
+        if self.remote:
+            try:
+                return self._remote_fs().cat(f"{self.remote}/{name}/CURRENT").decode().strip() or None
+            except FileNotFoundError:
+                return None
+        try:
+            with open(os.path.join(self.root, name, "CURRENT")) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _fetch(self, name, version):
+        """Mengunduh versi dari remote ke disk lokal (folder sementara lalu rename)."""
+        target = self._version_dir(name, version)
+        if os.path.exists(target) or not self.remote:
+            return target
+        tmp = os.path.join(self.root, name, f".fetch-{version}-{os.getpid()}")
+        self._remote_fs().get(f"{self.remote}/{name}/v={version}", tmp, recursive=True)
+        try:
+            os.rename(tmp, target)
+        except OSError:
+            # Proses lain sudah lebih dulu mengunduh versi yang sama
+            shutil.rmtree(tmp, ignore_errors=True)
+        return target
+
+    def load(self, name, version=None):
+        """Membuka versi artifact (default: versi aktif) dengan mmap; None jika belum ada."""
+        version = version or self.current_version(name)
+        if version is None:
+            return None
+        return Artifact(name, version, self._fetch(name, version))
+
+    def versions(self, name):
+        """Versi yang tersedia di disk lokal, terlama dulu."""
+        directory = os.path.join(self.root, name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(entry[2:] for entry in os.listdir(directory) if entry.startswith("v="))
+
+    def prune(self, name, keep=ARTIFACT_KEEP):
+        """
+        Menghapus versi lokal lama selain keep versi terbaru dan versi aktif. Proses
+        yang masih me-mmap versi lama tidak terganggu (file baru benar-benar hilang
+        setelah mapping ditutup).
+        """
+        current = self.current_version(name)
+        removed = []
+        for version in self.versions(name)[:-keep or None]:
+            if version != current:
+                shutil.rmtree(self._version_dir(name, version))
+                removed.append(version)
+        return removed
+
+
+class ArtifactHandle:
+    """
+    Referensi ke versi aktif sebuah artifact untuk kode serving. get() memeriksa
+    CURRENT paling sering setiap check_interval_s detik dan menukar ke versi baru
+    secara atomik; loader (opsional) mengubah Artifact menjadi objek siap pakai.
+    """
+
+    def __init__(self, store, name, loader=None, check_interval_s=ARTIFACT_CHECK_INTERVAL_S):
+        self.store = store
+        self.name = name
+        self.loader = loader
+        self.check_interval_s = check_interval_s
+        self.version = None
+        self._value = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Objek untuk versi aktif, atau None jika artifact belum dipublikasikan."""
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= self.check_interval_s:
+            with self._lock:
+                if self._checked_at is None or now - self._checked_at >= self.check_interval_s:
+                    self._refresh()
+                    self._checked_at = now
+        return self._value
+
+    def _refresh(self):
+        try:
+            version = self.store.current_version(self.name)
+        except (OSError, ImportError):
+            return
+        if version is None or version == self.version:
+            return
+        artifact = self.store.load(self.name, version)
+        value = self.loader(artifact) if self.loader else artifact
+        # Pembaca lain melihat objek lama atau baru, tidak pernah setengah jadi
+        self._value, self.version = value, version
+        logger.info("Artifact %s swapped to v=%s", self.name, version)
+
+    def invalidate(self):
+        """Memaksa pemeriksaan CURRENT pada get() berikutnya."""
+        self._checked_at = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Versioned model artifact store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    publish_parser = sub.add_parser("publish-catalog", help="Bangun katalog + index trigram lalu publikasikan")
+    publish_parser.add_argument("--catalog", help="Path Parquet katalog (default CATALOG_PATH)")
+    list_parser = sub.add_parser("list")
+    list_parser.add_argument("name")
+    prune_parser = sub.add_parser("prune")
+    prune_parser.add_argument("name")
+    prune_parser.add_argument("--keep", type=int, default=ARTIFACT_KEEP)
+    args = parser.parse_args()
+
+    try:
+        from utils import CATALOG_PATH, S3_STORAGE_OPTIONS, MusicCatalog
+    except ImportError:  # dijalankan dari root repo
+        from web.utils import CATALOG_PATH, S3_STORAGE_OPTIONS, MusicCatalog
+    store = ArtifactStore(storage_options=S3_STORAGE_OPTIONS)
+
+    if args.command == "publish-catalog":
+        started = time.perf_counter()
+        catalog = MusicCatalog.from_parquet(args.catalog or CATALOG_PATH)
+        arrays, tables = catalog.to_artifact()
+        version = store.publish("catalog", arrays, tables, metadata={"source": args.catalog or CATALOG_PATH,
+                                                                     "rows": len(catalog)})
+        print(f"Published catalog v={version} ({len(catalog)} songs) in {time.perf_counter() - started:.1f}s")
+    elif args.command == "list":
+        current = store.current_version(args.name)
+        for version in store.versions(args.name):
+            print(f"{version}{'  (current)' if version == current else ''}")
+    else:
+        print(f"Removed: {', '.join(store.prune(args.name, args.keep)) or 'nothing'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import numpy as np
+
+# Fraksi trigram query yang harus ada di dokumen agar dianggap cocok (fuzzy)
+FUZZY_MIN_SCORE = 0.5
+# Trigram yang ada di >= 1/BITMAP_RATIO dokumen juga disimpan sebagai bitmap
+# (ukurannya tidak melebihi posting list-nya): uji keanggotaan O(1) dan AND per word
+BITMAP_RATIO = 32
+# Batas jumlah dokumen kandidat yang diberi skor pada pencarian fuzzy dengan limit. Pencarian
+# penuh tidak perlu dibatasi: trigram terjarangnya ada di < 1/BITMAP_RATIO dokumen,
+# atau semua trigramnya punya bitmap
+MAX_CANDIDATES = 30_000
+
+
+def _normalize(text) -> str:
+    """Huruf kecil, spasi dirapikan, diapit spasi supaya awal kata punya trigram sendiri."""
+    return " " + " ".join(str(text).lower().split()) + " "
+
+
+def _trigram_codes(data: bytes) -> np.ndarray:
+    buf = np.frombuffer(data, dtype=np.uint8).astype(np.int64)
+    return (buf[:-2] << 16) | (buf[1:-1] << 8) | buf[2:]
+
+
+def _pack_bits(ids: np.ndarray, size: int) -> np.ndarray:
+    """Bitmap uint64 (bit i di word i // 64, posisi i % 64) dari nomor dokumen ids."""
+    mask = np.zeros(-(-size // 64) * 64, dtype=bool)
+    mask[ids] = True
+    return np.packbits(mask, bitorder="little").view("<u8")
+
+
+def _bit_ids(words: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """Nomor dokumen (terurut) dari bit yang menyala di words[positions]."""
+    bits = np.flatnonzero(np.unpackbits(np.ascontiguousarray(words[positions]).view(np.uint8), bitorder="little"))
+    return positions[bits >> 6].astype(np.int64) * 64 + (bits & 63)
+
+
+def _run_starts(values: np.ndarray) -> np.ndarray:
+    """Posisi awal setiap deret nilai yang sama pada array terurut."""
+    if not len(values):
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+
+
+class TrigramIndex:
+    """
+    Inverted index trigram (byte) di memori untuk pencarian teks bebas.
+
+    Index dibangun sekali secara vektor: semua dokumen digabung menjadi satu
+    buffer, kode trigram dihitung dengan NumPy, lalu pasangan (trigram, dokumen)
+    yang unik disimpan sebagai posting list terurut (format CSR). Dokumen diberi
+    nomor internal urut (panjang, doc id), jadi di antara dokumen dengan skor
+    sama, nomor terkecil adalah yang paling spesifik; doc_ids memetakan kembali
+    ke doc id. Query dijawab dengan menghitung berapa trigram query yang ada di
+    setiap dokumen kandidat:
+
+      - prefix : kata terakhir query boleh berupa awalan ("bohem" -> "bohemian")
+      - fuzzy  : jika hasil yang cocok penuh kurang dari limit, dokumen dengan
+                 >= FUZZY_MIN_SCORE trigram yang sama ikut disertakan (salah ketik)
+      - ranked : urut berdasarkan skor, lalu dokumen terpendek (paling spesifik)
+
+    Trigram diproses dari yang paling jarang: kandidat hanya diambil dari
+    posting list terjarang dan dipangkas setelah setiap trigram begitu skornya
+    tidak bisa lagi mencapai batas. Trigram umum (" th", "ove") punya bitmap,
+    jadi mengujinya tidak bergantung pada panjang posting list, dan query yang
+    hanya terdiri dari trigram umum dijawab dengan AND bitmap; top-limit-nya
+    adalah bit pertama yang menyala. Pencarian fuzzy memberi skor paling banyak
+    MAX_CANDIDATES dokumen.
+    """
+
+    def __init__(self, texts):
+        docs = [_normalize(t) for t in texts]
+        encoded = [doc.encode("utf-8") for doc in docs]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        self.doc_ids = np.argsort(lengths, kind="stable").astype(np.uint32)
+        internal = np.empty(len(encoded), dtype=np.int64)
+        internal[self.doc_ids] = np.arange(len(encoded))
+
+        codes = _trigram_codes(b"".join(encoded))
+        doc_of_byte = np.repeat(internal, lengths)
+        # Buang trigram yang melintasi batas dua dokumen
+        within_doc = doc_of_byte[:-2] == doc_of_byte[2:]
+        pairs = (codes[within_doc] << 32) | doc_of_byte[:-2][within_doc]
+        pairs.sort()
+        pairs = pairs[_run_starts(pairs)]
+
+        trigram_of_pair = pairs >> 32
+        starts = _run_starts(trigram_of_pair)
+        self.trigrams = trigram_of_pair[starts]
+        self.offsets = np.append(starts, len(pairs))
+        self.postings = (pairs & 0xFFFFFFFF).astype(np.uint32)
+
+        frequent = np.flatnonzero(np.diff(self.offsets) * BITMAP_RATIO >= len(encoded))
+        self.bitmap_rows = np.full(len(self.trigrams), -1, dtype=np.int32)
+        self.bitmap_rows[frequent] = np.arange(len(frequent))
+        words = -(-len(encoded) // 64)
+        self.bitmaps = np.zeros((len(frequent), words), dtype="<u8")
+        for row, pos in enumerate(frequent):
+            self.bitmaps[row] = _pack_bits(self._posting(pos), len(encoded))
+
+    # Array yang membentuk index; disimpan/dibuka ulang tanpa membangun ulang (artifact_store.py)
+    ARRAYS = ("doc_ids", "trigrams", "offsets", "postings", "bitmap_rows", "bitmaps")
+
+    @classmethod
+    def from_arrays(cls, arrays) -> "TrigramIndex":
+        """Index dari array yang sudah dibangun sebelumnya (boleh berupa np.memmap)."""
+        index = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(index, name, arrays[name])
+        return index
+
+    def to_arrays(self) -> dict:
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def _posting(self, pos):
+        return self.postings[self.offsets[pos]:self.offsets[pos + 1]]
+
+    def _bitmap(self, pos):
+        row = self.bitmap_rows[pos]
+        return self.bitmaps[row] if row >= 0 else None
+
+    def _terms(self, query: str):
+        """
+        (posting list, bitmap atau None) per trigram query; trigram yang tidak ada
+        di index menjadi list kosong tanpa bitmap.
+        """
+        normalized = _normalize(query)[:-1]  # tanpa spasi penutup: kata terakhir boleh berupa awalan
+        data = normalized.encode("utf-8")
+        if len(data) < 3:
+            # Satu karakter: gabungan semua trigram " x?" (kata yang diawali karakter tersebut)
+            if len(data) < 2:
+                return []
+            low = (data[0] << 16) | (data[1] << 8)
+            first = np.searchsorted(self.trigrams, low, side="left")
+            last = np.searchsorted(self.trigrams, low + 0xFF, side="right")
+            sparse = [self._posting(p) for p in range(first, last) if self.bitmap_rows[p] < 0]
+            words = _pack_bits(np.concatenate(sparse), len(self)) if sparse else np.zeros(self.bitmaps.shape[1], "<u8")
+            dense = self.bitmap_rows[first:last]
+            if (dense >= 0).any():
+                words |= np.bitwise_or.reduce(self.bitmaps[dense[dense >= 0]], axis=0)
+            return [(None, words)]
+
+        codes = np.unique(_trigram_codes(data))
+        positions = np.searchsorted(self.trigrams, codes)
+        return [
+            (self._posting(pos), self._bitmap(pos)) if pos < len(self.trigrams) and self.trigrams[pos] == code
+            else (self.postings[:0], None)
+            for code, pos in zip(codes, positions)
+        ]
+
+    @staticmethod
+    def _df(term) -> int:
+        postings, bitmap = term
+        return len(postings) if postings is not None else int(np.bitwise_count(bitmap).sum())
+
+    def _weights(self, df) -> np.ndarray:
+        """Bobot IDF per trigram query: trigram yang jarang lebih menentukan daripada yang umum."""
+        weights = np.log1p(len(self) / np.maximum(df, 1.0))
+        # Trigram yang tidak ada di index (biasanya salah ketik) diberi bobot rata-rata,
+        # bukan bobot maksimum, supaya satu typo tidak menggagalkan kecocokan fuzzy
+        absent = df == 0
+        if absent.any() and not absent.all():
+            weights[absent] = weights[~absent].mean()
+        return weights
+
+    def _match_bitmaps(self, bitmaps, limit):
+        """Dokumen yang ada di semua bitmap: limit nomor internal terkecil dan jumlah totalnya."""
+        words = bitmaps[0].copy()
+        for bitmap in bitmaps[1:]:
+            words &= bitmap
+        nonzero = np.flatnonzero(words)
+        counts = np.bitwise_count(words[nonzero])
+        if limit is not None:
+            # Cukup word pertama yang memuat limit bit menyala
+            nonzero = nonzero[:np.searchsorted(np.cumsum(counts), limit) + 1]
+        ids = _bit_ids(words, nonzero)
+        return ids[:limit], int(counts.sum())
+
+    def _match(self, terms, weights, needed, limit, max_candidates=None):
+        """
+        Dokumen dengan total bobot trigram yang cocok >= needed (terms terurut dari
+        yang paling jarang). Mengembalikan (nomor internal, skor) teratas sebanyak
+        limit dan jumlah seluruh dokumen yang cocok (batas bawah jika kandidat
+        dibatasi max_candidates).
+        """
+        remaining = np.append(np.cumsum(weights[::-1])[::-1], 0.0)
+        if all(bitmap is not None for _, bitmap in terms) and remaining[1] < needed:
+            # Semua trigram wajib dan umum: cukup AND bitmap, skor semua dokumen sama
+            ids, total = self._match_bitmaps([bitmap for _, bitmap in terms], limit)
+            return ids, np.full(len(ids), remaining[0]), total
+
+        # Dokumen yang lolos pasti ada di salah satu trigram terjarang: trigram yang
+        # lebih umum (sisa setelah seed) bobotnya tidak cukup untuk mencapai needed sendirian.
+        # Dengan max_candidates, kandidat diambil dari seed terjarang dulu dan berhenti
+        # di batas tersebut (dokumen terpendek lebih dulu).
+        seeds = [postings for postings, _ in terms[:int(np.sum(remaining[:-1] >= needed))]]
+        used = len(seeds)
+        if max_candidates is not None:
+            used = max(1, int(np.searchsorted(np.cumsum([len(p) for p in seeds]), max_candidates, side="right")))
+        if used == 1:
+            candidates = seeds[0][:max_candidates].astype(np.int64)
+        else:
+            candidates = np.concatenate(seeds[:used]).astype(np.int64)
+            candidates.sort()
+            candidates = candidates[_run_starts(candidates)]
+        scores = np.zeros(len(candidates))
+        alive = candidate_bits = rank = words = None
+
+        for i, ((postings, bitmap), weight) in enumerate(zip(terms, weights)):
+            # Kandidat yang gugur cukup ditandai (skornya tidak bisa naik lagi melewati
+            # needed); array baru dipadatkan sebelum uji yang biayanya per kandidat
+            if alive is not None and (bitmap is not None or np.count_nonzero(alive) * 16 < len(postings)):
+                candidates, scores, alive, candidate_bits, words = candidates[alive], scores[alive], None, None, None
+            if bitmap is not None and len(postings) > len(candidates):
+                if words is None:
+                    words, shifts = candidates >> 6, (candidates & 63).astype(np.uint64)
+                scores += weight * ((bitmap[words] >> shifts) & 1)
+            elif len(candidates) * 16 < len(postings):
+                idx = np.minimum(np.searchsorted(postings, candidates), len(postings) - 1)
+                scores += weight * (postings[idx] == candidates)
+            elif len(postings):
+                # Posisi setiap posting di kandidat lewat bitmap kandidat (rank = jumlah
+                # kandidat sebelum word tersebut): O(panjang posting list), tanpa binary search
+                if candidate_bits is None:
+                    candidate_bits = _pack_bits(candidates, len(self))
+                    rank = np.concatenate(([0], np.cumsum(np.bitwise_count(candidate_bits), dtype=np.int64)))
+                bits, offsets = candidate_bits[postings >> 6], (postings & 63).astype(np.uint64)
+                hit = ((bits >> offsets) & 1).astype(bool)
+                position = rank[postings >> 6] + np.bitwise_count(bits & ((np.uint64(1) << offsets) - np.uint64(1)))
+                scores[position[hit]] += weight
+            # Kandidat yang tidak bisa lagi mencapai needed dengan trigram sisanya
+            keep = scores + remaining[i + 1] >= needed
+            alive = None if keep.all() else keep
+            if not keep.any():
+                break
+        if alive is not None:
+            candidates, scores = candidates[alive], scores[alive]
+        total = len(candidates)
+        return (*self._rank(candidates, scores, limit), total)
+
+    @staticmethod
+    def _rank(ids, scores, limit):
+        """limit dokumen teratas: skor tertinggi, lalu nomor internal (dokumen terpendek, lalu doc id)."""
+        if limit is not None and len(ids) > limit:
+            # Kunci gabungan dipakai untuk memilih top-limit tanpa mengurutkan semua hasil
+            keys = (np.round((scores.max() - scores) / max(scores.max(), 1e-12) * 0x7FFF).astype(np.int64) << 32) \
+                | ids
+            top = np.argpartition(keys, limit - 1)[:limit]
+            ids, scores = ids[top], scores[top]
+        order = np.lexsort((ids, -scores))
+        return ids[order], scores[order]
+
+    def search(self, query: str, limit: int = None, fuzzy: bool = True):
+        """
+        Dokumen yang cocok dengan query, terurut dari yang paling relevan.
+        Mengembalikan (doc id, skor 0..1, total dokumen yang cocok); doc id dan
+        skor dibatasi limit, total tidak (kecuali hasil fuzzy dengan limit: total
+        dihitung dari paling banyak MAX_CANDIDATES kandidat).
+        """
+        terms = self._terms(query)
+        if not terms or not len(self):
+            return np.empty(0, dtype=np.int64), np.empty(0), 0
+
+        df = np.array([self._df(term) for term in terms], dtype=np.float64)
+        order = np.argsort(df, kind="stable")
+        terms = [terms[i] for i in order]
+        weights = self._weights(df[order])
+        total_weight = weights.sum()
+        ids, scores, total = self._match(terms, weights, total_weight * (1 - 1e-9), limit)
+        if fuzzy and len(terms) > 1 and (limit is None or total < limit):
+            max_candidates = MAX_CANDIDATES if limit is not None else None
+            ids, scores, total = self._match(terms, weights, total_weight * FUZZY_MIN_SCORE, limit, max_candidates)
+        return self.doc_ids[ids].astype(np.int64), scores / total_weight, total
+
+    def resolve(self, query: str):
+        """Doc id terbaik untuk query teks bebas, atau None jika tidak ada yang cukup mirip."""
+        ids, _, _ = self.search(query, limit=1)
+        return int(ids[0]) if len(ids) else None
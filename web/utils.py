@@ -1,5 +1,48 @@
+import os
+import sqlite3
+import time
+import numpy as np
 import pandas as pd
-import random
+import pyarrow as pa
+
+try:
+    from artifact_store import ArtifactHandle, ArtifactStore
+    from search_index import TrigramIndex
+except ImportError:  # diimpor sebagai paket web.utils dari app.py di root repo
+    from web.artifact_store import ArtifactHandle, ArtifactStore
+    from web.search_index import TrigramIndex
+
+# Katalog Parquet hasil processing/convert_catalog.py dan pemetaan kolomnya ke kolom tampilan web
+CATALOG_PATH = os.environ.get("CATALOG_PATH", "s3://music-data/catalog/music_info")
+CATALOG_COLUMNS = {"track_name": "Title", "artist_name": "Artist", "genre": "Genre", "year": "Year"}
+
+# Index preferensi -> top-K track yang dibangun oleh processing/build_index.py
+PREFERENCE_INDEX_PATH = os.environ.get("PREFERENCE_INDEX_PATH", "s3://music-data/index/preference_topk")
+PREFERENCE_KEYS = ("genre", "artist_name", "language")
+WILDCARD = "*"
+
+# Tabel tetangga item-item dari processing/content_similarity.py
+SIMILARITY_PATH = os.environ.get("SIMILARITY_PATH", "s3://music-data/similarity/neighbours")
+
+# Sink rekomendasi per user yang ditulis oleh processing/spark_train.py
+RECOMMENDATIONS_DB = os.environ.get("RECOMMENDATIONS_DB", "data/recommendations.db")
+
+# Metrik streaming per batch dari processing/metrics_store.py
+METRICS_DB = os.environ.get("METRICS_DB", "data/metrics.db")
+STREAM_QUERY_NAME = "song_recommender"
+
+# Setelah katalog/tabel tetangga gagal dimuat, pemuatan baru dicoba lagi setelah selang ini
+LOAD_RETRY_INTERVAL_S = float(os.environ.get("LOAD_RETRY_INTERVAL_S", 60))
+
+# Rollup dashboard (events_hour, events_day, served_hour) dari processing/rollups.py
+ROLLUP_PATH = os.environ.get("ROLLUP_PATH", "s3://music-data/rollups")
+
+# Opsi koneksi MinIO untuk pembacaan s3:// lewat fsspec/s3fs
+S3_STORAGE_OPTIONS = {
+    "key": os.environ.get("MINIO_ACCESS_KEY", "minioadmin"),
+    "secret": os.environ.get("MINIO_SECRET_KEY", "minioadmin"),
+    "client_kwargs": {"endpoint_url": os.environ.get("MINIO_ENDPOINT", "http://minio:9000")},
+}
 
 # Data dummy untuk simulasi
 DUMMY_MUSIC_CATALOG = [
@@ -49,42 +92,422 @@ def _generate_image_url(title: str, artist: str) -> str:
     # Ukuran gambar 200x200, warna latar belakang abu-abu gelap, teks putih
     return f"https://placehold.co/200x200/343a40/ffffff?text={text}"
 
+class MusicCatalog:
+    """
+    Katalog lagu read-only yang disimpan per kolom dalam array NumPy/pandas.
+
+    Genre dan Artist disimpan sebagai kategori (kode integer), setiap genre
+    punya array row id yang sudah dibangun di awal (inverted index), dan judul +
+    artis diindeks dengan TrigramIndex untuk pencarian teks bebas. Filter,
+    pencarian dan sampling hanya berupa operasi index pada array; DataFrame
+    (beserta Image_URL) dibentuk hanya untuk baris hasil akhir.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.reset_index(drop=True)
+        self.titles = df["Title"].astype(str).to_numpy()
+        self.years = df["Year"].to_numpy()
+        self.genres = pd.Categorical(df["Genre"])
+        self.artists = pd.Categorical(df["Artist"])
+        self.search_index = TrigramIndex(self._search_texts())
+
+        # Inverted index genre -> row id: satu argsort pada kode kategori, lalu dipotong per genre
+        codes = self.genres.codes
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.genres.categories))
+        order = order[len(order) - counts.sum():]  # buang baris tanpa genre (kode -1)
+        self.genre_rows = dict(zip(self.genres.categories, np.split(order, np.cumsum(counts)[:-1])))
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _search_texts(self) -> np.ndarray:
+        """Teks yang diindeks TrigramIndex per lagu: "judul artis"."""
+        artist_names = np.append(self.artists.categories.to_numpy(dtype=object), "")[self.artists.codes]
+        return np.char.add(np.char.add(np.asarray(self.titles).astype(str), " "), artist_names.astype(str))
+
+    @classmethod
+    def from_records(cls, records) -> "MusicCatalog":
+        return cls(pd.DataFrame.from_records(records, columns=list(CATALOG_COLUMNS.values())))
+
+    @classmethod
+    def from_parquet(cls, path: str = CATALOG_PATH) -> "MusicCatalog":
+        """Membaca hanya kolom yang dipakai web dari katalog Parquet (lokal atau s3://)."""
+        df = pd.read_parquet(path, columns=list(CATALOG_COLUMNS), storage_options=_storage_options(path))
+        return cls(df.rename(columns=CATALOG_COLUMNS))
+
+    def rows_for_genres(self, genres) -> np.ndarray:
+        """Row id semua lagu dengan salah satu genre yang diberikan."""
+        parts = [self.genre_rows[g] for g in genres if g in self.genre_rows]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def sample(self, n: int, rows: np.ndarray = None, exclude: int = None, rng=None) -> np.ndarray:
+        """Sampel acak (tanpa pengembalian) n row id dari rows (default: seluruh katalog)."""
+        rng = rng or _rng
+        if rows is None:
+            rows = np.arange(len(self))
+        if exclude is not None:
+            rows = rows[rows != exclude]
+        return rng.choice(rows, size=min(n, len(rows)), replace=False)
+
+    def search(self, term: str, limit: int = None) -> tuple:
+        """
+        Pencarian judul/artis (awalan, toleran salah ketik, terurut relevansi).
+        Mengembalikan (row id teratas sebanyak limit, total lagu yang cocok).
+        """
+        rows, _, total = self.search_index.search(term, limit)
+        return rows, total
+
+    def resolve_title(self, title: str):
+        """Row id lagu yang paling cocok dengan judul teks bebas, atau None."""
+        return self.search_index.resolve(title)
+
+    @classmethod
+    def from_artifact(cls, artifact) -> "MusicCatalog":
+        """
+        Katalog dari artifact "catalog" (artifact_store.py) tanpa membangun ulang
+        index: array numerik dan index trigram tetap berupa memory map, judul
+        tetap berupa kolom Arrow, jadi semua worker berbagi page yang sama.
+        """
+        arrays, tables = artifact.arrays, artifact.tables
+        catalog = cls.__new__(cls)
+        catalog.titles = tables["titles"].column("title")
+        catalog.years = arrays["years"]
+        catalog.genres = pd.Categorical.from_codes(arrays["genre_codes"],
+                                                   categories=tables["genres"].column("genre").to_pylist())
+        catalog.artists = pd.Categorical.from_codes(arrays["artist_codes"],
+                                                    categories=tables["artists"].column("artist").to_pylist())
+        if all(f"index_{name}" in arrays for name in TrigramIndex.ARRAYS):
+            catalog.search_index = TrigramIndex.from_arrays(
+                {name: arrays[f"index_{name}"] for name in TrigramIndex.ARRAYS})
+        else:
+            # Artifact dari format index lama: bangun ulang dari judul dan artis
+            catalog.search_index = TrigramIndex(catalog._search_texts())
+        counts = arrays["genre_counts"]
+        catalog.genre_rows = dict(zip(catalog.genres.categories,
+                                      np.split(arrays["genre_order"], np.cumsum(counts)[:-1])))
+        return catalog
+
+    def to_artifact(self) -> tuple:
+        """(arrays, tables) untuk ArtifactStore.publish; kebalikan dari from_artifact."""
+        years = self.years if self.years.dtype != object else pd.to_numeric(self.years, errors="coerce")
+        arrays = {
+            "years": np.asarray(years),
+            "genre_codes": self.genres.codes,
+            "artist_codes": self.artists.codes,
+            "genre_order": np.concatenate(list(self.genre_rows.values()) or [np.empty(0, dtype=np.int64)]),
+            "genre_counts": np.array([len(rows) for rows in self.genre_rows.values()], dtype=np.int64),
+            **{f"index_{name}": array for name, array in self.search_index.to_arrays().items()},
+        }
+        tables = {
+            "titles": pa.table({"title": pa.array(self.titles, type=pa.string())}),
+            "genres": pa.table({"genre": pa.array(self.genres.categories.astype(str), type=pa.string())}),
+            "artists": pa.table({"artist": pa.array(self.artists.categories.astype(str), type=pa.string())}),
+        }
+        return arrays, tables
+
+    def take(self, rows) -> pd.DataFrame:
+        """DataFrame tampilan (Title, Artist, Genre, Year, Image_URL) untuk row id yang diberikan."""
+        if isinstance(self.titles, pa.ChunkedArray):
+            titles = self.titles.take(pa.array(np.asarray(rows, dtype=np.int64))).to_numpy(zero_copy_only=False)
+        else:
+            titles = self.titles[rows]
+        artists = self.artists.take(rows)
+        return pd.DataFrame({
+            "Title": titles,
+            "Artist": artists,
+            "Genre": self.genres.take(rows),
+            "Year": self.years[rows],
+            "Image_URL": [_generate_image_url(t, str(a)) for t, a in zip(titles, artists)],
+        })
+
+
+_rng = np.random.default_rng()
+_dummy_catalog = MusicCatalog.from_records(DUMMY_MUSIC_CATALOG)
+_catalog = None
+# Katalog yang dipublikasikan sebagai artifact (python web/artifact_store.py publish-catalog)
+# dipakai lebih dulu: di-mmap dan ditukar ke versi baru tanpa restart
+_artifact_store = ArtifactStore(storage_options=S3_STORAGE_OPTIONS)
+_catalog_artifact = ArtifactHandle(_artifact_store, "catalog", loader=MusicCatalog.from_artifact)
+# Nama tabel -> waktu (monotonic) pemuatan terakhir yang gagal
+_load_failed_at = {}
+
+
+def _load_cached(name, load):
+    """
+    Memanggil load() kecuali pemuatan name gagal kurang dari LOAD_RETRY_INTERVAL_S
+    yang lalu. Mengembalikan None jika gagal, supaya request saat data belum ada
+    tidak masing-masing membayar read_parquet ke MinIO.
+    """
+    failed_at = _load_failed_at.get(name)
+    if failed_at is not None and time.monotonic() - failed_at < LOAD_RETRY_INTERVAL_S:
+        return None
+    try:
+        value = load()
+    except (FileNotFoundError, OSError, ImportError):
+        _load_failed_at[name] = time.monotonic()
+        return None
+    _load_failed_at.pop(name, None)
+    return value
+
+
+def get_catalog_version() -> str:
+    """
+    Versi data katalog yang sedang dipublikasikan: versi artifact "catalog" dan
+    isi file _VERSION yang ditulis oleh convert_catalog.py dan content_similarity.py.
+    Berubah setiap kali salah satunya dipublikasikan ulang, sehingga bisa dipakai
+    untuk invalidasi cache.
+    """
+    try:
+        parts = [_artifact_store.current_version("catalog") or "none"]
+    except (OSError, ImportError):
+        parts = ["none"]
+    for path in (CATALOG_PATH, SIMILARITY_PATH):
+        try:
+            parts.append(_read_text(f"{path}/_VERSION") or "none")
+        except (OSError, ImportError):
+            parts.append("none")
+    return ":".join(parts)
+
+
+def reload_catalog():
+    """Hook invalidasi: katalog dan tabel tetangga dimuat ulang pada akses berikutnya."""
+    global _catalog, _neighbour_table
+    _catalog = None
+    _neighbour_table = None
+    _load_failed_at.clear()
+    _catalog_artifact.invalidate()
+
+
+def get_catalog() -> MusicCatalog:
+    """
+    Katalog dari artifact "catalog" jika sudah dipublikasikan; jika belum, katalog
+    Parquet dimuat sekali per proses, dengan fallback ke katalog dummy (pemuatan
+    yang gagal baru dicoba lagi setelah LOAD_RETRY_INTERVAL_S).
+    """
+    global _catalog
+    catalog = _catalog_artifact.get()
+    if catalog is not None:
+        return catalog
+    if _catalog is None:
+        _catalog = _load_cached("catalog", MusicCatalog.from_parquet)
+        if _catalog is None:
+            return _dummy_catalog
+    return _catalog
+
+
 def get_recommendations_dummy(user_song_title: str, num_recs: int = 10) -> pd.DataFrame:
     """
     Mengembalikan rekomendasi musik dummy berdasarkan judul lagu input.
-    Fungsi ini sekarang juga menambahkan URL gambar.
+    Judul di-resolve lewat index pencarian katalog; rekomendasi diambil dari
+    kelompok genre lagu tersebut. Fungsi ini sekarang juga menambahkan URL gambar.
     """
     lower_input = user_song_title.lower()
-    if "queen" in lower_input or "bohemian" in lower_input:
-        similar_songs = [s for s in DUMMY_MUSIC_CATALOG if s["Genre"] in ["Classic Rock", "Rock"]]
-    elif "pop" in lower_input or "shape of you" in lower_input:
-        similar_songs = [s for s in DUMMY_MUSIC_CATALOG if s["Genre"] in ["Pop", "Dance-Pop", "Latin Pop"]]
-    elif "hip hop" in lower_input or "montero" in lower_input:
-        similar_songs = [s for s in DUMMY_MUSIC_CATALOG if s["Genre"] in ["Hip Hop", "R&B", "Country Rap"]]
+    song_row = _dummy_catalog.resolve_title(user_song_title)
+    genre = _dummy_catalog.genres[song_row] if song_row is not None else None
+    if genre in ("Classic Rock", "Rock") or "queen" in lower_input or "bohemian" in lower_input:
+        rows = _dummy_catalog.rows_for_genres(["Classic Rock", "Rock"])
+    elif genre in ("Pop", "Dance-Pop", "Latin Pop") or "pop" in lower_input or "shape of you" in lower_input:
+        rows = _dummy_catalog.rows_for_genres(["Pop", "Dance-Pop", "Latin Pop"])
+    elif genre in ("Hip Hop", "R&B", "Country Rap") or "hip hop" in lower_input or "montero" in lower_input:
+        rows = _dummy_catalog.rows_for_genres(["Hip Hop", "R&B", "Country Rap"])
     else:
-        similar_songs = list(DUMMY_MUSIC_CATALOG)
-
-    random.shuffle(similar_songs)
-    recommended_songs = []
-    for song in similar_songs:
-        if song["Title"].lower() != lower_input:
-            song_with_image = song.copy()
-            song_with_image["Image_URL"] = _generate_image_url(song["Title"], song["Artist"])
-            recommended_songs.append(song_with_image)
-        if len(recommended_songs) >= num_recs:
-            break
+        rows = None
 
-    return pd.DataFrame(recommended_songs)
+    return _dummy_catalog.take(_dummy_catalog.sample(num_recs, rows, exclude=song_row))
 
 def get_music_info_dummy(limit: int = 100) -> pd.DataFrame:
     """
     Mengembalikan sampel informasi musik dummy, sekarang juga menambahkan URL gambar.
     """
-    # Pastikan limit tidak melebihi jumlah data dummy yang tersedia
-    actual_limit = min(limit, len(DUMMY_MUSIC_CATALOG))
-    selected_songs = random.sample(DUMMY_MUSIC_CATALOG, actual_limit)
+    return _dummy_catalog.take(_dummy_catalog.sample(limit))
+
+
+def _storage_options(path: str):
+    """Opsi storage untuk pandas/fsspec: hanya dipakai untuk path s3://."""
+    return S3_STORAGE_OPTIONS if path.startswith("s3://") else None
+
+
+def _read_text(path: str):
+    """Membaca file teks kecil dari lokal atau MinIO, None jika tidak ada."""
+    import fsspec
+
+    try:
+        with fsspec.open(path, "r", **(_storage_options(path) or {})) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def get_preference_recommendations(genre: str = None, artist: str = None, language: str = None,
+                                   num_recs: int = 10) -> pd.DataFrame:
+    """
+    Mengambil rekomendasi dari index preferensi dengan lookup kunci (genre, artist, language).
+    Field yang kosong diperlakukan sebagai wildcard, sama seperti di index.
+    Mengembalikan DataFrame kosong jika index belum dibangun atau kunci tidak ditemukan.
+    """
+    version = _read_text(f"{PREFERENCE_INDEX_PATH}/_CURRENT")
+    if version is None:
+        return pd.DataFrame()
+
+    values = [v.strip() if v and v.strip() else WILDCARD for v in (genre, artist, language)]
+    pattern = ".".join(key if v != WILDCARD else "any" for key, v in zip(PREFERENCE_KEYS, values))
+    filters = [("key_pattern", "==", pattern)] + [(key, "==", v) for key, v in zip(PREFERENCE_KEYS, values)]
+
+    path = f"{PREFERENCE_INDEX_PATH}/v={version}/index"
+    index_df = pd.read_parquet(path, filters=filters, storage_options=_storage_options(path))
+    if index_df.empty:
+        return pd.DataFrame()
+
+    row = index_df.iloc[0]
+    n = min(num_recs, len(row["track_ids"]))
+    return pd.DataFrame({
+        "Rank": range(1, n + 1),
+        "track_id": list(row["track_ids"][:n]),
+        "Title": list(row["track_names"][:n]),
+        "Artist": list(row["artist_names"][:n]),
+        "Genre": values[0] if values[0] != WILDCARD else None,
+    })
+
+
+class NeighbourTable:
+    """
+    Tabel tetangga (top-K per lagu) yang sudah dihitung, disimpan di memori.
+    Baris diurutkan per (track_id, rank) sehingga lookup satu lagu hanya
+    berupa slicing offset, tanpa scan.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df.sort_values(["track_id", "rank"]).reset_index(drop=True)
+        track_ids = self.df["track_id"].to_numpy()
+        starts = self.df.index[self.df["track_id"].ne(self.df["track_id"].shift())].to_numpy()
+        ends = list(starts[1:]) + [len(self.df)]
+        self.offsets = {track_ids[s]: (s, e) for s, e in zip(starts, ends)}
+
+        titles = self.df.drop_duplicates("track_id")[["track_id", "track_name"]]
+        self.title_to_track = dict(zip(titles["track_name"].str.lower(), titles["track_id"]))
+        self.title_track_ids = titles["track_id"].to_numpy()
+        self.title_index = TrigramIndex(titles["track_name"])
+
+    @classmethod
+    def load(cls, path: str = SIMILARITY_PATH) -> "NeighbourTable":
+        return cls(pd.read_parquet(path, storage_options=_storage_options(path)))
+
+    def resolve_title(self, title: str):
+        """Mencari track_id dari judul lagu (exact, lalu lewat index trigram: awalan/salah ketik)."""
+        lower_title = title.strip().lower()
+        if lower_title in self.title_to_track:
+            return self.title_to_track[lower_title]
+        row = self.title_index.resolve(lower_title)
+        return self.title_track_ids[row] if row is not None else None
+
+    def neighbours(self, track_id, k: int) -> pd.DataFrame:
+        start, end = self.offsets.get(track_id, (0, 0))
+        return self.df.iloc[start:min(end, start + k)]
+
+
+_neighbour_table = None
+
+
+def get_neighbour_table():
+    """
+    Memuat tabel tetangga sekali per proses; None jika belum tersedia (dicoba
+    lagi paling cepat LOAD_RETRY_INTERVAL_S kemudian).
+    """
+    global _neighbour_table
+    if _neighbour_table is None:
+        _neighbour_table = _load_cached("neighbours", NeighbourTable.load)
+    return _neighbour_table
+
+
+def get_recommendations(user_song_title: str, num_recs: int = 10) -> pd.DataFrame:
+    """
+    Rekomendasi content-based dari tabel tetangga yang sudah dihitung.
+    Fallback ke get_recommendations_dummy jika tabel belum ada atau judul tidak dikenal.
+    """
+    table = get_neighbour_table()
+    track_id = table.resolve_title(user_song_title) if table is not None else None
+    if track_id is None:
+        return get_recommendations_dummy(user_song_title, num_recs)
+
+    rows = table.neighbours(track_id, num_recs)
+    return pd.DataFrame({
+        "Title": rows["neighbor_name"].to_numpy(),
+        "Artist": rows["neighbor_artist"].to_numpy(),
+        "Genre": rows["neighbor_genre"].to_numpy(),
+        "Year": rows["neighbor_year"].to_numpy(),
+        "Similarity": rows["similarity"].round(3).to_numpy(),
+        "Image_URL": [_generate_image_url(t, a) for t, a in zip(rows["neighbor_name"], rows["neighbor_artist"])],
+    })
+
+
+def get_user_recommendations(user_id: str, num_recs: int = 10) -> pd.DataFrame:
+    """
+    Point lookup rekomendasi terbaru seorang user dari sink SQLite (read-only).
+    Mengembalikan DataFrame kosong jika sink belum ada atau user belum punya rekomendasi.
+    """
+    if not os.path.exists(RECOMMENDATIONS_DB):
+        return pd.DataFrame()
+    conn = sqlite3.connect(f"file:{RECOMMENDATIONS_DB}?mode=ro", uri=True, timeout=5)
+    try:
+        return pd.read_sql_query(
+            "SELECT rank AS Rank, track_id, track_name AS Title, artist_name AS Artist, "
+            "genre AS Genre, language AS Language FROM recommendations "
+            "WHERE user_id = ? ORDER BY rank LIMIT ?",
+            conn, params=(user_id, num_recs),
+        )
+    finally:
+        conn.close()
+
 
-    for song in selected_songs:
-        song["Image_URL"] = _generate_image_url(song["Title"], song["Artist"])
-    
-    return pd.DataFrame(selected_songs)
\ No newline at end of file
+def get_stream_metrics(since_seconds: int = 3600, query_name: str = STREAM_QUERY_NAME) -> pd.DataFrame:
+    """
+    Metrik per micro-batch (durasi, rows/detik, lag Kafka, ukuran state) query
+    query_name dalam rentang waktu terakhir, diurutkan berdasarkan waktu.
+    """
+    if not os.path.exists(METRICS_DB):
+        return pd.DataFrame()
+    conn = sqlite3.connect(f"file:{METRICS_DB}?mode=ro", uri=True, timeout=5)
+    try:
+        df = pd.read_sql_query(
+            "SELECT * FROM stream_metrics WHERE query_name = ? AND ts >= strftime('%s', 'now') - ? ORDER BY ts",
+            conn, params=(query_name, since_seconds),
+        )
+    finally:
+        conn.close()
+    df["Timestamp"] = pd.to_datetime(df["ts"], unit="s")
+    return df
+
+
+def get_rollup(name: str) -> pd.DataFrame:
+    """
+    Satu tabel rollup dashboard (file Parquet kecil), dengan period_start
+    sebagai timestamp UTC tanpa zona waktu. DataFrame kosong jika belum ada
+    atau storage tidak bisa dibaca.
+    """
+    path = f"{ROLLUP_PATH}/{name}.parquet"
+    try:
+        df = pd.read_parquet(path, storage_options=_storage_options(path))
+    except (FileNotFoundError, OSError, ImportError):
+        return pd.DataFrame()
+    period_start = pd.to_datetime(df["period_start"])
+    if period_start.dt.tz is not None:
+        period_start = period_start.dt.tz_convert("UTC").dt.tz_localize(None)
+    return df.assign(period_start=period_start)
+
+
+def search_catalog(search_term: str, limit: int = 50, offset: int = 0,
+                   catalog: MusicCatalog = None) -> tuple:
+    """
+    Satu halaman hasil pencarian katalog berdasarkan judul atau artis
+    (case-insensitive). Mengembalikan (DataFrame halaman, total lagu yang cocok);
+    hanya baris di halaman tersebut yang dibentuk menjadi DataFrame.
+    """
+    catalog = catalog or get_catalog()
+    if search_term.strip():
+        rows, total = catalog.search(search_term, offset + limit)
+        page = rows[offset:]
+    else:
+        total = len(catalog)
+        page = np.arange(min(offset, total), min(offset + limit, total))
+    return catalog.take(page), total